@@ -0,0 +1,63 @@
+"""
+Benchmark : modes d'extraction PDF (fast, layout, auto) sur le même corpus
+
+Pour chaque document, mesure la durée d'extraction de chaque mode, le mode
+choisi par "auto" et si le texte rapide est identique au texte avec
+analyse de mise en page.
+
+Usage (depuis backend/) :
+    python benchmarks/bench_pdf_modes.py --pages 20 --repeat 5
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import make_pdf
+
+# Corpus : nom -> paramètres de make_pdf (hors nombre de pages)
+CORPUS = {
+    "1 colonne": {"columns": 1, "placeholders": True},
+    "2 colonnes": {"columns": 2},
+    "2 colonnes entrelacées": {"columns": 2, "interleaved": True},
+    "3 colonnes entrelacées": {"columns": 3, "interleaved": True},
+}
+
+MODES = ("fast", "layout", "auto")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--lines", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ["CACHE_ENABLED"] = "0"
+    import main as backend
+
+    print(f"{'document':<24}" + "".join(f"{mode:>10}" for mode in MODES) + f"{'auto ->':>10}{'fast = layout':>16}")
+    for name, params in CORPUS.items():
+        content = make_pdf(pages=args.pages, lines_per_page=args.lines, **params)
+        timings = {}
+        results = {}
+        for mode in MODES:
+            durations = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                results[mode] = backend.extract_text_from_pdf(content, mode)
+                durations.append(time.perf_counter() - start)
+            timings[mode] = min(durations)
+
+        same_text = results["fast"]["text"] == results["layout"]["text"]
+        print(
+            f"{name:<24}" + "".join(f"{timings[mode]:>9.2f}s" for mode in MODES)
+            + f"{results['auto']['extraction_mode']:>10}{'oui' if same_text else 'non':>16}"
+        )
+    print(f"({args.pages} pages de {args.lines} lignes, meilleur temps sur {args.repeat} essais)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark : sérialisation et compression d'une grosse réponse de texte PDF
+
+Pour un résultat de /extract-pdf-text/ de plusieurs Mo, mesure le chemin de
+réponse par défaut de FastAPI (jsonable_encoder + json) contre FastJSONResponse
+(orjson), puis la taille et la durée de compression gzip / brotli.
+
+Usage (depuis backend/) :
+    python benchmarks/bench_responses.py --sizes 5,10 --repeat 5
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import make_pdf
+
+
+def best_time(func, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        durations.append(time.perf_counter() - start)
+    return min(durations), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="5,10", help="Tailles du texte en Mo, séparées par des virgules")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ["CACHE_ENABLED"] = "0"
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    import main as backend
+    from response_encoding import FastJSONResponse, CompressionMiddleware, brotli, orjson
+
+    # Texte réel d'un PDF du corpus, répété jusqu'à la taille voulue
+    sample = backend.extract_text_from_pdf(make_pdf(pages=10, placeholders=True), "fast")
+    middleware = CompressionMiddleware(None)
+    encodings = ("gzip", "br") if brotli is not None else ("gzip",)
+
+    print(f"encodeur JSON rapide : {'orjson' if orjson is not None else 'json (orjson non installé)'}")
+    for size_mb in (float(size) for size in args.sizes.split(",")):
+        copies = max(1, int(size_mb * 1024 * 1024 / len(sample["text"].encode("utf-8"))))
+        result = {**sample, "total_pages": sample["total_pages"] * copies, "text": sample["text"] * copies}
+
+        default_time, default_body = best_time(lambda: JSONResponse(jsonable_encoder(result)).body, args.repeat)
+        fast_time, fast_body = best_time(lambda: FastJSONResponse(result).body, args.repeat)
+        print(f"\ntexte de {len(result['text'].encode('utf-8')) / 1e6:.1f} Mo")
+        print(f"  {'json (FastAPI par défaut)':<28}{default_time * 1000:>9.1f} ms{len(default_body):>14,} octets")
+        print(f"  {'FastJSONResponse':<28}{fast_time * 1000:>9.1f} ms{len(fast_body):>14,} octets")
+
+        for encoding in encodings:
+            compress_time, compressed = best_time(
+                lambda: middleware._compressor(encoding).compress(fast_body, final=True), args.repeat
+            )
+            print(
+                f"  {'+ ' + encoding:<28}{compress_time * 1000:>9.1f} ms{len(compressed):>14,} octets"
+                f"  ({len(fast_body) / len(compressed):.1f}x plus petit)"
+            )
+
+
+if __name__ == "__main__":
+    main()
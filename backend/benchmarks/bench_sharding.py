@@ -0,0 +1,74 @@
+"""
+Benchmark : extraction PDF en une passe contre extraction parallèle par plages de pages
+
+Usage (depuis backend/) :
+    python benchmarks/bench_sharding.py --pages 120 --workers 8
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import make_pdf
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=120)
+    parser.add_argument("--lines", type=int, default=60)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # La configuration de l'exécuteur est lue à l'import
+    os.environ["PARSING_MAX_WORKERS"] = str(args.workers)
+    os.environ["CACHE_ENABLED"] = "0"
+    import main as backend
+    from parsing_executor import get_process_pool, shutdown_executors
+
+    content = make_pdf(pages=args.pages, lines_per_page=args.lines)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as f:
+        f.write(content)
+        path = f.name
+
+    async def sharded():
+        return await backend.extract_text_from_pdf_parallel(path, size=len(content), sharding="on")
+
+    async def warm_up():
+        # Démarrer tous les workers avant de mesurer
+        pool = get_process_pool()
+        await asyncio.gather(*[
+            asyncio.wrap_future(pool.submit(backend.count_pdf_pages, path)) for _ in range(args.workers)
+        ])
+
+    try:
+        reference = backend.extract_text_from_pdf(path)
+        asyncio.run(warm_up())
+
+        single_times, sharded_times = [], []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            backend.extract_text_from_pdf(path)
+            single_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            result = asyncio.run(sharded())
+            sharded_times.append(time.perf_counter() - start)
+            assert result["text"] == reference["text"], "le texte parallèle diffère de la passe unique"
+
+        single, parallel = min(single_times), min(sharded_times)
+        print(f"PDF : {args.pages} pages, {len(content) / 1024:.0f} Ko, {args.workers} workers")
+        print(f"Passe unique        : {single:.2f} s")
+        print(f"Plages parallèles   : {parallel:.2f} s")
+        print(f"Accélération        : x{single / parallel:.2f}")
+    finally:
+        shutdown_executors()
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+Suite de benchmarks : fonctions d'extraction et endpoints FastAPI, en processus
+
+Génère un corpus synthétique (templates Word avec tableaux et cellules
+fusionnées, PDF d'une ou plusieurs colonnes, texte de rapport), mesure
+chaque fonction d'extraction et chaque endpoint (via TestClient, sans
+serveur), puis écrit les résultats en JSON : débit, latences p50/p95/p99
+et pic de mémoire (RSS). Chaque scénario s'exécute dans un processus
+neuf pour que le pic de mémoire mesuré soit le sien. Le cache
+d'extraction est désactivé : chaque itération refait tout le travail.
+
+Usage (depuis backend/) :
+    python benchmarks/bench_suite.py
+    python benchmarks/bench_suite.py --only pdf --repeat 20
+    python benchmarks/bench_suite.py --output benchmarks/results/apres.json --compare benchmarks/results/avant.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from corpus import make_docx, make_pdf, make_report_text
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Corpus : nom -> (générateur, paramètres)
+CORPUS = {
+    "docx-small": (make_docx, {"paragraphs": 50, "tables": 1, "rows": 5, "cols": 3}),
+    "docx-large": (make_docx, {"paragraphs": 1000, "tables": 20, "rows": 20, "cols": 6}),
+    "docx-dense": (make_docx, {"paragraphs": 300, "tables": 5, "rows": 10, "cols": 4, "density": 1.0}),
+    "pdf-10p": (make_pdf, {"pages": 10, "placeholders": True}),
+    "pdf-50p": (make_pdf, {"pages": 50}),
+    "pdf-50p-2col": (make_pdf, {"pages": 50, "columns": 2}),
+    "text-50p": (make_report_text, {"pages": 50}),
+}
+
+# Scénarios : (nom, type, cible, corpus)
+SCENARIOS = [
+    ("analyze_template/docx-small", "function", "template_analysis.analyze_template", "docx-small"),
+    ("analyze_template/docx-large", "function", "template_analysis.analyze_template", "docx-large"),
+    ("analyze_template/docx-dense", "function", "template_analysis.analyze_template", "docx-dense"),
+    ("extract_placeholders_from_docx/docx-large", "function", "extract_placeholders.extract_placeholders_from_docx", "docx-large"),
+    ("extract_placeholders_with_context/docx-large", "function", "extract_placeholders_advanced.extract_placeholders_with_context", "docx-large"),
+    ("extract_text_from_pdf/pdf-10p", "function", "main.extract_text_from_pdf", "pdf-10p"),
+    ("extract_text_from_pdf/pdf-50p", "function", "main.extract_text_from_pdf", "pdf-50p"),
+    ("extract_text_from_pdf/pdf-50p-2col", "function", "main.extract_text_from_pdf", "pdf-50p-2col"),
+    ("extract_v3_fields/text-50p", "function", "v3_rules.extract_v3_fields", "text-50p"),
+    ("POST /extract-placeholders/", "endpoint", "/extract-placeholders/", "docx-large"),
+    ("POST /analyze-template-advanced/", "endpoint", "/analyze-template-advanced/", "docx-large"),
+    ("POST /analyze-template-advanced/?format=compact", "endpoint", "/analyze-template-advanced/?format=compact", "docx-large"),
+    ("POST /extract-pdf-text/", "endpoint", "/extract-pdf-text/", "pdf-50p"),
+    ("POST /extract-pdf-text/?mode=fast", "endpoint", "/extract-pdf-text/?mode=fast", "pdf-50p"),
+    ("POST /extract-pdf-placeholders/", "endpoint", "/extract-pdf-placeholders/", "pdf-10p"),
+    ("POST /process-text-for-v3/", "endpoint", "/process-text-for-v3/", "text-50p"),
+    ("POST /process-pdf-for-v3/", "endpoint", "/process-pdf-for-v3/", "pdf-50p"),
+    ("POST /process-pdf-for-v3/?stop_when_found=true", "endpoint", "/process-pdf-for-v3/?stop_when_found=true", "pdf-50p"),
+]
+
+
+def build_corpus(name, seed):
+    generator, params = CORPUS[name]
+    return generator(seed=seed, **params)
+
+
+def percentile(sorted_values, q):
+    """
+    Percentile par interpolation linéaire entre les deux rangs voisins
+    """
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    rank = (len(sorted_values) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def peak_rss_mb(who):
+    # ru_maxrss est en Ko sous Linux, en octets sous macOS
+    value = resource.getrusage(who).ru_maxrss
+    return round(value / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def make_function_call(target, document):
+    module_name, func_name = target.rsplit(".", 1)
+    func = getattr(__import__(module_name), func_name)
+
+    def call():
+        result = func(document)
+        if isinstance(result, dict) and "error" in result:
+            raise RuntimeError(result["error"])
+    return call
+
+
+def make_endpoint_call(client, path, document):
+    if isinstance(document, str):
+        def call():
+            response = client.post(path, json={"text": document, "current_data": {}})
+            response.raise_for_status()
+        return call
+
+    filename = "bench.docx" if document[:2] == b"PK" else "bench.pdf"
+
+    def call():
+        response = client.post(path, files={"file": (filename, document)})
+        response.raise_for_status()
+    return call
+
+
+def measure(call, repeat, warmup):
+    for _ in range(warmup):
+        call()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_scenario(name, repeat, warmup, seed):
+    """
+    Exécute un scénario dans le processus courant et retourne ses mesures
+    """
+    _, kind, target, corpus_name = next(s for s in SCENARIOS if s[0] == name)
+    document = build_corpus(corpus_name, seed)
+    size = len(document.encode("utf-8")) if isinstance(document, str) else len(document)
+
+    if kind == "function":
+        timings = measure(make_function_call(target, document), repeat, warmup)
+    else:
+        from fastapi.testclient import TestClient
+        from parsing_executor import shutdown_executors
+        import main as backend
+
+        try:
+            with TestClient(backend.app) as client:
+                timings = measure(make_endpoint_call(client, target, document), repeat, warmup)
+        finally:
+            # Les workers terminés comptent alors dans RUSAGE_CHILDREN
+            shutdown_executors()
+
+    ordered = sorted(timings)
+    total = sum(timings)
+    return {
+        "name": name,
+        "kind": kind,
+        "target": target,
+        "corpus": corpus_name,
+        "corpus_params": CORPUS[corpus_name][1],
+        "input_bytes": size,
+        "iterations": len(timings),
+        "throughput_per_s": round(len(timings) / total, 3),
+        "throughput_mb_s": round(size * len(timings) / total / (1024 * 1024), 3),
+        "latency_ms": {
+            "min": round(ordered[0] * 1000, 2),
+            "mean": round(total / len(timings) * 1000, 2),
+            "p50": round(percentile(ordered, 50) * 1000, 2),
+            "p95": round(percentile(ordered, 95) * 1000, 2),
+            "p99": round(percentile(ordered, 99) * 1000, 2),
+            "max": round(ordered[-1] * 1000, 2),
+        },
+        "peak_rss_mb": peak_rss_mb(resource.RUSAGE_SELF),
+        "peak_rss_workers_mb": peak_rss_mb(resource.RUSAGE_CHILDREN),
+    }
+
+
+def run_isolated(name, args, env):
+    # Un processus neuf par scénario : le pic RSS n'hérite pas des scénarios précédents
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--run-scenario", name,
+         "--repeat", str(args.repeat), "--warmup", str(args.warmup), "--seed", str(args.seed)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        return {"name": name, "error": completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "échec"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run_metadata(args):
+    import pdfminer
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "pdfminer": pdfminer.__version__,
+        "parsing_max_workers": os.environ.get("PARSING_MAX_WORKERS"),
+        "repeat": args.repeat,
+        "warmup": args.warmup,
+        "seed": args.seed,
+    }
+
+
+def print_results(results, baseline):
+    previous = {r["name"]: r for r in baseline.get("results", []) if "error" not in r} if baseline else {}
+    header = f"{'scénario':<48} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10} {'op/s':>8} {'Mo/s':>8} {'RSS (Mo)':>9}"
+    if previous:
+        header += f" {'Δ p50':>8}"
+    print(header)
+    for result in results:
+        if "error" in result:
+            print(f"{result['name']:<48} ERREUR : {result['error']}")
+            continue
+        latency = result["latency_ms"]
+        rss = max(result["peak_rss_mb"], result["peak_rss_workers_mb"])
+        line = (f"{result['name']:<48} {latency['p50']:>10.1f} {latency['p95']:>10.1f} {latency['p99']:>10.1f} "
+                f"{result['throughput_per_s']:>8.2f} {result['throughput_mb_s']:>8.2f} {rss:>9.1f}")
+        before = previous.get(result["name"])
+        if before:
+            line += f" {(latency['p50'] / before['latency_ms']['p50'] - 1) * 100:>+7.1f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="+", default=None, help="Ne garder que les scénarios dont le nom contient l'un de ces motifs")
+    parser.add_argument("--output", default=None, help="Fichier JSON des résultats (défaut : benchmarks/results/<date>.json)")
+    parser.add_argument("--compare", default=None, help="Résultats JSON d'une exécution précédente")
+    parser.add_argument("--list", action="store_true", help="Lister les scénarios")
+    parser.add_argument("--run-scenario", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.list:
+        for name, kind, _, corpus_name in SCENARIOS:
+            print(f"{name:<48} {kind:<9} {corpus_name}")
+        return
+
+    if args.run_scenario:
+        print(json.dumps(run_scenario(args.run_scenario, args.repeat, args.warmup, args.seed)))
+        return
+
+    names = [s[0] for s in SCENARIOS if not args.only or any(p in s[0] for p in args.only)]
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        # Mesurer l'extraction elle-même : pas de cache, bases SQLite jetables
+        env = {
+            **os.environ,
+            "CACHE_ENABLED": "0",
+            "CATALOGUE_DB": os.path.join(data_dir, "catalogue.db"),
+            "OUTBOX_DB": os.path.join(data_dir, "outbox.db"),
+            "TEXT_INDEX_DB": os.path.join(data_dir, "text_index.db"),
+        }
+        results = []
+        for name in names:
+            print(f"... {name}", file=sys.stderr)
+            results.append(run_isolated(name, args, env))
+
+    print_results(results, baseline)
+
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"meta": run_metadata(args), "results": results}, f, ensure_ascii=False, indent=2)
+    print(f"Résultats : {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark : index plein texte des textes PDF extraits (SQLite FTS5)
+
+Indexe un corpus de rapports synthétiques, puis mesure la durée des
+recherches. Le vocabulaire du corpus est très réduit : les termes courants
+("amiante") sont présents dans presque toutes les pages, ce qui est le cas
+le plus coûteux pour le classement ; chaque rapport contient en plus une
+référence unique, pour mesurer une recherche sélective.
+
+Usage (depuis backend/) :
+    python benchmarks/bench_text_search.py --documents 2000 --pages 10
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import make_report_text
+from text_index import TextSearchIndex
+
+QUERIES = [
+    ("simple", "amiante"),
+    ("simple", "amiante toiture"),
+    ("simple", "toit*"),
+    ("fts5", "NEAR(amiante toiture, 3)"),
+    ("simple", "dossier 1234"),
+]
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = TextSearchIndex(os.path.join(directory, "text_index.db"))
+
+        start = time.perf_counter()
+        for number in range(args.documents):
+            # Quelques textes de base suffisent : seule la référence unique change
+            text = make_report_text(pages=args.pages, seed=number % 20)
+            text = f"Référence du rapport : dossier {number}\n" + text
+            index.record_document(f"{number:064x}", f"rapport-{number}.pdf", {"text": text, "extraction_mode": "layout"}, "bench")
+        duration = time.perf_counter() - start
+        size = os.path.getsize(os.path.join(directory, "text_index.db"))
+        print(f"Index : {args.documents} documents, {args.documents * args.pages} pages")
+        print(f"  indexation : {duration:.1f} s ({duration / args.documents * 1000:.1f} ms par document), {size / 1e6:.0f} Mo")
+
+        print(f"\n{'requête':<32} {'résultats':>10} {'durée (ms)':>12}")
+        for syntax, query in QUERIES:
+            duration, hits = best_of(lambda: index.search(query, syntax, limit=20), args.repeat)
+            print(f"{query:<32} {len(hits):>10} {duration * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark : extraction des champs V3 en un passage, selon le nombre de règles
+
+Compare le moteur compilé (un seul automate de mots-clés) à l'approche
+d'origine (une recherche regex par libellé), avec le registre V3 puis
+avec des règles synthétiques supplémentaires.
+
+Mesure aussi le coût d'une mise à jour incrémentale (fields_wanted) selon
+le nombre de champs encore vides.
+
+Usage (depuis backend/) :
+    python benchmarks/bench_v3_rules.py --pages 50 --extra 0 200 1000
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import make_report_text
+from v3_rules import V3_FIELDS, V3_RULES, V3RuleEngine, label, v3_rule_engine
+
+
+def synthetic_rules(count):
+    # Libellés inexistants dans le corpus : ils coûtent un test mais ne trouvent rien
+    return [label("nom_projet", [f"libellé synthétique {i} numéro {i * 7}"]) for i in range(count)]
+
+
+def naive_extract(rules, text):
+    # Une recherche par libellé, comme l'ancien process_text_for_v3
+    results = {}
+    for rule in rules:
+        for keyword in rule["keywords"]:
+            match = re.search(re.escape(keyword) + r"[:\s]*([^\n]+)", text, re.IGNORECASE)
+            if match:
+                for field in rule["fields"]:
+                    results.setdefault(field, match.group(1).strip())
+                break
+    return results
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--extra", type=int, nargs="+", default=[0, 200, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    text = make_report_text(pages=args.pages)
+    print(f"Texte : {len(text)} caractères, {args.pages} pages")
+    print(f"{'règles':>8} {'mots-clés':>10} {'compilé (ms)':>14} {'naïf (ms)':>12}")
+
+    for extra in args.extra:
+        rules = V3_RULES + synthetic_rules(extra)
+        engine = V3RuleEngine(rules)
+        compiled = best_of(lambda: engine.extract(text), args.repeat)
+        naive = best_of(lambda: naive_extract(rules, text), args.repeat)
+        print(f"{len(rules):>8} {len(engine.keywords):>10} {compiled * 1000:>14.1f} {naive * 1000:>12.1f}")
+
+    # Mise à jour incrémentale : seules les règles des champs voulus sont évaluées
+    print(f"\n{'champs voulus':>14} {'règles':>8} {'durée (ms)':>12}")
+    for count in (len(V3_FIELDS), 40, 10, 3):
+        engine = v3_rule_engine.for_fields(V3_FIELDS[-count:])
+        duration = best_of(lambda: engine.extract(text), args.repeat)
+        print(f"{count:>14} {len(engine.rules):>8} {duration * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Générateur de corpus synthétique pour les benchmarks
+
+Les documents sont produits localement et de façon déterministe (graine
+fixe) pour que deux exécutions mesurent exactement le même travail.
+"""
+import io
+import random
+
+from docx import Document
+
+WORDS = [
+    "bâtiment", "chantier", "diagnostic", "réemploi", "matériaux", "amiante",
+    "toiture", "charpente", "menuiserie", "façade", "étanchéité", "béton",
+    "maître", "ouvrage", "inventaire", "ressources", "déchets", "tonnes",
+    "plancher", "cloison", "carrelage", "radiateur", "vitrage", "aluminium",
+    "bois", "acier", "isolation", "ventilation", "sondage", "parking",
+]
+
+LABELS = [
+    "Adresse", "Ville", "Maître d'ouvrage", "Référence", "Date du diagnostic",
+    "Nom du projet", "Nature de l'opération", "Année de construction",
+]
+
+
+def _sentence(rng, min_words=6, max_words=14):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words))]
+    return " ".join(words).capitalize() + "."
+
+
+def _escape_pdf_text(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _line_text(rng, page_number, line, column_width, placeholders):
+    if line % 12 == 0:
+        label = LABELS[(page_number + line) % len(LABELS)]
+        text = f"{label} : {_sentence(rng, 2, 4)}"
+    else:
+        text = _sentence(rng, 3, max(4, column_width // 45))
+    if placeholders and line % 9 == 4:
+        text += " {{" + rng.choice(WORDS) + "_" + str(line % 5) + "}}"
+    return f"({_escape_pdf_text(text)})"
+
+
+def _page_content(rng, page_number, lines_per_page, columns, placeholders, interleaved=False):
+    # Contenu d'une page : texte en une ou plusieurs colonnes, quelques libellés V3
+    ops = ["BT", "/F1 9 Tf", "11 TL"]
+    column_width = 500 // columns
+    if interleaved:
+        # Colonnes tracées ligne par ligne (générateurs de rapports, tableaux) :
+        # l'ordre du flux de contenu alterne entre les colonnes
+        for line in range(lines_per_page // columns):
+            for column in range(columns):
+                ops.append(f"1 0 0 1 {50 + column * column_width} {800 - 11 * line} Tm")
+                ops.append(_line_text(rng, page_number, line, column_width, placeholders) + " Tj")
+    else:
+        for column in range(columns):
+            ops.append(f"1 0 0 1 {50 + column * column_width} 800 Tm")
+            for line in range(lines_per_page // columns):
+                ops.append(_line_text(rng, page_number, line, column_width, placeholders) + " '")
+    ops.append("ET")
+    return "\n".join(ops).encode("cp1252", "replace")
+
+
+def make_pdf(pages=10, lines_per_page=60, columns=1, placeholders=False, seed=0, interleaved=False):
+    """
+    Génère un PDF texte de plusieurs pages
+
+    Args:
+        pages (int): Nombre de pages
+        lines_per_page (int): Nombre de lignes par page
+        columns (int): Nombre de colonnes de texte (mise en page multi-colonnes)
+        placeholders (bool): Insérer des placeholders {{...}} dans le texte
+        seed (int): Graine du générateur aléatoire
+        interleaved (bool): Tracer les colonnes ligne par ligne plutôt qu'une colonne après l'autre
+
+    Returns:
+        bytes: Contenu du fichier PDF
+    """
+    rng = random.Random(seed)
+    objects = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    pages_id = font_id + 2 * pages + 1
+    kids = []
+    for page_number in range(1, pages + 1):
+        content = _page_content(rng, page_number, lines_per_page, columns, placeholders, interleaved)
+        content_id = add(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        kids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_id, font_id, content_id)
+        ))
+    add(b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % k for k in kids) + b"] /Count %d >>" % pages)
+    catalog_id = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog_id, xref_offset)
+    return bytes(out)
+
+
+def make_report_text(pages=20, lines_per_page=60, seed=0):
+    """
+    Génère le texte d'un rapport (format de extract_text_from_pdf : pages séparées par \\f)
+    avec des libellés V3 répartis dans le corps
+    """
+    rng = random.Random(seed)
+    page_texts = []
+    for page_number in range(pages):
+        lines = []
+        for line in range(lines_per_page):
+            if line % 12 == 0:
+                label = LABELS[(page_number + line) % len(LABELS)]
+                lines.append(f"{label} : {_sentence(rng, 2, 4)}")
+            else:
+                lines.append(_sentence(rng))
+        page_texts.append("\n".join(lines) + "\n")
+    return "".join(text + "\f" for text in page_texts)
+
+
+def _placeholder_text(rng, density, split_runs):
+    # Phrase avec, selon la densité, un placeholder ${...} éventuellement découpé en plusieurs runs
+    sentence = _sentence(rng, 4, 10)
+    if rng.random() >= density:
+        return [sentence]
+    name = f"{rng.choice(WORDS)}_{rng.randint(0, 20)}"
+    if split_runs and rng.random() < 0.5:
+        return [sentence + " ${", name, "} " + _sentence(rng, 2, 4)]
+    return [sentence + " ${" + name + "} " + _sentence(rng, 2, 4)]
+
+
+def make_docx(paragraphs=200, tables=5, rows=10, cols=4, merged=True, density=0.3, split_runs=True, seed=0):
+    """
+    Génère un template Word avec paragraphes, titres, tableaux et placeholders ${...}
+
+    Args:
+        paragraphs (int): Nombre de paragraphes de corps
+        tables (int): Nombre de tableaux
+        rows (int): Nombre de lignes par tableau
+        cols (int): Nombre de colonnes par tableau
+        merged (bool): Fusionner des cellules (horizontalement et verticalement)
+        density (float): Proportion de paragraphes et de cellules contenant un placeholder
+        split_runs (bool): Découper une partie des placeholders sur plusieurs runs, comme Word
+        seed (int): Graine du générateur aléatoire
+
+    Returns:
+        bytes: Contenu du fichier .docx
+    """
+    rng = random.Random(seed)
+    document = Document()
+    per_section = max(1, paragraphs // max(1, tables + 1))
+
+    for index in range(paragraphs):
+        if index % per_section == 0:
+            document.add_heading(f"Section {index // per_section + 1} ${{titre_{index // per_section}}}", level=1)
+        paragraph = document.add_paragraph()
+        for text in _placeholder_text(rng, density, split_runs):
+            paragraph.add_run(text)
+
+        if index % per_section == per_section - 1 and index // per_section < tables:
+            table = document.add_table(rows=rows, cols=cols)
+            for row in table.rows:
+                for cell in row.cells:
+                    cell.paragraphs[0].text = ""
+                    for text in _placeholder_text(rng, density, split_runs):
+                        cell.paragraphs[0].add_run(text)
+            if merged and rows > 2 and cols > 2:
+                table.cell(0, 0).merge(table.cell(0, 1))
+                table.cell(1, cols - 1).merge(table.cell(rows - 1, cols - 1))
+
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
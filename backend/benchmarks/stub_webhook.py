@@ -0,0 +1,80 @@
+"""
+Webhook n8n factice pour tester l'outbox en local
+
+Répond 200 (ou --status) à chaque POST, échoue aléatoirement selon
+--fail-rate, et expose ses compteurs sur GET /stats.
+
+Usage (depuis backend/) :
+    python benchmarks/stub_webhook.py --port 8765 --fail-rate 0.3
+    N8N_WEBHOOK_URL=http://127.0.0.1:8765/webhook uvicorn main:app
+"""
+import argparse
+import gzip
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+stats = {"requests": 0, "failures": 0, "bytes_received": 0, "items_received": 0}
+stats_lock = threading.Lock()
+
+
+def make_handler(status, fail_rate, delay):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, code, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            with stats_lock:
+                self._reply(200, dict(stats))
+
+        def do_POST(self):
+            raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            body = gzip.decompress(raw) if self.headers.get("Content-Encoding") == "gzip" else raw
+            payload = json.loads(body or b"null")
+            items = len(payload["items"]) if isinstance(payload, dict) and isinstance(payload.get("items"), list) else 1
+
+            if delay:
+                time.sleep(delay)
+
+            failed = random.random() < fail_rate
+            with stats_lock:
+                stats["requests"] += 1
+                stats["bytes_received"] += len(raw)
+                if failed:
+                    stats["failures"] += 1
+                else:
+                    stats["items_received"] += items
+
+            if failed:
+                self._reply(503, {"error": "stub failure"})
+            else:
+                self._reply(status, {"received": items})
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--status", type=int, default=200)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.status, args.fail_rate, args.delay))
+    print(f"Webhook factice sur http://127.0.0.1:{args.port}/webhook")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import os
+import posixpath
+import zipfile
+from parsing_executor import PARSING_MAX_WORKERS
+from upload_ingestion import ingest_file, UPLOAD_MAX_BYTES, UploadTooLargeError
+
+# Configuration des envois groupés (surchargée par variables d'environnement)
+BULK_MAX_FILES = int(os.environ.get("BULK_MAX_FILES", 200))
+BULK_CONCURRENCY = int(os.environ.get("BULK_CONCURRENCY", PARSING_MAX_WORKERS))
+
+# Traitement appliqué aux PDF d'un envoi groupé
+BULK_PDF_PIPELINES = ("v3", "text")
+
+# Type de traitement selon l'extension
+FILE_KINDS = {".pdf": "pdf", ".docx": "docx", ".zip": "zip"}
+
+
+def file_kind(filename):
+    """
+    Type d'un fichier d'après son extension : "pdf", "docx", "zip" ou None
+    """
+    return FILE_KINDS.get(os.path.splitext(filename)[1].lower())
+
+
+class BulkItem:
+    """
+    Fichier d'un envoi groupé : upload direct ou entrée d'une archive ZIP
+
+    Une entrée d'archive n'est lue (décompressée) qu'au moment de son
+    traitement, puis libérée : seules les entrées en cours occupent de la mémoire.
+    """
+
+    def __init__(self, index, filename, kind, upload=None, archive=None, entry=None, error=None):
+        self.index = index
+        self.filename = filename
+        self.kind = kind
+        self.upload = upload
+        self.archive = archive
+        self.entry = entry
+        self.error = error
+
+    @property
+    def from_archive(self):
+        return self.entry is not None
+
+    def ingest(self):
+        """
+        Retourne l'IngestedUpload du fichier (lecture de l'entrée pour une archive)
+
+        Raises:
+            UploadTooLargeError: si l'entrée dépasse UPLOAD_MAX_BYTES
+        """
+        if self.entry is None:
+            return self.upload
+        # Taille annoncée par l'archive : refuser avant de décompresser
+        if self.entry.file_size > UPLOAD_MAX_BYTES:
+            raise UploadTooLargeError(
+                f"Le fichier dépasse la taille maximale autorisée ({UPLOAD_MAX_BYTES // (1024 * 1024)} Mo)"
+            )
+        with self.archive.open(self.entry) as fp:
+            return ingest_file(fp, self.filename, suffix="." + self.kind)
+
+
+def open_archive(fp, archive_name, first_index):
+    """
+    Ouvre une archive ZIP ingérée et liste ses fichiers, sans les décompresser
+
+    Les dossiers, fichiers cachés et métadonnées macOS sont ignorés ; les
+    archives imbriquées et les types non pris en charge sont signalés.
+
+    Args:
+        fp: Objet fichier de l'archive (reste à fermer par l'appelant)
+        archive_name (str): Nom de l'archive, préfixe du nom de chaque fichier
+        first_index (int): Index du premier fichier dans l'envoi groupé
+
+    Returns:
+        tuple: (ZipFile, liste de BulkItem)
+
+    Raises:
+        zipfile.BadZipFile: si le fichier n'est pas une archive ZIP valide
+    """
+    archive = zipfile.ZipFile(fp)
+    items = []
+    for entry in archive.infolist():
+        basename = posixpath.basename(entry.filename)
+        if entry.is_dir() or entry.filename.startswith("__MACOSX/") or basename.startswith("."):
+            continue
+
+        filename = f"{archive_name}/{entry.filename}"
+        kind = file_kind(basename)
+        index = first_index + len(items)
+        if kind == "zip":
+            items.append(BulkItem(index, filename, kind, error="Les archives imbriquées ne sont pas prises en charge"))
+        else:
+            items.append(BulkItem(index, filename, kind, archive=archive, entry=entry))
+    return archive, items
@@ -0,0 +1,242 @@
+import io
+import os
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from docx.styles import BabelFish
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+MC = "{http://schemas.openxmlformats.org/markup-compatibility/2006}"
+
+# Placeholders de type ${...}
+PLACEHOLDER_PATTERN = re.compile(r'\${([^}]*)}')
+
+# Parties du document lues en plus du corps (en-têtes et pieds de page)
+HEADER_FOOTER_PART = re.compile(r'^word/(header|footer)(\d*)\.xml$')
+
+# Texte produit par les éléments d'un run (en plus de w:t)
+RUN_SPECIAL_TEXT = {
+    W + "tab": "\t",
+    W + "ptab": "\t",
+    W + "br": "\n",
+    W + "cr": "\n",
+    W + "noBreakHyphen": "-",
+}
+
+PART_SECTIONS = {
+    "header": "En-tête",
+    "footer": "Pied de page",
+}
+
+
+def _open_zip(source):
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    return zipfile.ZipFile(source)
+
+
+def _read_style_names(archive):
+    """
+    Associe l'identifiant de chaque style de paragraphe à son nom
+    (tel que python-docx l'affiche, ex. "Heading 1")
+
+    Returns:
+        tuple: (dictionnaire styleId -> nom, nom du style de paragraphe par défaut)
+    """
+    names = {}
+    default_style = "Normal"
+    try:
+        with archive.open("word/styles.xml") as f:
+            root = ET.parse(f).getroot()
+    except KeyError:
+        return names, default_style
+
+    for style in root.iter(W + "style"):
+        if style.get(W + "type") != "paragraph":
+            continue
+        name_element = style.find(W + "name")
+        if name_element is None:
+            continue
+        name = BabelFish.internal2ui(name_element.get(W + "val"))
+        names[style.get(W + "styleId")] = name
+        if style.get(W + "default") in ("1", "true", "on"):
+            default_style = name
+    return names, default_style
+
+
+def _iter_part_paragraphs(stream, part_kind, part_name, style_names, default_style):
+    """
+    Parcourt une partie XML du document en un seul passage incrémental
+
+    Les runs d'un paragraphe sont concaténés au fil de l'eau, si bien
+    qu'un placeholder découpé par Word en plusieurs runs est reconstitué.
+    """
+    in_body = part_kind == "document"
+
+    # Pile des paragraphes ouverts (un paragraphe peut contenir une zone de texte)
+    paragraphs = []
+    table_depth = 0
+    textbox_depth = 0
+    ppr_depth = 0
+    fallback_depth = 0
+
+    table_index = 0
+    row_index = 0
+    cell_index = 0
+    cell_span = 1
+    paragraph_index = 0
+
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        tag = elem.tag
+
+        # mc:Fallback duplique le contenu de mc:Choice (anciennes versions de Word)
+        if tag == MC + "Fallback":
+            fallback_depth += 1 if event == "start" else -1
+            if event == "end":
+                elem.clear()
+            continue
+        if fallback_depth:
+            continue
+
+        if event == "start":
+            if tag == W + "p":
+                if textbox_depth:
+                    location = "textbox"
+                elif not in_body:
+                    location = part_kind
+                elif table_depth:
+                    location = "table"
+                else:
+                    location = "paragraph"
+                    paragraph_index += 1
+
+                paragraph = {"location": location, "style_id": None, "parts": []}
+                if location == "paragraph":
+                    paragraph["paragraph_index"] = paragraph_index
+                elif location == "table":
+                    paragraph["table_index"] = table_index
+                    paragraph["row_index"] = row_index
+                    paragraph["cell_index"] = cell_index
+                paragraphs.append(paragraph)
+
+            elif tag == W + "pPr":
+                ppr_depth += 1
+            elif tag == W + "pStyle":
+                if paragraphs and ppr_depth:
+                    paragraphs[-1]["style_id"] = elem.get(W + "val")
+            elif tag == W + "txbxContent":
+                textbox_depth += 1
+            elif tag == W + "tbl" and not textbox_depth:
+                table_depth += 1
+                if table_depth == 1:
+                    table_index += 1
+                    row_index = 0
+            elif tag == W + "tr" and table_depth == 1 and not textbox_depth:
+                row_index += 1
+                cell_index = 0
+                cell_span = 1
+            elif tag == W + "tc" and table_depth == 1 and not textbox_depth:
+                # Les cellules fusionnées horizontalement occupent plusieurs colonnes de la grille
+                cell_index += cell_span
+                cell_span = 1
+            elif tag == W + "gridSpan" and table_depth == 1 and not textbox_depth:
+                cell_span = int(elem.get(W + "val", "1"))
+            continue
+
+        # Événements "end"
+        if tag == W + "t":
+            if paragraphs and elem.text:
+                paragraphs[-1]["parts"].append(elem.text)
+        elif tag in RUN_SPECIAL_TEXT:
+            # w:tab sert aussi à définir les taquets dans w:pPr/w:tabs : l'ignorer
+            if paragraphs and not ppr_depth:
+                paragraphs[-1]["parts"].append(RUN_SPECIAL_TEXT[tag])
+        elif tag == W + "pPr":
+            ppr_depth -= 1
+        elif tag == W + "txbxContent":
+            textbox_depth -= 1
+        elif tag == W + "tbl" and not textbox_depth:
+            table_depth -= 1
+        elif tag == W + "p":
+            paragraph = paragraphs.pop()
+            style_id = paragraph.pop("style_id")
+            paragraph["text"] = "".join(paragraph.pop("parts"))
+            paragraph["style"] = style_names.get(style_id, default_style) if style_id else default_style
+            paragraph["part"] = part_name
+            # Libérer le sous-arbre déjà consommé
+            elem.clear()
+            yield paragraph
+
+
+def iter_docx_paragraphs(source):
+    """
+    Parcourt les paragraphes d'un document Word sans construire l'arbre python-docx
+
+    Le corps (word/document.xml) est lu en premier, puis les en-têtes et
+    pieds de page. Les zones de texte sont incluses.
+
+    Args:
+        source: Chemin, bytes ou objet fichier du .docx
+
+    Yields:
+        dict: Paragraphe avec "text", "style", "location" ("paragraph",
+        "table", "textbox", "header" ou "footer"), "section" (dernier titre
+        rencontré dans le corps), "heading", "part" et les indices de position
+    """
+    with _open_zip(source) as archive:
+        style_names, default_style = _read_style_names(archive)
+
+        parts = [("document", "word/document.xml")]
+        extra_parts = []
+        for name in archive.namelist():
+            match = HEADER_FOOTER_PART.match(name)
+            if match:
+                extra_parts.append((match.group(1) != "header", int(match.group(2) or 0), match.group(1), name))
+        # En-têtes puis pieds de page, dans l'ordre de leur numéro
+        parts += [(kind, name) for _, _, kind, name in sorted(extra_parts)]
+
+        current_section = "Début du document"
+        for part_kind, part_name in parts:
+            with archive.open(part_name) as stream:
+                for paragraph in _iter_part_paragraphs(stream, part_kind, os.path.basename(part_name), style_names, default_style):
+                    heading = paragraph["style"].startswith("Heading")
+                    # Seuls les titres du corps du document délimitent les sections
+                    if heading and paragraph["location"] == "paragraph":
+                        current_section = paragraph["text"].strip()
+                    paragraph["heading"] = heading
+                    paragraph["section"] = PART_SECTIONS.get(part_kind, current_section)
+                    yield paragraph
+
+
+def iter_docx_placeholders(source, skip_headings=False, context_size=30):
+    """
+    Parcourt les placeholders ${...} d'un document Word au fil de la lecture
+
+    Args:
+        source: Chemin, bytes ou objet fichier du .docx
+        skip_headings (bool): Ignorer les placeholders des titres du corps
+        context_size (int): Nombre de caractères de contexte avant/après
+
+    Yields:
+        dict: Occurrence avec "placeholder", "full_match", "start", "end"
+        (positions dans le texte du paragraphe sans espaces de bord),
+        "context_before", "context_after" et "paragraph" (le paragraphe source)
+    """
+    for paragraph in iter_docx_paragraphs(source):
+        if skip_headings and paragraph["heading"] and paragraph["location"] == "paragraph":
+            continue
+
+        text = paragraph["text"].strip()
+        for match in PLACEHOLDER_PATTERN.finditer(text):
+            start_pos = match.start()
+            end_pos = match.end()
+            yield {
+                "placeholder": match.group(1),
+                "full_match": match.group(0),
+                "start": start_pos,
+                "end": end_pos,
+                "paragraph_text": text,
+                "context_before": text[max(0, start_pos - context_size):start_pos],
+                "context_after": text[end_pos:min(len(text), end_pos + context_size)],
+                "paragraph": paragraph
+            }
@@ -0,0 +1,333 @@
+import io
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pdfminer.converter import TextConverter
+from pdfminer.layout import LAParams, LTChar, LTContainer, LTText, LTTextBox
+from pdfminer.pdfdevice import PDFTextDevice
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdffont import PDFUnicodeNotDefined
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+from metrics import PAGES_PARSED, observe_stage
+
+# Séparateur de pages utilisé par pdfminer.high_level.extract_text
+PAGE_BREAK = "\f"
+
+# Seuils de l'extraction rapide, en fraction de la taille de police
+FAST_LINE_SHIFT = 0.5
+FAST_PARAGRAPH_SHIFT = 2.0
+FAST_WORD_GAP = 0.2
+FAST_WIDE_GAP = 3.0
+
+# Longueur minimale (en caractères) des deux côtés d'un grand écart pour
+# compter une ligne comme multi-colonnes (un libellé court suivi de sa valeur ne compte pas)
+FAST_COLUMN_MIN_CHARS = 15
+
+
+@contextmanager
+def open_pdf_source(source):
+    """
+    Ouvre une source PDF : chemin de fichier, contenu en bytes ou objet fichier
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as fp:
+            yield fp
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        yield io.BytesIO(source)
+    else:
+        yield source
+
+
+class FastTextDevice(PDFTextDevice):
+    """
+    Device pdfminer sans analyse de mise en page
+
+    Le texte est écrit dans l'ordre du flux de contenu du PDF ; les sauts de
+    ligne et les espaces sont déduits de la position de chaque caractère par
+    rapport au précédent. Aucun objet LTChar n'est créé ni regroupé, ce qui
+    divise le coût d'extraction d'un document au fil du texte.
+
+    Le device compte aussi, pour le mode "auto", les indices d'une mise en
+    page complexe : lignes multi-colonnes et retours en arrière dans la page.
+
+    Si boxes est une liste, la boîte (x0, y0, x1, y1) de chaque caractère
+    écrit y est ajoutée (None pour les espaces et sauts de ligne déduits).
+    """
+
+    def __init__(self, rsrcmgr, outfp, boxes=None):
+        super().__init__(rsrcmgr)
+        self.outfp = outfp
+        self.boxes = boxes
+        self.lines = 0
+        self.column_lines = 0
+        self.backward_moves = 0
+        self._x = None
+        self._y = None
+        self._space = True
+        # Longueurs des segments de la ligne en cours, séparés par les grands écarts
+        self._segment = 0
+        self._left_segment = None
+        self._columnar = False
+
+    def _write(self, text, bbox=None):
+        self.outfp.write(text)
+        if self.boxes is not None:
+            self.boxes.extend([bbox] * len(text))
+
+    def begin_page(self, page, ctm):
+        self._x = self._y = None
+        self._space = True
+
+    def end_page(self, page):
+        # Comme TextConverter : la ligne puis le bloc se terminent par un saut de ligne
+        if self._y is not None:
+            self._end_line()
+            self._write("\n\n")
+
+    def _close_segment(self):
+        # Deux segments de texte assez longs de part et d'autre d'un grand écart : colonnes
+        if self._left_segment is not None and min(self._left_segment, self._segment) >= FAST_COLUMN_MIN_CHARS:
+            self._columnar = True
+        self._left_segment = self._segment
+        self._segment = 0
+
+    def _end_line(self):
+        self._close_segment()
+        self.lines += 1
+        if self._columnar:
+            self.column_lines += 1
+        self._left_segment = None
+        self._columnar = False
+
+    def render_char(self, matrix, font, fontsize, scaling, rise, cid, ncs, graphicstate):
+        try:
+            text = font.to_unichr(cid)
+        except PDFUnicodeNotDefined:
+            text = "(cid:%d)" % cid
+        adv = font.char_width(cid) * fontsize * scaling
+
+        a, b, _, d, x, y = matrix
+        size = fontsize * (abs(d) or abs(b) or 1.0)
+        if self._y is not None:
+            shift = y - self._y
+            if abs(shift) > size * FAST_LINE_SHIFT:
+                # Nouvelle ligne ; un grand écart vertical ou un retour vers le
+                # haut de la page (colonne suivante) commence un nouveau bloc
+                if shift > 0:
+                    self.backward_moves += 1
+                self._end_line()
+                self._write("\n\n" if shift > 0 or -shift > size * FAST_PARAGRAPH_SHIFT else "\n")
+                self._space = True
+            else:
+                gap = x - self._x
+                if gap < -size:
+                    self.backward_moves += 1
+                elif gap > size * FAST_WIDE_GAP:
+                    self._close_segment()
+                if (gap > size * FAST_WORD_GAP or gap < -size) and not self._space and not text.isspace():
+                    self._write(" ")
+
+        end_x = x + adv * (a or 1.0)
+        self._write(text, (x, y, end_x, y + size))
+        self._space = text.isspace()
+        if not self._space:
+            self._segment += 1
+        self._x = end_x
+        self._y = y
+        return adv
+
+
+class PositionalTextConverter(TextConverter):
+    """
+    TextConverter qui note aussi la boîte de chaque caractère écrit
+
+    Le texte produit est identique à celui de TextConverter ; boxes reçoit,
+    pour chaque caractère, la boîte (x0, y0, x1, y1) de son LTChar, ou None
+    pour les séparateurs ajoutés par l'analyse de mise en page.
+    """
+
+    def __init__(self, rsrcmgr, outfp, laparams=None, boxes=None):
+        super().__init__(rsrcmgr, outfp, laparams=laparams)
+        self.boxes = boxes if boxes is not None else []
+
+    def receive_layout(self, ltpage):
+        def write(text, bbox=None):
+            self.write_text(text)
+            self.boxes.extend([bbox] * len(text))
+
+        def render(item):
+            if isinstance(item, LTContainer):
+                for child in item:
+                    render(child)
+            elif isinstance(item, LTText):
+                write(item.get_text(), item.bbox if isinstance(item, LTChar) else None)
+            if isinstance(item, LTTextBox):
+                write("\n")
+
+        render(ltpage)
+        write(PAGE_BREAK)
+
+
+def iter_pdf_pages(source, laparams=None, page_numbers=None, device=None, with_boxes=False):
+    """
+    Extrait le texte d'un PDF page par page
+
+    Seule la page en cours est gardée en mémoire, ce qui permet de
+    streamer le texte d'un gros document.
+
+    Args:
+        source: Chemin, bytes ou objet fichier du PDF
+        laparams (dict): Paramètres LAParams de pdfminer (None : pas d'analyse de mise en page)
+        page_numbers (set | range): Numéros de pages (à partir de 1) à extraire, toutes si None
+        device: Classe du device pdfminer (rsrcmgr, outfp), à la place de TextConverter
+        with_boxes (bool): Ajoute à chaque page la boîte de chaque caractère du
+            texte (voir PositionalTextConverter) ; device doit accepter boxes=
+
+    Yields:
+        tuple: (numéro de page à partir de 1, texte de la page), plus la
+        liste des boîtes si with_boxes
+    """
+    # Temps passé dans pdfminer uniquement (hors traitement des pages par l'appelant)
+    parse_seconds = 0.0
+    pages_parsed = 0
+    start = time.perf_counter()
+    try:
+        with open_pdf_source(source) as fp:
+            parser = PDFParser(fp)
+            document = PDFDocument(parser)
+            rsrcmgr = PDFResourceManager(caching=True)
+            layout = LAParams(**laparams) if laparams is not None else None
+            if isinstance(page_numbers, range):
+                last_page = page_numbers[-1] if page_numbers else 0
+            else:
+                last_page = max(page_numbers, default=0) if page_numbers is not None else None
+
+            for page_number, page in enumerate(PDFPage.create_pages(document), 1):
+                if page_numbers is not None:
+                    if page_number > last_page:
+                        break
+                    if page_number not in page_numbers:
+                        continue
+
+                output = io.StringIO()
+                boxes = [] if with_boxes else None
+                if device is not None:
+                    page_device = device(rsrcmgr, output, boxes=boxes) if with_boxes else device(rsrcmgr, output)
+                elif with_boxes:
+                    page_device = PositionalTextConverter(rsrcmgr, output, laparams=layout, boxes=boxes)
+                else:
+                    page_device = TextConverter(rsrcmgr, output, laparams=layout)
+                try:
+                    PDFPageInterpreter(rsrcmgr, page_device).process_page(page)
+                finally:
+                    page_device.close()
+
+                # TextConverter termine chaque page par un saut de page
+                text = output.getvalue()
+                if text.endswith(PAGE_BREAK):
+                    text = text[:-1]
+                parse_seconds += time.perf_counter() - start
+                pages_parsed += 1
+                if with_boxes:
+                    yield page_number, text, boxes[:len(text)]
+                else:
+                    yield page_number, text
+                start = time.perf_counter()
+            parse_seconds += time.perf_counter() - start
+    finally:
+        observe_stage("pdf_parse", parse_seconds)
+        PAGES_PARSED.inc(pages_parsed)
+
+
+def page_range_numbers(first_page, last_page=None):
+    """
+    Numéros de pages d'une plage (bornes incluses, à partir de 1) pour iter_pdf_pages ;
+    sans dernière page, la plage s'étend jusqu'à la fin du document
+    """
+    return range(first_page, (sys.maxsize if last_page is None else last_page) + 1)
+
+
+def measure_layout_complexity(source, sample_pages):
+    """
+    Mesure la complexité de mise en page des premières pages d'un PDF
+
+    Les pages sont lues sans analyse de mise en page (FastTextDevice) ; on
+    compte les lignes multi-colonnes et les retours en arrière du flux de
+    contenu, qui rendent l'ordre du flux différent de l'ordre de lecture.
+
+    Returns:
+        float: Part des lignes concernées (0 si les pages ne contiennent pas de texte)
+    """
+    devices = []
+
+    def device(rsrcmgr, outfp):
+        devices.append(FastTextDevice(rsrcmgr, outfp))
+        return devices[-1]
+
+    for _ in iter_pdf_pages(source, page_numbers=page_range_numbers(1, sample_pages), device=device):
+        pass
+    lines = sum(d.lines for d in devices)
+    if not lines:
+        return 0.0
+    return sum(d.column_lines + d.backward_moves for d in devices) / lines
+
+
+def extract_pages_text(source, first_page, last_page, laparams=None):
+    """
+    Extrait le texte d'une plage de pages (bornes incluses, à partir de 1)
+
+    Utilisée comme tâche de l'extraction parallèle : chaque worker
+    ouvre le PDF et n'analyse que sa plage de pages.
+
+    Returns:
+        list: Texte de chaque page de la plage, dans l'ordre
+    """
+    return [text for _, text in iter_pdf_pages(source, laparams, page_range_numbers(first_page, last_page))]
+
+
+def plan_page_shards(total_pages, shard_count):
+    """
+    Découpe les pages d'un document en plages contiguës de tailles équilibrées
+
+    Returns:
+        list: Liste de tuples (première page, dernière page), bornes incluses
+    """
+    shard_count = max(1, min(shard_count, total_pages))
+    base, extra = divmod(total_pages, shard_count)
+    shards = []
+    first_page = 1
+    for i in range(shard_count):
+        size = base + (1 if i < extra else 0)
+        shards.append((first_page, first_page + size - 1))
+        first_page += size
+    return shards
+
+
+def count_pdf_pages(source):
+    """
+    Compte les pages d'un PDF sans les analyser
+    """
+    with open_pdf_source(source) as fp:
+        document = PDFDocument(PDFParser(fp))
+        return sum(1 for _ in PDFPage.create_pages(document))
+
+
+def join_pages(page_texts):
+    """
+    Reconstitue le texte complet au format de pdfminer.high_level.extract_text
+    """
+    return "".join(text + PAGE_BREAK for text in page_texts)
+
+
+def split_pages(full_text):
+    """
+    Découpe un texte produit par join_pages (ou extract_text) en pages
+    """
+    pages = full_text.split(PAGE_BREAK)
+    # Le texte se termine par un saut de page : le dernier élément est vide
+    if pages and pages[-1] == "":
+        pages.pop()
+    return pages
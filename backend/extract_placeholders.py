@@ -1,51 +1,22 @@
-import re
-from docx import Document
-import os
+from template_analysis import analyze_template, basic_view
 
-def extract_placeholders_from_docx(docx_path):
+def extract_placeholders_from_docx(docx_source):
     """
     Extrait tous les placeholders de type ${} d'un document Word
     
     Args:
-        docx_path (str): Chemin vers le fichier docx
+        docx_source (str | bytes): Chemin vers le fichier docx ou son contenu
         
     Returns:
         list: Liste des placeholders uniques trouvés
     """
-    try:
-        # Vérifier si le fichier existe
-        if not os.path.exists(docx_path):
-            return {"error": f"Le fichier {docx_path} n'existe pas"}
-            
-        # Ouvrir le document Word
-        doc = Document(docx_path)
-        
-        # Extraire tout le texte
-        full_text = ""
-        for paragraph in doc.paragraphs:
-            full_text += paragraph.text + "\n"
-            
-        # Extraire également le texte des tableaux
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        full_text += paragraph.text + "\n"
-        
-        # Utiliser une expression régulière pour trouver tous les placeholders
-        pattern = r'\${([^}]*)}'
-        placeholders = re.findall(pattern, full_text)
-        
-        # Éliminer les doublons
-        unique_placeholders = list(set(placeholders))
-        
-        return {
-            "total_found": len(placeholders),
-            "unique_placeholders": unique_placeholders
-        }
-        
-    except Exception as e:
-        return {"error": str(e)}
+    # Parcourir le document en un seul passage (corps, tableaux,
+    # zones de texte, en-têtes et pieds de page)
+    analysis = analyze_template(docx_source)
+    if "error" in analysis:
+        return analysis
+    
+    return basic_view(analysis)
 
 # Test de la fonction
 if __name__ == "__main__":
@@ -1,120 +1,47 @@
-import re
-from docx import Document
+import operator
 import os
+from template_analysis import analyze_template, basic_view, context_view, group_occurrences, occurrence_record, Interner
+from metrics import stage_timer
 import requests  # Ajout de l'import requests
 
-def extract_placeholders_with_context(docx_path):
+# Vues disponibles sur l'analyse d'un template
+TEMPLATE_VIEWS = ("basic", "context", "types", "sections", "n8n")
+
+# Formats de l'analyse avancée : "full" (historique) ou "compact" (tables partagées)
+ADVANCED_FORMATS = ("full", "compact")
+
+# Champs d'un contexte sélectionnables dans l'analyse avancée
+ADVANCED_FIELDS = (
+    "placeholder", "full_match", "paragraph_text", "section", "paragraph_index", "context_before",
+    "context_after", "location", "style", "table_index", "row_index", "cell_index", "part"
+)
+
+# Champs par défaut du format compact (placeholder et full_match répètent le nom du groupe)
+COMPACT_DEFAULT_FIELDS = ADVANCED_FIELDS[2:]
+
+# Indicateurs de type de données, cherchés dans le nom du placeholder
+TYPE_INDICATORS = {
+    "date": ["date", "jour", "mois", "année", "calendar"],
+    "number": ["nombre", "montant", "quantité", "pourcentage", "total", "somme"],
+    "person": ["nom", "prénom", "personne", "contact", "responsable"],
+    "boolean": ["oui/non", "vrai/faux", "choix"],
+    "address": ["adresse", "ville", "code postal", "pays"],
+    "email": ["email", "courriel", "mail"],
+    "phone": ["téléphone", "tel", "mobile", "fixe"],
+}
+
+def extract_placeholders_with_context(docx_source):
     """
     Extrait les placeholders avec leur contexte d'un document Word
     
     Returns:
         list: Liste de dictionnaires contenant les placeholders et leur contexte
     """
-    try:
-        # Vérifier si le fichier existe
-        if not os.path.exists(docx_path):
-            return {"error": f"Le fichier {docx_path} n'existe pas"}
-            
-        # Ouvrir le document Word
-        doc = Document(docx_path)
-        
-        # Liste pour stocker tous les placeholders avec contexte
-        placeholders_with_context = []
-        
-        # Garder une trace de la section actuelle
-        current_section = "Début du document"
-        
-        # Pour suivre l'indice du paragraphe
-        paragraph_index = 0
-        
-        # Parcourir tous les paragraphes
-        for paragraph in doc.paragraphs:
-            paragraph_index += 1
-            text = paragraph.text.strip()
-            
-            # Si c'est un titre, mettre à jour la section actuelle
-            if paragraph.style.name.startswith('Heading'):
-                current_section = text
-                continue
-                
-            # Chercher les placeholders dans ce paragraphe
-            matches = re.finditer(r'\${([^}]*)}', text)
-            
-            for match in matches:
-                placeholder = match.group(1)  # Le contenu entre ${ et }
-                start_pos = match.start()
-                end_pos = match.end()
-                
-                # Extraire le contexte (texte avant et après)
-                context_before = text[max(0, start_pos-30):start_pos]
-                context_after = text[end_pos:min(len(text), end_pos+30)]
-                
-                # Ajouter à notre liste
-                placeholders_with_context.append({
-                    "placeholder": placeholder,
-                    "full_match": match.group(0),  # ${ et } inclus
-                    "paragraph_text": text,
-                    "section": current_section,
-                    "paragraph_index": paragraph_index,
-                    "context_before": context_before,
-                    "context_after": context_after,
-                    "location": "paragraph",
-                    "style": paragraph.style.name
-                })
-        
-        # Parcourir tous les tableaux
-        table_index = 0
-        for table in doc.tables:
-            table_index += 1
-            row_index = 0
-            for row in table.rows:
-                row_index += 1
-                cell_index = 0
-                for cell in row.cells:
-                    cell_index += 1
-                    for paragraph in cell.paragraphs:
-                        text = paragraph.text.strip()
-                        
-                        # Chercher les placeholders dans cette cellule
-                        matches = re.finditer(r'\${([^}]*)}', text)
-                        
-                        for match in matches:
-                            placeholder = match.group(1)
-                            
-                            # Ajouter à notre liste avec contexte de tableau
-                            placeholders_with_context.append({
-                                "placeholder": placeholder,
-                                "full_match": match.group(0),
-                                "paragraph_text": text,
-                                "section": current_section,
-                                "location": "table",
-                                "table_index": table_index,
-                                "row_index": row_index,
-                                "cell_index": cell_index
-                            })
-        
-        # Créer un dictionnaire des placeholders uniques avec leurs occurrences
-        unique_placeholders = {}
-        for item in placeholders_with_context:
-            ph = item["placeholder"]
-            if ph not in unique_placeholders:
-                unique_placeholders[ph] = {
-                    "placeholder": ph,
-                    "occurrences": 1,
-                    "contexts": [item]
-                }
-            else:
-                unique_placeholders[ph]["occurrences"] += 1
-                unique_placeholders[ph]["contexts"].append(item)
-        
-        return {
-            "total_found": len(placeholders_with_context),
-            "unique_count": len(unique_placeholders),
-            "unique_placeholders": list(unique_placeholders.values())
-        }
-        
-    except Exception as e:
-        return {"error": str(e)}
+    analysis = analyze_template(docx_source)
+    if "error" in analysis:
+        return analysis
+    
+    return context_view(analysis)
 
 def organize_placeholders_by_section(placeholders_data):
     """
@@ -143,31 +70,154 @@ def analyze_placeholder_types(placeholders_data):
     """
     Essaie de déterminer le type de données attendu pour chaque placeholder
     """
-    type_indicators = {
-        "date": ["date", "jour", "mois", "année", "calendar"],
-        "number": ["nombre", "montant", "quantité", "pourcentage", "total", "somme"],
-        "person": ["nom", "prénom", "personne", "contact", "responsable"],
-        "boolean": ["oui/non", "vrai/faux", "choix"],
-        "address": ["adresse", "ville", "code postal", "pays"],
-        "email": ["email", "courriel", "mail"],
-        "phone": ["téléphone", "tel", "mobile", "fixe"],
-    }
-    
     for ph in placeholders_data["unique_placeholders"]:
-        placeholder = ph["placeholder"].lower()
+        # Ajouter le type détecté au placeholder
+        ph["detected_type"] = detect_placeholder_type(ph["placeholder"])
         
-        # Déterminer le type en fonction du nom du placeholder
-        detected_type = "text"  # type par défaut
+    return placeholders_data
+
+def detect_placeholder_type(placeholder):
+    """
+    Type de données attendu d'après le nom du placeholder ("text" par défaut)
+    """
+    placeholder = placeholder.lower()
+    for type_name, indicators in TYPE_INDICATORS.items():
+        if any(indicator in placeholder for indicator in indicators):
+            return type_name
+    return "text"
+
+def build_n8n_payload(placeholders_data, filename):
+    """
+    Prépare les données envoyées à n8n pour un template analysé
+    """
+    return {
+        "filename": filename,
+        "total_found": placeholders_data["total_found"],
+        "unique_count": placeholders_data["unique_count"],
+        "placeholders": [ph["placeholder"] for ph in placeholders_data["unique_placeholders"]]
+    }
+
+def build_template_views(analysis, views, filename=None):
+    """
+    Dérive plusieurs vues d'une même analyse de template (voir template_analysis)
+    
+    Args:
+        analysis (dict): Résultat de analyze_template
+        views (list): Vues demandées parmi TEMPLATE_VIEWS
+        filename (str): Nom du fichier, utilisé par la vue n8n
         
-        for type_name, indicators in type_indicators.items():
-            if any(indicator in placeholder for indicator in indicators):
-                detected_type = type_name
-                break
+    Returns:
+        dict: Une entrée par vue demandée
+    """
+    with stage_timer("template_views"):
+        return _build_views(analysis, views, filename)
+
+def _build_views(analysis, views, filename):
+    result = {}
+    context = None
+    
+    for view in views:
+        if view == "basic":
+            result["basic"] = basic_view(analysis)
+            continue
         
-        # Ajouter le type détecté au placeholder
-        ph["detected_type"] = detected_type
+        # Les autres vues partagent la même vue avec contexte, calculée une seule fois
+        if context is None:
+            context = analyze_placeholder_types(context_view(analysis))
         
-    return placeholders_data
+        if view == "context":
+            result["context"] = context
+        elif view == "types":
+            result["types"] = {ph["placeholder"]: ph["detected_type"] for ph in context["unique_placeholders"]}
+        elif view == "sections":
+            result["sections"] = organize_placeholders_by_section(context)
+        elif view == "n8n":
+            result["n8n"] = build_n8n_payload(context, filename)
+    
+    return result
+
+def advanced_view(analysis, response_format="full", offset=0, limit=None, fields=None):
+    """
+    Analyse avancée (contexte et type de chaque placeholder), paginée sur les
+    placeholders uniques et restreinte aux champs demandés
+
+    Le format "full" reprend la vue "context" (texte du paragraphe répété dans
+    chaque contexte). Le format "compact" place le texte des paragraphes et le
+    nom des sections dans les tables "paragraphs" et "sections" de la page,
+    référencées par indice, et chaque contexte est une liste de valeurs dans
+    l'ordre de "fields".
+
+    Args:
+        analysis (dict): Résultat de analyze_template
+        response_format (str): "full" ou "compact"
+        offset (int): Indice du premier placeholder unique renvoyé
+        limit (int): Nombre maximal de placeholders uniques renvoyés (tous si None)
+        fields (list): Champs des contextes parmi ADVANCED_FIELDS (tous par défaut,
+            COMPACT_DEFAULT_FIELDS en format compact)
+    """
+    with stage_timer("template_views"):
+        groups = group_occurrences(analysis)
+        names = list(groups)
+        page = names[offset:] if limit is None else names[offset:offset + limit]
+        next_offset = offset + len(page) if offset + len(page) < len(names) else None
+
+        result = {
+            "total_found": sum(len(group) for group in groups.values()),
+            "unique_count": len(names)
+        }
+        if response_format == "compact":
+            result.update(_compact_placeholders(analysis, groups, page, fields or COMPACT_DEFAULT_FIELDS))
+        else:
+            result["unique_placeholders"] = [
+                {
+                    "placeholder": ph,
+                    "occurrences": len(groups[ph]),
+                    "contexts": [_select_fields(occurrence_record(analysis, occurrence), fields) for occurrence in groups[ph]],
+                    "detected_type": detect_placeholder_type(ph)
+                }
+                for ph in page
+            ]
+
+        # La réponse historique (sans pagination ni format compact) reste inchangée
+        if response_format == "compact" or offset or limit is not None:
+            result.update({"offset": offset, "limit": limit, "next_offset": next_offset})
+        return result
+
+def _select_fields(record, fields):
+    if fields is None:
+        return record
+    return {name: record[name] for name in fields if name in record}
+
+def _compact_placeholders(analysis, groups, page, fields):
+    # Tables de la page seulement : une page ne transporte que les paragraphes qu'elle cite
+    paragraphs = Interner()
+    sections = Interner()
+    getters = []
+    for name in fields:
+        if name == "paragraph_text":
+            getters.append(lambda occurrence: paragraphs.add(analysis["paragraphs"][occurrence.paragraph]))
+        elif name == "section":
+            getters.append(lambda occurrence: sections.add(analysis["sections"][occurrence.section]))
+        else:
+            # Les champs sans objet pour l'emplacement de l'occurrence valent None
+            getters.append(operator.attrgetter(name))
+
+    unique_placeholders = []
+    for ph in page:
+        unique_placeholders.append({
+            "placeholder": ph,
+            "occurrences": len(groups[ph]),
+            "detected_type": detect_placeholder_type(ph),
+            "contexts": [[getter(occurrence) for getter in getters] for occurrence in groups[ph]]
+        })
+
+    compact = {"format": "compact", "fields": list(fields)}
+    if "paragraph_text" in fields:
+        compact["paragraphs"] = paragraphs.values
+    if "section" in fields:
+        compact["sections"] = sections.values
+    compact["unique_placeholders"] = unique_placeholders
+    return compact
 
 # Nouvelle fonction pour envoyer les résultats à n8n
 def send_to_n8n(filename, results):
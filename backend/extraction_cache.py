@@ -0,0 +1,243 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# Configuration du cache (surchargée par variables d'environnement)
+CACHE_ENABLED = os.environ.get("CACHE_ENABLED", "1") != "0"
+CACHE_MEMORY_MAX_BYTES = int(os.environ.get("CACHE_MEMORY_MAX_BYTES", 256 * 1024 * 1024))
+CACHE_DISK_MAX_BYTES = int(os.environ.get("CACHE_DISK_MAX_BYTES", 2 * 1024 * 1024 * 1024))
+CACHE_DIR = os.environ.get("CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "extraction"))
+
+
+def make_cache_key(sha256, namespace, fingerprint):
+    """
+    Construit la clé de cache d'un résultat d'extraction
+
+    Args:
+        sha256 (str): Empreinte du fichier uploadé
+        namespace (str): Type de résultat ("pdf_text", "docx_context", ...)
+        fingerprint (str): Version du parser et de ses paramètres
+
+    Returns:
+        str: Clé hexadécimale utilisable comme nom de fichier
+    """
+    raw = f"{namespace}:{fingerprint}:{sha256}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """
+    Cache à deux niveaux pour les résultats d'extraction :
+    un LRU en mémoire borné en octets, puis un stockage sur disque.
+
+    Les valeurs sont stockées sérialisées en JSON : chaque lecture renvoie
+    donc un nouvel objet que l'appelant peut modifier sans risque.
+    """
+
+    def __init__(self, directory, memory_max_bytes, disk_max_bytes):
+        self.directory = directory
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        # Index des fichiers du disque (clé -> taille), du moins au plus
+        # récemment utilisé : construit par un seul parcours du répertoire
+        # au premier accès, puis tenu à jour à chaque lecture et écriture
+        self._disk = None
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def _remember(self, key, blob):
+        # Insère dans le LRU mémoire et évince les entrées les plus anciennes
+        if len(blob) > self.memory_max_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = blob
+        self._memory_bytes += len(blob)
+        while self._memory_bytes > self.memory_max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.stats["memory_evictions"] += 1
+
+    def _scan_disk(self):
+        # Fichiers de cache (.json) du plus ancien au plus récent ; les
+        # fichiers temporaires d'une écriture en cours sont ignorés
+        entries = []
+        if os.path.isdir(self.directory):
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if not name.endswith(".json"):
+                        continue
+                    try:
+                        st = os.stat(os.path.join(root, name))
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, name[:-len(".json")], st.st_size))
+        entries.sort()
+        return entries
+
+    def _disk_index(self):
+        # À appeler avec self._lock
+        if self._disk is None:
+            self._disk = OrderedDict((key, size) for _, key, size in self._scan_disk())
+            self._disk_bytes = sum(self._disk.values())
+        return self._disk
+
+    def _track_disk(self, key, size):
+        # Enregistre une entrée disque comme la plus récente (à appeler avec self._lock)
+        disk = self._disk_index()
+        self._disk_bytes += size - disk.pop(key, 0)
+        disk[key] = size
+
+    def _forget_disk(self, key):
+        # À appeler avec self._lock
+        if self._disk is not None and key in self._disk:
+            self._disk_bytes -= self._disk.pop(key)
+
+    def _prune_disk(self):
+        # Supprime les entrées les moins récemment utilisées jusqu'à repasser
+        # sous la limite (à appeler avec self._lock)
+        disk = self._disk_index()
+        while self._disk_bytes > self.disk_max_bytes and disk:
+            key, size = disk.popitem(last=False)
+            self._disk_bytes -= size
+            try:
+                os.unlink(self._path(key))
+            except OSError:
+                continue
+            self.stats["disk_evictions"] += 1
+
+    def get(self, key):
+        """
+        Retourne la valeur en cache, ou None si absente
+        """
+        with self._lock:
+            blob = self._memory.get(key)
+            if blob is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return json.loads(blob)
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                blob = f.read()
+        except OSError:
+            with self._lock:
+                self.stats["misses"] += 1
+                self._forget_disk(key)
+            return None
+
+        with self._lock:
+            self.stats["disk_hits"] += 1
+            self._remember(key, blob)
+            self._track_disk(key, len(blob))
+        # Rafraîchir la date pour que l'ordre d'éviction survive à un redémarrage
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return json.loads(blob)
+
+    def put(self, key, value):
+        """
+        Stocke une valeur (sérialisable en JSON) dans les deux niveaux
+        """
+        blob = json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+        with self._lock:
+            self._remember(key, blob)
+            self.stats["stores"] += 1
+
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(blob)
+            os.replace(tmp_path, path)
+        except OSError:
+            # Le cache disque est facultatif : une erreur d'écriture ne doit pas faire échouer la requête
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return
+
+        with self._lock:
+            self._track_disk(key, len(blob))
+            if self._disk_bytes > self.disk_max_bytes:
+                self._prune_disk()
+
+    async def get_async(self, key):
+        """
+        get hors de la boucle d'événements : lecture disque et désérialisation
+        d'un résultat qui peut peser plusieurs Mo
+        """
+        return await asyncio.to_thread(self.get, key)
+
+    async def put_async(self, key, value):
+        """
+        put hors de la boucle d'événements (sérialisation, écriture et éviction disque)
+        """
+        await asyncio.to_thread(self.put, key, value)
+
+    def purge(self):
+        """
+        Vide les deux niveaux du cache
+
+        Returns:
+            dict: Nombre d'entrées supprimées en mémoire et sur disque
+        """
+        with self._lock:
+            memory_count = len(self._memory)
+            self._memory.clear()
+            self._memory_bytes = 0
+
+            disk_count = 0
+            for _, key, _ in self._scan_disk():
+                try:
+                    os.unlink(self._path(key))
+                    disk_count += 1
+                except OSError:
+                    continue
+            self._disk = OrderedDict()
+            self._disk_bytes = 0
+
+        return {"memory_entries": memory_count, "disk_entries": disk_count}
+
+    def get_stats(self):
+        """
+        Retourne les compteurs du cache et son occupation
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+            stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_bytes"] = self._memory_bytes
+            stats["memory_max_bytes"] = self.memory_max_bytes
+            # Occupation du disque connue après le premier accès (sans parcours du répertoire ici)
+            stats["disk_entries"] = len(self._disk) if self._disk is not None else None
+            stats["disk_bytes"] = self._disk_bytes if self._disk is not None else None
+            stats["disk_max_bytes"] = self.disk_max_bytes
+            stats["enabled"] = CACHE_ENABLED
+        return stats
+
+
+# Instance partagée par tous les endpoints
+extraction_cache = ExtractionCache(CACHE_DIR, CACHE_MEMORY_MAX_BYTES, CACHE_DISK_MAX_BYTES)
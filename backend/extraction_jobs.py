@@ -0,0 +1,274 @@
+import asyncio
+import math
+import os
+import time
+import uuid
+from parsing_executor import PARSING_MAX_WORKERS
+
+# Configuration des jobs d'extraction asynchrones (surchargée par variables d'environnement)
+JOBS_MAX_QUEUED = int(os.environ.get("JOBS_MAX_QUEUED", 32))
+JOBS_CONCURRENCY = int(os.environ.get("JOBS_CONCURRENCY", PARSING_MAX_WORKERS))
+JOBS_RESULT_TTL = float(os.environ.get("JOBS_RESULT_TTL", 3600))
+JOBS_MAX_RETAINED = int(os.environ.get("JOBS_MAX_RETAINED", 64))
+JOBS_PROGRESS_PAGES = int(os.environ.get("JOBS_PROGRESS_PAGES", 8))
+
+# Bornes du délai Retry-After proposé quand la file est pleine (en secondes)
+RETRY_AFTER_MIN = 1
+RETRY_AFTER_MAX = 120
+
+# États d'un job
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobQueueFullError(Exception):
+    """La file des jobs est pleine : le client doit réessayer plus tard"""
+
+    def __init__(self, retry_after):
+        super().__init__("La file des jobs d'extraction est pleine")
+        self.retry_after = retry_after
+
+
+class Job:
+    """
+    Job d'extraction : état, progression (pages traitées / total) et résultat
+
+    Chaque changement réveille les abonnés (flux SSE) en remplaçant l'Event courant.
+    """
+
+    def __init__(self, kind, filename, runner, upload):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.filename = filename
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.pages_done = 0
+        self.total_pages = None
+        self.result = None
+        self.error = None
+        self.error_status = None
+        self.runner = runner
+        self.upload = upload
+        self.task = None
+        self.cancel_requested = False
+        self._changed = asyncio.Event()
+
+    @property
+    def expires_at(self):
+        return self.finished_at + JOBS_RESULT_TTL if self.finished_at is not None else None
+
+    def notify(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def changed_event(self):
+        """
+        Event déclenché au prochain changement d'état (à obtenir avant de lire l'état)
+        """
+        return self._changed
+
+    def set_progress(self, pages_done, total_pages):
+        self.pages_done = pages_done
+        self.total_pages = total_pages
+        self.notify()
+
+    def finish(self, status, result=None, error=None, error_status=None):
+        self.status = status
+        self.result = result
+        self.error = error
+        self.error_status = error_status
+        self.finished_at = time.time()
+        self.runner = None
+        if self.upload is not None:
+            self.upload.close()
+            self.upload = None
+        self.notify()
+
+    def to_dict(self):
+        percent = None
+        if self.total_pages:
+            percent = round(100 * self.pages_done / self.total_pages, 1)
+        elif self.status == SUCCEEDED:
+            percent = 100.0
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "filename": self.filename,
+            "status": self.status,
+            "progress": {"pages_done": self.pages_done, "total_pages": self.total_pages, "percent": percent},
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "expires_at": self.expires_at,
+            "error": self.error
+        }
+
+
+class JobManager:
+    """
+    File bornée de jobs d'extraction exécutés par un nombre fixe de workers asyncio
+
+    Les résultats restent disponibles JOBS_RESULT_TTL secondes après la fin
+    du job, puis sont oubliés. Au plus JOBS_MAX_RETAINED jobs terminés sont
+    gardés : au-delà, les plus anciens sont oubliés avant leur échéance.
+    """
+
+    def __init__(self, max_queued, concurrency, result_ttl, max_retained):
+        self.max_queued = max_queued
+        self.concurrency = concurrency
+        self.result_ttl = result_ttl
+        self.max_retained = max_retained
+        self.jobs = {}
+        self._queue = None
+        self._workers = []
+        # Durée moyenne (glissante) d'un job, pour estimer Retry-After
+        self._average_seconds = None
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for job in self.jobs.values():
+            if job.status not in FINISHED_STATES:
+                job.finish(CANCELLED, error="Serveur arrêté")
+
+    def _retry_after(self):
+        # Temps estimé pour qu'une place se libère dans la file
+        average = self._average_seconds or RETRY_AFTER_MIN
+        estimate = average * self._queue.qsize() / max(1, self.concurrency)
+        return int(min(RETRY_AFTER_MAX, max(RETRY_AFTER_MIN, math.ceil(estimate))))
+
+    def purge_expired(self):
+        """
+        Oublie les jobs terminés depuis plus de result_ttl secondes, puis les
+        plus anciens jobs terminés au-delà de max_retained
+        """
+        now = time.time()
+        finished = sorted(
+            (job for job in self.jobs.values() if job.finished_at is not None),
+            key=lambda job: job.finished_at
+        )
+        expired = sum(1 for job in finished if now - job.finished_at > self.result_ttl)
+        # Les résultats (textes de plusieurs Mo) sont gardés en mémoire : leur nombre est borné
+        dropped = max(expired, len(finished) - self.max_retained)
+        for job in finished[:dropped]:
+            del self.jobs[job.id]
+        return dropped
+
+    def submit(self, kind, filename, runner, upload):
+        """
+        Met un job en file
+
+        Args:
+            kind (str): Type de job (ex. "pdf_text")
+            runner: Coroutine runner(job, upload) qui retourne le résultat
+            upload (IngestedUpload): Fichier du job, libéré à la fin du job
+
+        Returns:
+            Job
+
+        Raises:
+            JobQueueFullError: si la file est pleine
+        """
+        if self._queue is None:
+            raise RuntimeError("Le gestionnaire de jobs n'est pas démarré")
+        self.purge_expired()
+        job = Job(kind, filename, runner, upload)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFullError(self._retry_after())
+        self.jobs[job.id] = job
+        return job
+
+    def get(self, job_id):
+        self.purge_expired()
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """
+        Annule un job en file ou en cours
+
+        Returns:
+            Job ou None si le job n'existe pas
+        """
+        job = self.get(job_id)
+        if job is None:
+            return None
+        if job.status == QUEUED:
+            job.finish(CANCELLED, error="Job annulé")
+        elif job.status == RUNNING and job.task is not None:
+            job.cancel_requested = True
+            job.task.cancel()
+        return job
+
+    def counts(self):
+        counts = {state: 0 for state in (QUEUED, RUNNING) + FINISHED_STATES}
+        for job in self.jobs.values():
+            counts[job.status] += 1
+        return counts
+
+    def get_status(self):
+        return {
+            "jobs": self.counts(),
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_queued": self.max_queued,
+            "concurrency": self.concurrency,
+            "result_ttl": self.result_ttl,
+            "max_retained": self.max_retained
+        }
+
+    async def _work(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.status == QUEUED:
+                    await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job):
+        job.status = RUNNING
+        job.started_at = time.time()
+        job.notify()
+        job.task = asyncio.create_task(job.runner(job, job.upload))
+        try:
+            result = await job.task
+        except asyncio.CancelledError:
+            job.finish(CANCELLED, error="Job annulé" if job.cancel_requested else "Serveur arrêté")
+            # Arrêt du serveur : propager l'annulation du worker
+            if not job.cancel_requested:
+                raise
+            return
+        except Exception as e:
+            job.finish(
+                FAILED,
+                error=getattr(e, "detail", None) or str(e),
+                error_status=getattr(e, "status_code", 500)
+            )
+        else:
+            if isinstance(result, dict) and "error" in result:
+                job.finish(FAILED, error=result["error"], error_status=500)
+            else:
+                job.finish(SUCCEEDED, result=result)
+        finally:
+            job.task = None
+            self.purge_expired()
+
+        duration = job.finished_at - job.started_at
+        self._average_seconds = duration if self._average_seconds is None else 0.8 * self._average_seconds + 0.2 * duration
+
+
+# Instance partagée par tous les endpoints
+job_manager = JobManager(JOBS_MAX_QUEUED, JOBS_CONCURRENCY, JOBS_RESULT_TTL, JOBS_MAX_RETAINED)
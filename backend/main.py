@@ -1,20 +1,56 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request, Header, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
-import tempfile
+from fastapi.responses import StreamingResponse, Response, JSONResponse, FileResponse, PlainTextResponse
+import asyncio
+import functools
+import inspect
+import math
+import time
+import zipfile
 import os
-import requests
-from extract_placeholders import extract_placeholders_from_docx
-from extract_placeholders_advanced import extract_placeholders_with_context, analyze_placeholder_types
+import json
+import logging
+from extract_placeholders_advanced import build_template_views, advanced_view, TEMPLATE_VIEWS, ADVANCED_FORMATS, ADVANCED_FIELDS
+from template_analysis import analyze_template, ANALYSIS_VERSION
+from parsing_executor import run_parsing, shutdown_executors, pending_jobs, ParsingTimeoutError, ParsingCancelledError, PARSING_MAX_WORKERS
+from extraction_cache import extraction_cache, make_cache_key, CACHE_ENABLED
+from upload_ingestion import IngestedUpload, ingest_upload, UploadTooLargeError
+from extraction_jobs import job_manager, JobQueueFullError, FINISHED_STATES, SUCCEEDED, JOBS_PROGRESS_PAGES
+from bulk_upload import BulkItem, open_archive, file_kind, BULK_MAX_FILES, BULK_CONCURRENCY, BULK_PDF_PIPELINES
+from placeholder_catalogue import placeholder_catalogue
+from text_index import text_index, InvalidSearchQueryError, SEARCH_SYNTAXES, TEXT_INDEX_ENABLED
+from v3_rules import v3_rule_engine, extract_v3_fields, merge_v3_results, v3_completion, MERGE_POLICIES, V3_FIELDS, V3_GOAL_FIELDS
+from n8n_outbox import n8n_dispatcher, outbox_store, DEAD, N8N_BATCH_ENABLED
+from request_profiler import ProfilingMiddleware, profile_store, PROFILING_ENABLED, PROFILE_SORT_KEYS
+from response_encoding import FastJSONResponse, CompressionMiddleware, dumps_json, RESPONSE_COMPRESSION_ENABLED
+from metrics import registry, MetricsMiddleware, CONTENT_TYPE as METRICS_CONTENT_TYPE
 # Remplacer PyPDF2 par pdfminer.six
-from pdfminer.high_level import extract_text
-from pdfminer.layout import LAParams
-from typing import Dict, Any, Optional
+from extract_pdf_pages import count_pdf_pages, join_pages, split_pages, plan_page_shards, page_range_numbers, PAGE_BREAK
+from pdf_extractors import (
+    get_pdf_extractor, resolve_pdf_mode, pdf_text_version, pdf_extraction_modes, extract_page_range, PDF_EXTRACTION_MODE
+)
+from pdf_placeholders import index_pdf_placeholders, merge_placeholder_indexes, PLACEHOLDER_INDEX_VERSION
+from typing import Dict, Any, List, Optional
 from pydantic import BaseModel
 
-app = FastAPI(title="RAEDIFICARE Template API")
+logger = logging.getLogger(__name__)
+
+# Réponses JSON sérialisées avec orjson (json si orjson n'est pas installé)
+app = FastAPI(title="RAEDIFICARE Template API", default_response_class=FastJSONResponse)
 
 # URL du webhook n8n
-N8N_WEBHOOK_URL = "https://hamiddev13.app.n8n.cloud/webhook-test/raedificare-template"
+N8N_WEBHOOK_URL = os.environ.get("N8N_WEBHOOK_URL", "https://hamiddev13.app.n8n.cloud/webhook-test/raedificare-template")
+
+# Jeton des endpoints d'administration (aucun contrôle s'il n'est pas défini)
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+# Seuils de l'extraction PDF parallèle par plages de pages
+PDF_SHARD_MIN_PAGES = int(os.environ.get("PDF_SHARD_MIN_PAGES", 32))
+PDF_SHARD_MIN_BYTES = int(os.environ.get("PDF_SHARD_MIN_BYTES", 128 * 1024))
+PDF_SHARD_PAGES = int(os.environ.get("PDF_SHARD_PAGES", 8))
+
+# Nombre maximal de pages lues par l'extraction V3 avec arrêt anticipé
+PDF_V3_PAGE_BUDGET = int(os.environ.get("PDF_V3_PAGE_BUDGET", 10))
 
 # Ajouter CORS pour permettre les requêtes depuis le frontend
 app.add_middleware(
@@ -25,439 +61,881 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compression brotli / gzip négociée par Accept-Encoding, au-delà de RESPONSE_COMPRESSION_MIN_BYTES
+if RESPONSE_COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# Nombre et durée des requêtes par endpoint (exposés sur /metrics)
+app.add_middleware(MetricsMiddleware, routes=app.routes)
+
+# Profilage CPU à la demande : le middleware n'est installé que si PROFILING_ENABLED=1
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware, admin_token=ADMIN_TOKEN)
+
+# Métriques lues à partir de l'état existant, uniquement au moment du scrape
+registry.collector(
+    "raedificare_extraction_cache_lookups_total", "Consultations du cache d'extraction", "counter",
+    lambda: {(result,): extraction_cache.get_stats()[key] for result, key in
+             (("memory_hit", "memory_hits"), ("disk_hit", "disk_hits"), ("miss", "misses"))},
+    ("result",)
+)
+registry.collector(
+    "raedificare_parsing_pending_jobs", "Jobs de parsing soumis et non terminés", "gauge", pending_jobs
+)
+registry.collector(
+    "raedificare_extraction_jobs", "Jobs d'extraction asynchrones par état", "gauge",
+    lambda: {(status,): count for status, count in job_manager.counts().items()},
+    ("status",)
+)
+registry.collector(
+    "raedificare_text_index_documents", "Documents PDF dans l'index plein texte", "gauge",
+    lambda: text_index.count_documents() if TEXT_INDEX_ENABLED else 0
+)
+registry.collector(
+    "raedificare_n8n_outbox_deliveries", "Livraisons n8n de l'outbox par état", "gauge",
+    lambda: {(status,): count for status, count in outbox_store.counts().items()},
+    ("status",)
+)
+
+def page_text_result(page_texts, mode, pages=None):
+    """
+    Résultat d'extraction de texte PDF à partir du texte de chaque page
+
+    Pour une plage de pages, total_pages est le nombre de pages extraites
+    et first_page / last_page situent la plage dans le document.
+    """
+    result = {
+        "success": True,
+        "total_pages": len(page_texts),
+        "text": join_pages(page_texts),
+        "extraction_mode": mode
+    }
+    if pages is not None:
+        result["first_page"] = pages[0]
+        result["last_page"] = pages[0] + len(page_texts) - 1
+    return result
+
 # Fonction d'extraction de texte PDF améliorée avec pdfminer.six
-def extract_text_from_pdf(file_path):
+def extract_text_from_pdf(source, mode="layout", pages=None):
     """
     Extrait tout le texte d'un fichier PDF en utilisant pdfminer.six
+
+    Args:
+        source (str | bytes): Chemin du fichier PDF ou son contenu
+        mode (str): Mode d'extraction ("layout", "fast" ou "auto")
+        pages (tuple): Plage (première page, dernière page ou None), tout le document si None
     """
     try:
-        if not os.path.exists(file_path):
+        if isinstance(source, str) and not os.path.exists(source):
             return {"error": "Le fichier n'existe pas"}
             
-        # Utiliser pdfminer avec des paramètres optimisés pour une meilleure extraction
-        laparams = LAParams(
-            line_margin=0.5,
-            word_margin=0.1,
-            char_margin=2.0,
-            all_texts=True
-        )
-        
-        # Extraire tout le texte du PDF
-        full_text = extract_text(
-            file_path,
-            laparams=laparams,
-            codec='utf-8'
-        )
-        
-        # Compter approximativement le nombre de pages (basé sur les sauts de page)
-        page_breaks = full_text.count('\f') + 1
+        # Extraction page par page pour connaître le vrai nombre de pages
+        mode = resolve_pdf_mode(source, mode)
+        page_numbers = page_range_numbers(*pages) if pages is not None else None
+        page_texts = [text for _, text in get_pdf_extractor(mode).iter_pages(source, page_numbers)]
         
+        return page_text_result(page_texts, mode, pages)
+            
+    except Exception as e:
         return {
-            "success": True,
-            "total_pages": page_breaks,
-            "text": full_text
+            "success": False,
+            "error": f"Erreur lors de l'extraction du texte: {str(e)}"
         }
-            
+
+def clamp_page_range(pages, total_pages):
+    """
+    Bornes effectives d'une plage de pages dans un document de total_pages pages
+
+    Returns:
+        tuple: (première page, dernière page) ; vide si la première page est après la dernière
+    """
+    first_page, last_page = pages if pages is not None else (1, None)
+    return first_page, total_pages if last_page is None else min(last_page, total_pages)
+
+async def plan_pdf_shards(source, size, request, sharding="auto", pages=None):
+    """
+    Décide du découpage d'un PDF (ou d'une plage de pages) en plages pour l'extraction parallèle
+
+    Returns:
+        list: Plages (première page, dernière page), ou None pour une passe unique
+    """
+    if sharding == "off" or (sharding == "auto" and (size or 0) < PDF_SHARD_MIN_BYTES):
+        return None
+
+    # Compter les pages ne nécessite que l'arbre des pages : le pool de threads suffit
+    total_pages = await parse_in_executor(count_pdf_pages, source, size=0, request=request)
+    first_page, last_page = clamp_page_range(pages, total_pages)
+    page_count = last_page - first_page + 1
+
+    # Deux plages par worker pour lisser les pages plus lentes que les autres
+    shard_count = min(PARSING_MAX_WORKERS * 2, math.ceil(page_count / PDF_SHARD_PAGES))
+    if shard_count < 2 or (sharding == "auto" and page_count < PDF_SHARD_MIN_PAGES):
+        return None
+
+    return [
+        (first_page + first - 1, first_page + last - 1)
+        for first, last in plan_page_shards(page_count, shard_count)
+    ]
+
+async def extract_text_from_pdf_parallel(source, size=None, request=None, sharding="auto", mode="layout", pages=None):
+    """
+    Extrait le texte d'un PDF en répartissant les pages entre plusieurs workers
+
+    Le résultat est identique à extract_text_from_pdf. En mode "auto", le
+    découpage n'est utilisé que pour les documents assez gros (nombre de
+    pages et taille) pour amortir le coût de lancement des tâches.
+
+    Args:
+        source (str | bytes): Chemin du PDF ou son contenu
+        size (int): Taille du fichier en octets
+        request (Request): Requête HTTP, pour annuler si le client se déconnecte
+        sharding (str): "auto", "on" ou "off"
+        mode (str): Mode d'extraction ("layout", "fast" ou "auto")
+        pages (tuple): Plage (première page, dernière page ou None), tout le document si None
+    """
+    try:
+        shards = await plan_pdf_shards(source, size, request, sharding, pages)
+    except HTTPException:
+        raise
     except Exception as e:
         return {
             "success": False,
             "error": f"Erreur lors de l'extraction du texte: {str(e)}"
         }
 
-@app.get("/")
-def read_root():
-    return {"message": "Bienvenue sur l'API RAEDIFICARE Template"}
+    if shards is None:
+        return await parse_in_executor(extract_text_from_pdf, source, mode, pages, size=size, request=request)
 
-@app.post("/extract-placeholders/")
-async def extract_placeholders(file: UploadFile = File(...)):
+    try:
+        # Toutes les plages doivent utiliser le même extracteur : "auto" est résolu avant
+        if mode == "auto":
+            mode = await parse_in_executor(resolve_pdf_mode, source, mode, size=size, request=request)
+        parts = await asyncio.gather(*[
+            parse_in_executor(extract_page_range, source, first_page, last_page, mode, size=size, request=request)
+            for first_page, last_page in shards
+        ])
+    except HTTPException:
+        raise
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Erreur lors de l'extraction du texte: {str(e)}"
+        }
+
+    # Réassembler les plages dans l'ordre des pages
+    page_texts = [text for part in parts for text in part]
+
+    return page_text_result(page_texts, mode, pages)
+
+async def index_pdf_placeholders_parallel(source, size=None, request=None, sharding="auto", mode="layout", pages=None):
     """
-    Extrait tous les placeholders d'un fichier template docx uploadé
+    Indexe les placeholders d'un PDF en répartissant les pages entre plusieurs
+    workers (même découpage que extract_text_from_pdf_parallel)
+    """
+    try:
+        shards = await plan_pdf_shards(source, size, request, sharding, pages)
+    except HTTPException:
+        raise
+    except Exception as e:
+        return {"error": f"Erreur lors de l'extraction des placeholders: {str(e)}"}
+
+    if shards is None:
+        return await parse_in_executor(index_pdf_placeholders, source, mode, pages, size=size, request=request)
+
+    if mode == "auto":
+        mode = await parse_in_executor(resolve_pdf_mode, source, mode, size=size, request=request)
+    parts = await asyncio.gather(*[
+        parse_in_executor(index_pdf_placeholders, source, mode, shard, size=size, request=request)
+        for shard in shards
+    ])
+    for part in parts:
+        if "error" in part:
+            return part
+    return merge_placeholder_indexes(parts, mode)
+
+def extract_pdf_pages_for_v3(source, first_page=None, last_page=None, mode="layout"):
+    """
+    Extrait une plage de pages (tout le document par défaut) et y cherche
+    les champs V3 au fil de l'extraction, page par page
+
+    Returns:
+        dict: {"pages": texte de chaque page, "v3_state": état d'extraction V3, "mode": mode utilisé}
+    """
+    page_numbers = page_range_numbers(first_page, last_page) if first_page is not None else None
+    mode = resolve_pdf_mode(source, mode)
+    pages = []
+    state = v3_rule_engine.new_state()
+    for _, text in get_pdf_extractor(mode).iter_pages(source, page_numbers):
+        pages.append(text)
+        v3_rule_engine.scan(text, state)
+    return {"pages": pages, "v3_state": state, "mode": mode}
+
+def extract_pdf_v3_until_found(source, wanted, page_budget, mode="layout", pages=None):
+    """
+    Extraction V3 dirigée par un objectif : les pages sont analysées une à une
+    et l'extraction s'arrête dès que tous les champs voulus ont une valeur,
+    ou après page_budget pages. Seules les règles des champs voulus sont évaluées.
+
+    Returns:
+        dict: {"pages", "mode"} comme extract_pdf_pages_for_v3, "v3_fields"
+        (champs voulus trouvés) et "stop_reason" : "fields_found",
+        "page_budget" ou "end_of_document"
+    """
+    first_page, last_page = pages if pages is not None else (1, None)
+    mode = resolve_pdf_mode(source, mode)
+    engine = v3_rule_engine.for_fields(wanted)
+    wanted = set(wanted)
+    page_texts = []
+    state = engine.new_state()
+    stop_reason = "end_of_document"
+    # Les pages sont produites à la demande : sortir de la boucle arrête le parsing
+    for _, text in get_pdf_extractor(mode).iter_pages(source, page_range_numbers(first_page, last_page)):
+        page_texts.append(text)
+        engine.scan(text, state)
+        if wanted.issubset(engine.finish(state)):
+            stop_reason = "fields_found"
+            break
+        if len(page_texts) >= page_budget:
+            stop_reason = "page_budget"
+            break
+    return {"pages": page_texts, "v3_fields": engine.finish(state), "mode": mode, "stop_reason": stop_reason}
+
+async def extract_pdf_v3_parallel(source, size=None, request=None, sharding="auto", mode="layout", pages=None):
+    """
+    Extrait le texte d'un PDF (ou d'une plage de pages) et ses champs V3 en une seule passe
+
+    Chaque worker cherche les champs V3 dans les pages qu'il vient d'extraire ;
+    les résultats des plages sont fusionnés dans l'ordre du document.
+    """
+    first_page, last_page = pages if pages is not None else (None, None)
+    try:
+        shards = await plan_pdf_shards(source, size, request, sharding, pages)
+        if shards is None:
+            parts = [await parse_in_executor(extract_pdf_pages_for_v3, source, first_page, last_page, mode, size=size, request=request)]
+        else:
+            if mode == "auto":
+                mode = await parse_in_executor(resolve_pdf_mode, source, mode, size=size, request=request)
+            parts = await asyncio.gather(*[
+                parse_in_executor(extract_pdf_pages_for_v3, source, first_page, last_page, mode, size=size, request=request)
+                for first_page, last_page in shards
+            ])
+    except HTTPException:
+        raise
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Erreur lors de l'extraction du texte: {str(e)}"
+        }
+
+    page_texts = [text for part in parts for text in part["pages"]]
+    state = v3_rule_engine.merge_states([part["v3_state"] for part in parts])
+
+    return {
+        **page_text_result(page_texts, parts[0]["mode"], pages),
+        "v3_fields": v3_rule_engine.finish(state)
+    }
+
+async def extract_pdf_with_progress(source, size, progress, with_v3=False, mode="layout", pages=None):
+    """
+    Extrait un PDF par plages de JOBS_PROGRESS_PAGES pages en signalant la progression
+
+    Les plages sont réparties entre les workers ; progress(pages traitées, total)
+    est appelé après chaque plage. Le résultat est celui de extract_text_from_pdf
+    (plus "v3_fields" avec with_v3, comme extract_pdf_v3_parallel).
+    """
+    first_page, last_page = clamp_page_range(pages, await parse_in_executor(count_pdf_pages, source, size=0))
+    total_pages = max(0, last_page - first_page + 1)
+    progress(0, total_pages)
+    if mode == "auto":
+        mode = await parse_in_executor(resolve_pdf_mode, source, mode, size=size)
+    shards = [
+        (first_page + first - 1, first_page + last - 1)
+        for first, last in plan_page_shards(total_pages, math.ceil(total_pages / JOBS_PROGRESS_PAGES))
+    ] if total_pages else []
+    pages_done = 0
+
+    async def extract_shard(first_page, last_page):
+        nonlocal pages_done
+        if with_v3:
+            part = await parse_in_executor(extract_pdf_pages_for_v3, source, first_page, last_page, mode, size=size)
+        else:
+            part = {"pages": await parse_in_executor(extract_page_range, source, first_page, last_page, mode, size=size)}
+        pages_done += last_page - first_page + 1
+        progress(pages_done, total_pages)
+        return part
+
+    parts = await asyncio.gather(*[extract_shard(first_page, last_page) for first_page, last_page in shards])
+    page_texts = [text for part in parts for text in part["pages"]]
+    result = page_text_result(page_texts, mode, pages)
+    if with_v3:
+        result["v3_fields"] = v3_rule_engine.finish(v3_rule_engine.merge_states([part["v3_state"] for part in parts]))
+    return result
+
+@app.on_event("startup")
+async def start_n8n_dispatcher():
+    await n8n_dispatcher.start()
+
+@app.on_event("shutdown")
+async def stop_n8n_dispatcher():
+    await n8n_dispatcher.stop()
+
+@app.on_event("startup")
+async def start_job_manager():
+    await job_manager.start()
+
+@app.on_event("shutdown")
+async def stop_job_manager():
+    await job_manager.stop()
+
+@app.on_event("shutdown")
+def shutdown_parsing_executors():
+    shutdown_executors()
+
+async def queue_for_n8n(payload, kind, batch=None):
+    """
+    Dépose un payload dans l'outbox n8n ; la livraison a lieu en arrière-plan
+
+    Avec batch, le payload est regroupé avec les autres envois vers le même
+    webhook (N8N_BATCH_ENABLED si batch vaut None).
+    """
+    if batch is None:
+        batch = N8N_BATCH_ENABLED
+    delivery_id = await n8n_dispatcher.enqueue(N8N_WEBHOOK_URL, payload, kind, batch)
+    return {
+        "n8n_status": "queued",
+        "batched": batch,
+        "delivery_id": delivery_id,
+        "status_url": f"/n8n/deliveries/{delivery_id}"
+    }
+
+async def parse_in_executor(func, *args, size=None, request=None):
+    """
+    Exécute une fonction d'extraction dans l'exécuteur de parsing et
+    convertit les timeouts / déconnexions en erreurs HTTP
+    """
+    try:
+        return await run_parsing(func, *args, size=size, request=request)
+    except ParsingTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except ParsingCancelledError as e:
+        # 499 : convention nginx pour "client closed request"
+        raise HTTPException(status_code=499, detail=str(e))
+
+async def parse_upload(request, upload, func, namespace, fingerprint):
+    """
+    Extrait un fichier uploadé en passant par le cache d'extraction
+
+    Le résultat est retrouvé par l'empreinte SHA-256 calculée à l'ingestion :
+    un fichier déjà analysé n'est pas re-parsé.
+    """
+    cache_key = None
+    if CACHE_ENABLED:
+        cache_key = make_cache_key(upload.sha256, namespace, fingerprint)
+        cached = await extraction_cache.get_async(cache_key)
+        if cached is not None:
+            return cached
+
+    if inspect.iscoroutinefunction(func):
+        # Stratégie asynchrone qui orchestre elle-même l'exécuteur
+        result = await func(upload.source, size=upload.size, request=request)
+    else:
+        result = await parse_in_executor(func, upload.source, size=upload.size, request=request)
+
+    # Ne jamais mettre en cache une erreur
+    if cache_key is not None and "error" not in result:
+        await extraction_cache.put_async(cache_key, result)
+
+    return result
+
+async def receive_upload(file, suffix):
+    """
+    Ingère un fichier uploadé et convertit un dépassement de taille en HTTP 413
+    """
+    try:
+        return await ingest_upload(file, suffix=suffix)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+async def docx_upload(file: UploadFile = File(...)):
+    """
+    Dépendance : vérifie et ingère un template .docx, puis le libère après la requête
     """
     # Vérifier que c'est bien un fichier docx
     if not file.filename.endswith(".docx"):
         raise HTTPException(status_code=400, detail="Le fichier doit être au format .docx")
+
+    upload = await receive_upload(file, ".docx")
+    try:
+        yield upload
+    finally:
+        upload.close()
+
+async def pdf_upload(file: UploadFile = File(...)):
+    """
+    Dépendance : vérifie et ingère un fichier PDF, puis le libère après la requête
+    """
+    # Vérifier que c'est bien un fichier PDF
+    if not file.filename.lower().endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Le fichier doit être au format PDF")
+
+    upload = await receive_upload(file, ".pdf")
+    try:
+        yield upload
+    finally:
+        upload.close()
+
+async def receive_owned_pdf(file):
+    # L'upload appartient au job ou au flux (libéré à sa fin) : pas de dépendance pdf_upload, qui le libère avec la requête
+    if not file.filename.lower().endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Le fichier doit être au format PDF")
+    return await receive_upload(file, ".pdf")
+
+def pdf_extraction_mode(mode: Optional[str] = None):
+    """
+    Dépendance : mode d'extraction PDF demandé ("layout", "fast" ou "auto"),
+    PDF_EXTRACTION_MODE par défaut
+    """
+    mode = mode or PDF_EXTRACTION_MODE
+    if mode not in pdf_extraction_modes():
+        raise HTTPException(status_code=400, detail=f"mode doit valoir l'une de ces valeurs : {', '.join(pdf_extraction_modes())}")
+    return mode
+
+def pdf_page_range(first_page: Optional[int] = Query(None, ge=1), last_page: Optional[int] = Query(None, ge=1)):
+    """
+    Dépendance : plage de pages demandée (bornes incluses, à partir de 1)
+
+    Returns:
+        tuple: (première page, dernière page ou None pour aller jusqu'à la fin),
+        ou None pour tout le document
+    """
+    if first_page is None and last_page is None:
+        return None
+    first_page = first_page or 1
+    if last_page is not None and last_page < first_page:
+        raise HTTPException(status_code=400, detail="last_page doit être supérieur ou égal à first_page")
+    return first_page, last_page
+
+def pdf_text_fingerprint(mode, pages=None):
+    """
+    Empreinte du cache d'extraction pour le texte d'un mode et d'une plage de pages
+    """
+    if pages is None:
+        return pdf_text_version(mode)
+    return f"{pdf_text_version(mode)}:pages={pages[0]}-{pages[1] or ''}"
+
+def slice_page_text_result(result, mode, pages):
+    """
+    Restreint un résultat d'extraction du document complet à une plage de pages
+    """
+    page_texts = split_pages(result["text"])
+    first_page, last_page = clamp_page_range(pages, len(page_texts))
+    return page_text_result(page_texts[first_page - 1:last_page], result.get("extraction_mode", mode), pages)
+
+async def pdf_text_upload(request, upload, mode, sharding="auto", pages=None):
+    """
+    Texte d'un PDF ingéré (ou d'une plage de pages), en passant par le cache
+    d'extraction (une entrée par mode)
+    """
+    # Document complet déjà extrait : la plage en est tirée sans re-parser
+    if pages is not None and CACHE_ENABLED:
+        cached = await extraction_cache.get_async(make_cache_key(upload.sha256, "pdf_text", pdf_text_version(mode)))
+        if cached is not None:
+            return slice_page_text_result(cached, mode, pages)
+
+    extract = functools.partial(extract_text_from_pdf_parallel, sharding=sharding, mode=mode, pages=pages)
+    result = await parse_upload(request, upload, extract, "pdf_text", pdf_text_fingerprint(mode, pages))
+    if "error" in result:
+        raise HTTPException(status_code=500, detail=result["error"])
+    if pages is None:
+        await index_pdf_text(upload, result)
+    return result
+
+async def index_pdf_text(upload, result):
+    """
+    Ajoute le texte complet d'un PDF à l'index plein texte (une erreur
+    d'indexation ne bloque pas l'extraction)
+    """
+    if not TEXT_INDEX_ENABLED:
+        return
+    try:
+        text_version = pdf_text_version(result.get("extraction_mode", "layout"))
+        await asyncio.to_thread(text_index.record_document, upload.sha256, upload.filename, result, text_version)
+    except Exception:
+        logger.exception("Erreur lors de l'indexation du texte de %s", upload.filename)
+
+async def pdf_placeholder_upload(request, upload, mode, pages=None):
+    """
+    Index positionnel des placeholders d'un PDF ingéré, en passant par le
+    cache d'extraction (partagé par les endpoints de placeholders PDF)
+    """
+    fingerprint = f"{pdf_text_fingerprint(mode, pages)}:placeholders:{PLACEHOLDER_INDEX_VERSION}"
+    extract = functools.partial(index_pdf_placeholders_parallel, mode=mode, pages=pages)
+    result = await parse_upload(request, upload, extract, "pdf_placeholders", fingerprint)
+    if "error" in result:
+        raise HTTPException(status_code=500, detail=result["error"])
+    return result
+
+def make_text_handle(sha256, mode):
+    # Le mode "layout" garde le handle historique (empreinte seule)
+    return sha256 if mode == "layout" else f"{sha256}.{mode}"
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """
+    Vérifie le jeton d'administration lorsque ADMIN_TOKEN est défini
+    """
+    if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Jeton d'administration invalide")
+
+@app.get("/")
+def read_root():
+    return {"message": "Bienvenue sur l'API RAEDIFICARE Template"}
+
+async def analyze_template_upload(request, upload):
+    """
+    Analyse un template uploadé en un seul passage (résultat partagé par
+    toutes les vues et mis en cache)
+    """
+    analysis = await parse_upload(request, upload, analyze_template, "template_analysis", ANALYSIS_VERSION)
     
-    # Sauvegarder temporairement le fichier uploadé
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".docx")
-    temp_file_path = temp_file.name
+    # Vérifier s'il y a eu une erreur
+    if "error" in analysis:
+        raise HTTPException(status_code=500, detail=analysis["error"])
     
+    # Indexer le template dans le catalogue (une erreur d'indexation ne bloque pas l'analyse)
     try:
-        # Écrire le contenu du fichier uploadé dans le fichier temporaire
-        content = await file.read()
-        with open(temp_file_path, "wb") as f:
-            f.write(content)
-        
-        # Extraire les placeholders
-        result = extract_placeholders_from_docx(temp_file_path)
-        
-        # Vérifier s'il y a eu une erreur
-        if "error" in result:
-            raise HTTPException(status_code=500, detail=result["error"])
-            
-        return result
+        await asyncio.to_thread(placeholder_catalogue.record_template, upload.sha256, upload.filename, analysis)
+    except Exception:
+        logger.exception("Erreur lors de l'indexation du template %s", upload.filename)
+    
+    return analysis
+
+@app.post("/extract-placeholders/")
+async def extract_placeholders(request: Request, upload: IngestedUpload = Depends(docx_upload)):
+    """
+    Extrait tous les placeholders d'un fichier template docx uploadé
+    """
+    # Extraire les placeholders
+    analysis = await analyze_template_upload(request, upload)
         
-    finally:
-        # Nettoyer le fichier temporaire
-        temp_file.close()
-        if os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
+    return build_template_views(analysis, ["basic"])["basic"]
 
 @app.post("/analyze-template-advanced/")
-async def analyze_template_advanced(file: UploadFile = File(...)):
+async def analyze_template_advanced(
+    request: Request,
+    upload: IngestedUpload = Depends(docx_upload),
+    response_format: str = Query("full", alias="format"),
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    fields: Optional[str] = None
+):
     """
     Analyse avancée d'un template avec contexte des placeholders
+
+    format=compact regroupe le texte des paragraphes et les sections dans des
+    tables référencées par indice ; offset / limit paginent les placeholders
+    uniques et fields (séparés par des virgules) restreint les champs des contextes.
     """
-    # Vérifier que c'est bien un fichier docx
-    if not file.filename.endswith(".docx"):
-        raise HTTPException(status_code=400, detail="Le fichier doit être au format .docx")
+    if response_format not in ADVANCED_FORMATS:
+        raise HTTPException(status_code=400, detail="Le format doit être 'full' ou 'compact'")
+    selected = None
+    if fields is not None:
+        selected = list(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+        unknown = [field for field in selected if field not in ADVANCED_FIELDS]
+        if unknown or not selected:
+            raise HTTPException(
+                status_code=400,
+                detail=f"fields doit lister des champs parmi : {', '.join(ADVANCED_FIELDS)}"
+            )
+
+    # Extraire les placeholders avec contexte et leurs types
+    analysis = await analyze_template_upload(request, upload)
+    
+    return advanced_view(analysis, response_format, offset, limit, selected)
+
+@app.post("/analyze-template/")
+async def analyze_template_views(
+    request: Request,
+    upload: IngestedUpload = Depends(docx_upload),
+    views: str = Query(",".join(TEMPLATE_VIEWS))
+):
+    """
+    Retourne plusieurs vues d'un même template pour le prix d'une seule analyse
+
+    Le paramètre views liste les vues séparées par des virgules parmi :
+    basic, context, types, sections, n8n
+    """
+    requested = [view.strip() for view in views.split(",") if view.strip()]
+    unknown = [view for view in requested if view not in TEMPLATE_VIEWS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Vues inconnues : {', '.join(unknown)}")
     
-    # Sauvegarder temporairement le fichier uploadé
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".docx")
-    temp_file_path = temp_file.name
+    analysis = await analyze_template_upload(request, upload)
     
-    try:
-        # Écrire le contenu du fichier uploadé dans le fichier temporaire
-        content = await file.read()
-        with open(temp_file_path, "wb") as f:
-            f.write(content)
-        
-        # Extraire les placeholders avec contexte
-        placeholders = extract_placeholders_with_context(temp_file_path)
-        
-        # Vérifier s'il y a eu une erreur
-        if "error" in placeholders:
-            raise HTTPException(status_code=500, detail=placeholders["error"])
-        
-        # Analyser les types de placeholders
-        placeholders_with_types = analyze_placeholder_types(placeholders)
-        
-        return placeholders_with_types
-        
-    finally:
-        # Nettoyer le fichier temporaire
-        temp_file.close()
-        if os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
+    return {
+        "filename": upload.filename,
+        **build_template_views(analysis, requested, upload.filename)
+    }
 
-@app.post("/send-to-n8n/")
-async def send_to_n8n(file: UploadFile = File(...)):
+@app.post("/send-to-n8n/", status_code=202)
+async def send_to_n8n(request: Request, upload: IngestedUpload = Depends(docx_upload), batch: Optional[bool] = None):
     """
     Extrait les placeholders d'un template et les envoie à n8n
     """
-    # Vérifier que c'est bien un fichier docx
-    if not file.filename.endswith(".docx"):
-        raise HTTPException(status_code=400, detail="Le fichier doit être au format .docx")
+    # Extraire les placeholders avec contexte
+    analysis = await analyze_template_upload(request, upload)
     
-    # Sauvegarder temporairement le fichier uploadé
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".docx")
-    temp_file_path = temp_file.name
+    # Préparer les données pour n8n
+    data_for_n8n = build_template_views(analysis, ["n8n"], upload.filename)["n8n"]
     
-    try:
-        # Écrire le contenu du fichier uploadé dans le fichier temporaire
-        content = await file.read()
-        with open(temp_file_path, "wb") as f:
-            f.write(content)
-        
-        # Extraire les placeholders avec contexte
-        result = extract_placeholders_with_context(temp_file_path)
-        
-        # Vérifier s'il y a eu une erreur
-        if "error" in result:
-            raise HTTPException(status_code=500, detail=result["error"])
-        
-        # Analyser les types
-        result = analyze_placeholder_types(result)
-        
-        # Préparer les données pour n8n
-        placeholders_list = [ph["placeholder"] for ph in result["unique_placeholders"]]
-        data_for_n8n = {
-            "filename": file.filename,
-            "total_found": result["total_found"],
-            "unique_count": result["unique_count"],
-            "placeholders": placeholders_list
-        }
-        
-        # Envoyer à n8n
-        try:
-            n8n_response = requests.post(
-                N8N_WEBHOOK_URL,
-                json=data_for_n8n,
-                headers={"Content-Type": "application/json"}
-            )
-            
-            if n8n_response.status_code != 200:
-                return {
-                    "n8n_status": "error",
-                    "status_code": n8n_response.status_code,
-                    "error": f"Erreur n8n: {n8n_response.text}",
-                    "placeholders_data": data_for_n8n
-                }
-                
-            return {
-                "n8n_status": "success",
-                "status_code": n8n_response.status_code,
-                "n8n_response": n8n_response.text,
-                "placeholders_data": data_for_n8n
-            }
-            
-        except Exception as e:
-            return {
-                "n8n_status": "error",
-                "error": f"Erreur de connexion à n8n: {str(e)}",
-                "placeholders_data": data_for_n8n
-            }
-        
-    finally:
-        # Nettoyer le fichier temporaire
-        temp_file.close()
-        if os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
+    # Déposer dans l'outbox n8n (livraison asynchrone avec reprises)
+    return {
+        **await queue_for_n8n(data_for_n8n, "template_placeholders", batch),
+        "placeholders_data": data_for_n8n
+    }
 
 # NOUVEL ENDPOINT POUR EXTRAIRE LE TEXTE D'UN PDF
 @app.post("/extract-pdf-text/")
-async def extract_pdf_text(file: UploadFile = File(...)):
+async def extract_pdf_text(
+    request: Request,
+    upload: IngestedUpload = Depends(pdf_upload),
+    sharding: str = "auto",
+    mode: str = Depends(pdf_extraction_mode),
+    pages: Optional[tuple] = Depends(pdf_page_range),
+    response_format: str = Query("json", alias="format")
+):
     """
     Extrait tout le texte d'un fichier PDF uploadé
+
+    Le paramètre sharding ("auto", "on", "off") contrôle l'extraction
+    parallèle par plages de pages ; mode choisit l'extracteur : "layout"
+    (analyse de mise en page), "fast" (ordre du flux, sans analyse) ou
+    "auto" (choix d'après les premières pages). first_page / last_page
+    limitent l'extraction à une plage de pages. format=text renvoie le
+    texte brut (text/plain), le nombre de pages et le mode dans les en-têtes.
     """
-    # Vérifier que c'est bien un fichier PDF
-    if not file.filename.lower().endswith(".pdf"):
-        raise HTTPException(status_code=400, detail="Le fichier doit être au format PDF")
-    
-    # Sauvegarder temporairement le fichier uploadé
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-    temp_file_path = temp_file.name
+    if sharding not in ("auto", "on", "off"):
+        raise HTTPException(status_code=400, detail="sharding doit valoir 'auto', 'on' ou 'off'")
+    if response_format not in ("json", "text"):
+        raise HTTPException(status_code=400, detail="Le format doit être 'json' ou 'text'")
     
+    # Extraire le texte du PDF avec pdfminer.six
+    result = await pdf_text_upload(request, upload, mode, sharding, pages)
+    if response_format == "text":
+        return PlainTextResponse(result["text"], headers=text_result_headers(result))
+    # Réponse construite directement : le texte n'est pas reparcouru par jsonable_encoder
+    return FastJSONResponse(result)
+
+def text_result_headers(result):
+    """
+    En-têtes d'une réponse texte brut : métadonnées du résultat d'extraction
+    """
+    headers = {"X-Total-Pages": str(result["total_pages"]), "X-Extraction-Mode": result.get("extraction_mode", "layout")}
+    if "first_page" in result:
+        headers["X-First-Page"] = str(result["first_page"])
+        headers["X-Last-Page"] = str(result["last_page"])
+    return headers
+
+def encode_stream_event(event, stream_format):
+    """
+    Encode un événement de flux : une ligne NDJSON, ou un message Server-Sent Events
+    """
+    data = dumps_json(event).decode("utf-8")
+    if stream_format == "sse":
+        return f"event: {event['type']}\ndata: {data}\n\n"
+    return data + "\n"
+
+async def open_page_stream(upload, cached_text, mode="layout", page_range=None):
+    """
+    Pages à streamer : rejouées depuis le texte en cache, ou extraites au fil de l'eau
+
+    Chaque page est extraite par un job de l'exécuteur de parsing (comme les
+    autres extractions PDF) : la boucle d'événements n'est jamais bloquée et
+    la page suivante n'est demandée qu'une fois la précédente envoyée.
+
+    Returns:
+        tuple: (nombre de pages, itérateur asynchrone de (numéro de page, texte))
+    """
+    if cached_text is not None:
+        page_texts = split_pages(cached_text)
+        first_page, last_page = clamp_page_range(page_range, len(page_texts))
+
+        async def pages():
+            for page_number, text in enumerate(page_texts[first_page - 1:last_page], first_page):
+                yield page_number, text
+    else:
+        source = upload.source
+        first_page, last_page = clamp_page_range(page_range, await parse_in_executor(count_pdf_pages, source, size=0))
+        if mode == "auto":
+            mode = await parse_in_executor(resolve_pdf_mode, source, mode, size=upload.size)
+
+        async def pages():
+            for page_number in range(first_page, last_page + 1):
+                texts = await parse_in_executor(extract_page_range, source, page_number, page_number, mode, size=upload.size)
+                yield page_number, texts[0]
+    return max(0, last_page - first_page + 1), pages()
+
+async def stream_pdf_raw_text(upload, cached_text, mode="layout", page_range=None):
+    """
+    Génère le texte brut d'un PDF page par page, chaque page suivie d'un saut de page
+
+    Un flux texte ne peut pas signaler d'erreur : en cas d'échec, la connexion
+    est interrompue avant la fin de la réponse. L'upload est libéré à la fin du flux.
+    """
     try:
-        # Écrire le contenu du fichier uploadé dans le fichier temporaire
-        content = await file.read()
-        with open(temp_file_path, "wb") as f:
-            f.write(content)
-        
-        # Extraire le texte du PDF avec pdfminer.six
-        result = extract_text_from_pdf(temp_file_path)
-        
-        # Vérifier s'il y a eu une erreur
-        if "error" in result:
-            raise HTTPException(status_code=500, detail=result["error"])
-            
-        return result
-        
+        _, pages = await open_page_stream(upload, cached_text, mode, page_range)
+        async for _, text in pages:
+            yield text + PAGE_BREAK
+    finally:
+        upload.close()
+
+async def stream_pdf_pages(upload, cached_text, stream_format, mode="layout", page_range=None):
+    """
+    Génère les événements du streaming de texte PDF, une page à la fois
+
+    Chaque événement est un objet JSON avec un champ "type" :
+    "start" (nombre de pages), "page" (numéro et texte), "done" ou "error".
+    L'upload est libéré à la fin du flux.
+    """
+    encode = functools.partial(encode_stream_event, stream_format=stream_format)
+
+    try:
+        total_pages, pages = await open_page_stream(upload, cached_text, mode, page_range)
+
+        yield encode({"type": "start", "total_pages": total_pages})
+
+        async for page_number, text in pages:
+            yield encode({"type": "page", "page": page_number, "text": text})
+
+        yield encode({"type": "done", "total_pages": total_pages})
+
+    except HTTPException as e:
+        # Timeout de parsing (504) : signalé dans le flux, la réponse est déjà commencée
+        yield encode({"type": "error", "error": f"Erreur lors de l'extraction du texte: {e.detail}"})
+
+    except Exception as e:
+        yield encode({"type": "error", "error": f"Erreur lors de l'extraction du texte: {str(e)}"})
+
     finally:
-        # Nettoyer le fichier temporaire
-        temp_file.close()
-        if os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
+        upload.close()
+
+# ENDPOINT DE STREAMING DU TEXTE D'UN PDF, PAGE PAR PAGE
+@app.post("/extract-pdf-text/stream")
+async def extract_pdf_text_stream(
+    file: UploadFile = File(...),
+    stream_format: str = Query("ndjson", alias="format"),
+    mode: str = Depends(pdf_extraction_mode),
+    pages: Optional[tuple] = Depends(pdf_page_range)
+):
+    """
+    Extrait le texte d'un fichier PDF et le renvoie page par page
+    (NDJSON par défaut, Server-Sent Events avec format=sse, ou texte brut
+    avec format=text), éventuellement limité aux pages first_page à last_page
+    """
+    if stream_format not in ("ndjson", "sse", "text"):
+        raise HTTPException(status_code=400, detail="Le format doit être 'ndjson', 'sse' ou 'text'")
+
+    # L'upload appartient au flux, qui le libère à sa fin : la dépendance
+    # pdf_upload le libérerait avant que les pages soient extraites
+    upload = await receive_owned_pdf(file)
+    try:
+        # Un document déjà extrait est rejoué depuis le cache
+        cached = None
+        if CACHE_ENABLED:
+            cached = await extraction_cache.get_async(make_cache_key(upload.sha256, "pdf_text", pdf_text_version(mode)))
+    except BaseException:
+        upload.close()
+        raise
+
+    cached_text = cached["text"] if cached else None
+    if stream_format == "text":
+        return StreamingResponse(stream_pdf_raw_text(upload, cached_text, mode, pages), media_type="text/plain; charset=utf-8")
+    return StreamingResponse(
+        stream_pdf_pages(upload, cached_text, stream_format, mode, pages),
+        media_type="text/event-stream" if stream_format == "sse" else "application/x-ndjson"
+    )
 
 # NOUVEL ENDPOINT POUR EXTRAIRE LES PLACEHOLDERS D'UN PDF
 @app.post("/extract-pdf-placeholders/")
-async def extract_pdf_placeholders(file: UploadFile = File(...)):
+async def extract_pdf_placeholders(
+    request: Request,
+    upload: IngestedUpload = Depends(pdf_upload),
+    mode: str = Depends(pdf_extraction_mode),
+    pages: Optional[tuple] = Depends(pdf_page_range)
+):
     """
-    Extrait les placeholders ({{placeholder}}) d'un fichier PDF
+    Extrait les placeholders ({{placeholder}}) d'un fichier PDF, avec la page,
+    la position dans le texte de la page et la boîte englobante de chaque occurrence
     """
-    # Vérifier que c'est bien un fichier PDF
-    if not file.filename.lower().endswith(".pdf"):
-        raise HTTPException(status_code=400, detail="Le fichier doit être au format PDF")
-    
-    # Sauvegarder temporairement le fichier uploadé
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-    temp_file_path = temp_file.name
+    index = await pdf_placeholder_upload(request, upload, mode, pages)
     
-    try:
-        # Écrire le contenu du fichier uploadé dans le fichier temporaire
-        content = await file.read()
-        with open(temp_file_path, "wb") as f:
-            f.write(content)
-        
-        # Extraire le texte du PDF
-        text_result = extract_text_from_pdf(temp_file_path)
-        
-        # Vérifier s'il y a eu une erreur
-        if "error" in text_result:
-            raise HTTPException(status_code=500, detail=text_result["error"])
-        
-        # Extraire les placeholders du texte
-        import re
-        pattern = r'\{\{([^{}]+)\}\}'
-        matches = re.findall(pattern, text_result["text"])
-        
-        # Nettoyer et dédupliquer tout en préservant l'ordre
-        clean_placeholders = [match.strip() for match in matches]
-        unique_placeholders = []
-        
-        for ph in clean_placeholders:
-            if ph not in unique_placeholders:
-                unique_placeholders.append(ph)
-        
-        return {
-            "filename": file.filename,
-            "total_pages": text_result["total_pages"],
-            "total_found": len(matches),
-            "unique_count": len(unique_placeholders),
-            "placeholders": unique_placeholders
-        }
-        
-    finally:
-        # Nettoyer le fichier temporaire
-        temp_file.close()
-        if os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
+    return {
+        "filename": upload.filename,
+        "total_pages": index["total_pages"],
+        "total_found": index["total_found"],
+        "unique_count": index["unique_count"],
+        "placeholders": index["placeholders"],
+        "occurrences": index["occurrences"]
+    }
 
 # NOUVEL ENDPOINT POUR ENVOYER LE TEXTE PDF À N8N
-@app.post("/send-pdf-text-to-n8n/")
-async def send_pdf_text_to_n8n(file: UploadFile = File(...)):
+@app.post("/send-pdf-text-to-n8n/", status_code=202)
+async def send_pdf_text_to_n8n(
+    request: Request,
+    upload: IngestedUpload = Depends(pdf_upload),
+    batch: Optional[bool] = None,
+    mode: str = Depends(pdf_extraction_mode),
+    pages: Optional[tuple] = Depends(pdf_page_range)
+):
     """
     Extrait le texte d'un PDF et l'envoie à n8n
     """
-    # Vérifier que c'est bien un fichier PDF
-    if not file.filename.lower().endswith(".pdf"):
-        raise HTTPException(status_code=400, detail="Le fichier doit être au format PDF")
+    # Extraire le texte du PDF
+    text_result = await pdf_text_upload(request, upload, mode, pages=pages)
     
-    # Sauvegarder temporairement le fichier uploadé
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-    temp_file_path = temp_file.name
+    # Préparer les données pour n8n
+    data_for_n8n = {
+        "filename": upload.filename,
+        "file_type": "pdf",
+        "total_pages": text_result.get("total_pages", 0),
+        "extracted_text": text_result["text"]
+    }
     
-    try:
-        # Écrire le contenu du fichier uploadé dans le fichier temporaire
-        content = await file.read()
-        with open(temp_file_path, "wb") as f:
-            f.write(content)
-        
-        # Extraire le texte du PDF
-        text_result = extract_text_from_pdf(temp_file_path)
-        
-        # Vérifier s'il y a eu une erreur
-        if "error" in text_result:
-            raise HTTPException(status_code=500, detail=text_result["error"])
-        
-        # Préparer les données pour n8n
-        data_for_n8n = {
-            "filename": file.filename,
-            "file_type": "pdf",
-            "total_pages": text_result.get("total_pages", 0),
-            "extracted_text": text_result["text"]
-        }
-        
-        # Envoyer à n8n
-        try:
-            n8n_response = requests.post(
-                N8N_WEBHOOK_URL,
-                json=data_for_n8n,
-                headers={"Content-Type": "application/json"}
-            )
-            
-            if n8n_response.status_code != 200:
-                return {
-                    "n8n_status": "error",
-                    "status_code": n8n_response.status_code,
-                    "error": f"Erreur n8n: {n8n_response.text}",
-                    "pdf_text_data": data_for_n8n
-                }
-                
-            return {
-                "n8n_status": "success",
-                "status_code": n8n_response.status_code,
-                "n8n_response": n8n_response.text,
-                "pdf_text_data": data_for_n8n
-            }
-            
-        except Exception as e:
-            return {
-                "n8n_status": "error",
-                "error": f"Erreur de connexion à n8n: {str(e)}",
-                "pdf_text_data": data_for_n8n
-            }
-        
-    finally:
-        # Nettoyer le fichier temporaire
-        temp_file.close()
-        if os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
+    # Déposer dans l'outbox n8n (livraison asynchrone avec reprises)
+    return {
+        **await queue_for_n8n(data_for_n8n, "pdf_text", batch),
+        "pdf_text_data": data_for_n8n
+    }
 
 # NOUVEL ENDPOINT POUR ENVOYER LES PLACEHOLDERS D'UN PDF À N8N
-@app.post("/send-pdf-placeholders-to-n8n/")
-async def send_pdf_placeholders_to_n8n(file: UploadFile = File(...)):
+@app.post("/send-pdf-placeholders-to-n8n/", status_code=202)
+async def send_pdf_placeholders_to_n8n(
+    request: Request,
+    upload: IngestedUpload = Depends(pdf_upload),
+    batch: Optional[bool] = None,
+    mode: str = Depends(pdf_extraction_mode),
+    pages: Optional[tuple] = Depends(pdf_page_range)
+):
     """
     Extrait les placeholders d'un PDF et les envoie à n8n
     """
-    # Vérifier que c'est bien un fichier PDF
-    if not file.filename.lower().endswith(".pdf"):
-        raise HTTPException(status_code=400, detail="Le fichier doit être au format PDF")
-    
-    # Sauvegarder temporairement le fichier uploadé
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-    temp_file_path = temp_file.name
-    
-    try:
-        # Écrire le contenu du fichier uploadé dans le fichier temporaire
-        content = await file.read()
-        with open(temp_file_path, "wb") as f:
-            f.write(content)
-        
-        # Extraire le texte du PDF
-        text_result = extract_text_from_pdf(temp_file_path)
-        
-        # Vérifier s'il y a eu une erreur
-        if "error" in text_result:
-            raise HTTPException(status_code=500, detail=text_result["error"])
-        
-        # Extraire les placeholders du texte
-        import re
-        pattern = r'\{\{([^{}]+)\}\}'
-        matches = re.findall(pattern, text_result["text"])
-        
-        # Nettoyer et dédupliquer tout en préservant l'ordre
-        clean_placeholders = [match.strip() for match in matches]
-        unique_placeholders = []
-        
-        for ph in clean_placeholders:
-            if ph not in unique_placeholders:
-                unique_placeholders.append(ph)
-                
-        # Préparer les données pour n8n
-        data_for_n8n = {
-            "filename": file.filename,
-            "file_type": "pdf",
-            "total_pages": text_result.get("total_pages", 0),
-            "total_found": len(matches),
-            "unique_count": len(unique_placeholders),
-            "placeholders": unique_placeholders
-        }
-        
-        # Envoyer à n8n
-        try:
-            n8n_response = requests.post(
-                N8N_WEBHOOK_URL,
-                json=data_for_n8n,
-                headers={"Content-Type": "application/json"}
-            )
-            
-            if n8n_response.status_code != 200:
-                return {
-                    "n8n_status": "error",
-                    "status_code": n8n_response.status_code,
-                    "error": f"Erreur n8n: {n8n_response.text}",
-                    "placeholders_data": data_for_n8n
-                }
-                
-            return {
-                "n8n_status": "success",
-                "status_code": n8n_response.status_code,
-                "n8n_response": n8n_response.text,
-                "placeholders_data": data_for_n8n
-            }
+    index = await pdf_placeholder_upload(request, upload, mode, pages)
             
-        except Exception as e:
-            return {
-                "n8n_status": "error",
-                "error": f"Erreur de connexion à n8n: {str(e)}",
-                "placeholders_data": data_for_n8n
-            }
-        
-    finally:
-        # Nettoyer le fichier temporaire
-        temp_file.close()
-        if os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
+    # Préparer les données pour n8n
+    data_for_n8n = {
+        "filename": upload.filename,
+        "file_type": "pdf",
+        "total_pages": index["total_pages"],
+        "total_found": index["total_found"],
+        "unique_count": index["unique_count"],
+        "placeholders": index["placeholders"],
+        "occurrences": index["occurrences"]
+    }
+    
+    # Déposer dans l'outbox n8n (livraison asynchrone avec reprises)
+    return {
+        **await queue_for_n8n(data_for_n8n, "pdf_placeholders", batch),
+        "placeholders_data": data_for_n8n
+    }
 
 # ENDPOINT POUR TESTER LA CONNEXION À N8N
 @app.post("/test-n8n-connection/")
@@ -472,11 +950,7 @@ async def test_n8n_connection():
     }
     
     try:
-        n8n_response = requests.post(
-            N8N_WEBHOOK_URL,
-            json=test_data,
-            headers={"Content-Type": "application/json"}
-        )
+        n8n_response = await n8n_dispatcher.post(N8N_WEBHOOK_URL, test_data)
         
         return {
             "n8n_status": "success" if n8n_response.status_code == 200 else "error",
@@ -490,17 +964,248 @@ async def test_n8n_connection():
             "error": str(e)
         }
 
+# ENDPOINT DE MÉTRIQUES (FORMAT PROMETHEUS)
+@app.get("/metrics")
+def metrics():
+    """
+    Expose les compteurs et histogrammes du backend au format texte Prometheus
+    """
+    return Response(registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+# ENDPOINTS D'ADMINISTRATION DU CACHE D'EXTRACTION
+@app.get("/admin/cache/stats", dependencies=[Depends(require_admin)])
+def cache_stats():
+    """
+    Retourne les compteurs hit/miss et l'occupation du cache d'extraction
+    """
+    return extraction_cache.get_stats()
+
+@app.delete("/admin/cache", dependencies=[Depends(require_admin)])
+def purge_cache():
+    """
+    Vide le cache d'extraction (mémoire et disque)
+    """
+    return {
+        "success": True,
+        "purged": extraction_cache.purge()
+    }
+
+# ENDPOINTS DES PROFILS CPU DES REQUÊTES
+@app.get("/admin/profiles", dependencies=[Depends(require_admin)])
+def list_profiles():
+    """
+    Liste les profils enregistrés, du plus récent au plus ancien
+    """
+    return {
+        "enabled": PROFILING_ENABLED,
+        "profiles": profile_store.list()
+    }
+
+@app.get("/admin/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+def download_profile(profile_id: str):
+    """
+    Télécharge un profil au format pstats (pstats, snakeviz)
+    """
+    path = profile_store.path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profil introuvable")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
+
+@app.get("/admin/profiles/{profile_id}/summary", dependencies=[Depends(require_admin)])
+def profile_summary(profile_id: str, sort: str = "cumulative", limit: int = Query(40, ge=1, le=500)):
+    """
+    Résumé texte d'un profil : fonctions les plus coûteuses
+    """
+    if sort not in PROFILE_SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"sort doit valoir l'une de ces valeurs : {', '.join(PROFILE_SORT_KEYS)}")
+    summary = profile_store.summary(profile_id, sort, limit)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Profil introuvable")
+    return PlainTextResponse(summary)
+
+# ENDPOINTS DE SUIVI DES LIVRAISONS N8N
+@app.get("/n8n/outbox")
+def n8n_outbox_status():
+    """
+    État de l'outbox n8n : livraisons par état et coupe-circuits
+    """
+    return n8n_dispatcher.get_status()
+
+@app.get("/n8n/deliveries/{delivery_id}")
+def n8n_delivery_status(delivery_id: str):
+    """
+    État d'une livraison n8n (pending, delivered ou dead)
+    """
+    delivery = outbox_store.get(delivery_id)
+    if delivery is None:
+        raise HTTPException(status_code=404, detail=f"Livraison {delivery_id} introuvable")
+    return delivery
+
+@app.get("/n8n/dead-letters", dependencies=[Depends(require_admin)])
+def n8n_dead_letters(limit: int = Query(100, ge=1, le=1000)):
+    """
+    Liste les livraisons abandonnées après échec définitif
+    """
+    return {"dead_letters": outbox_store.list(DEAD, limit)}
+
+@app.post("/n8n/deliveries/{delivery_id}/retry", dependencies=[Depends(require_admin)])
+async def n8n_retry_delivery(delivery_id: str):
+    """
+    Remet une lettre morte dans la file de livraison
+    """
+    if not await n8n_dispatcher.requeue(delivery_id):
+        raise HTTPException(status_code=404, detail=f"Aucune lettre morte {delivery_id}")
+    return {"success": True, "delivery_id": delivery_id}
+
+# ENDPOINTS DU CATALOGUE DES PLACEHOLDERS
+def resolve_catalogue_template(fingerprint):
+    """
+    Résout une empreinte (ou "latest") en template indexé, sinon HTTP 404
+    """
+    resolved = placeholder_catalogue.resolve(fingerprint)
+    template = placeholder_catalogue.get_template(resolved) if resolved else None
+    if template is None:
+        raise HTTPException(status_code=404, detail=f"Template {fingerprint} absent du catalogue")
+    return template
+
+@app.get("/catalogue/templates")
+def catalogue_templates(limit: int = Query(100, ge=1, le=1000)):
+    """
+    Liste les templates analysés, du plus récent au plus ancien
+    """
+    return {"templates": placeholder_catalogue.list_templates(limit)}
+
+@app.get("/catalogue/templates/{fingerprint}")
+def catalogue_template(fingerprint: str):
+    """
+    Retourne les placeholders d'un template indexé avec leurs emplacements
+    (fingerprint : empreinte SHA-256 du fichier ou "latest")
+    """
+    return resolve_catalogue_template(fingerprint)
+
+@app.get("/catalogue/placeholders/{placeholder}")
+def catalogue_placeholder(placeholder: str):
+    """
+    Liste les templates qui utilisent un placeholder
+    """
+    templates = placeholder_catalogue.find_placeholder(placeholder)
+    return {
+        "placeholder": placeholder,
+        "template_count": len(templates),
+        "templates": templates
+    }
+
+@app.get("/catalogue/diff")
+def catalogue_diff(base: str, target: str = "latest"):
+    """
+    Compare les placeholders de deux templates indexés (target vaut "latest" par défaut)
+    """
+    base_template = resolve_catalogue_template(base)
+    target_template = resolve_catalogue_template(target)
+    diff = placeholder_catalogue.diff_templates(base_template["fingerprint"], target_template["fingerprint"])
+    diff["base_filename"] = base_template["filename"]
+    diff["target_filename"] = target_template["filename"]
+    return diff
+
+# RECHERCHE PLEIN TEXTE DANS LES TEXTES PDF EXTRAITS
+def require_text_index():
+    if not TEXT_INDEX_ENABLED:
+        raise HTTPException(status_code=503, detail="L'index plein texte est désactivé (TEXT_INDEX_ENABLED=0)")
+
+@app.get("/search", dependencies=[Depends(require_text_index)])
+def search_pdf_text(
+    q: str,
+    syntax: str = "simple",
+    document: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=200),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Recherche dans le texte de tous les PDF déjà extraits, page par page
+
+    Les pages trouvées sont classées par pertinence, avec un extrait où les
+    termes sont entourés de <mark>. syntax="simple" exige tous les mots (* en
+    fin de mot pour un préfixe) ; syntax="fts5" accepte la syntaxe FTS5
+    (OR, NOT, NEAR, "expression"). document limite la recherche à un PDF (SHA-256).
+    """
+    if syntax not in SEARCH_SYNTAXES:
+        raise HTTPException(status_code=400, detail=f"syntax doit valoir {' ou '.join(repr(s) for s in SEARCH_SYNTAXES)}")
+    try:
+        hits = text_index.search(q, syntax, limit, offset, document)
+    except InvalidSearchQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    for hit in hits:
+        hit["text_handle"] = make_text_handle(hit["sha256"], hit["extraction_mode"] or "layout")
+    return {
+        "query": q,
+        "offset": offset,
+        "limit": limit,
+        "count": len(hits),
+        "hits": hits
+    }
+
+@app.get("/search/documents", dependencies=[Depends(require_text_index)])
+def search_documents(limit: int = Query(100, ge=1, le=1000)):
+    """
+    Liste les PDF présents dans l'index plein texte, du plus récent au plus ancien
+    """
+    return {"documents": text_index.list_documents(limit)}
+
+@app.delete("/search/documents/{sha256}", dependencies=[Depends(require_admin), Depends(require_text_index)])
+def delete_search_document(sha256: str):
+    """
+    Retire un PDF de l'index plein texte
+    """
+    if not text_index.delete_document(sha256):
+        raise HTTPException(status_code=404, detail=f"Document {sha256} absent de l'index")
+    return {"success": True, "sha256": sha256}
+
 # MODÈLE PYDANTIC POUR LA REQUÊTE DE TRAITEMENT V3
 class ProcessTextForV3Request(BaseModel):
     text: str
     current_data: Optional[Dict[str, str]] = {}
+    fields_wanted: Optional[List[str]] = None
+
+def v3_fields_wanted(fields):
+    """
+    Valide une liste de champs V3 voulus (None : tous les champs)
+
+    Returns:
+        tuple: Champs voulus, ou None
+    """
+    if fields is None:
+        return None
+    unknown = [field for field in fields if field not in V3_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Champs V3 inconnus : {', '.join(unknown)}")
+    return tuple(dict.fromkeys(fields))
+
+# SCHÉMA DU DOCUMENT V3
+@app.get("/v3/schema")
+def v3_schema():
+    """
+    Champs du document V3 (dans l'ordre du document) et champs que les règles savent extraire
+    """
+    return {
+        "fields": list(V3_FIELDS),
+        "total_fields": len(V3_FIELDS),
+        "extracted_fields": list(v3_rule_engine.fields)
+    }
 
 # NOUVEL ENDPOINT POUR TRAITER LE TEXTE ET EXTRAIRE LES DONNÉES V3
 @app.post("/process-text-for-v3/")
 async def process_text_for_v3(request: ProcessTextForV3Request):
     """
     Traite le texte extrait d'un PDF pour en extraire des données structurées pour le document V3
+
+    Avec fields_wanted (ex. le missing_fields de la réponse précédente), seules
+    les règles de ces champs sont évaluées et seuls ces champs sont mis à jour.
+    Sans fields_wanted, les anciennes clés (adresse_chantier, code_postal, ville,
+    maitre_ouvrage, reference_projet, type_batiment) sont aussi renvoyées.
+    La réponse donne le taux de complétion et les champs encore vides.
     """
+    wanted = v3_fields_wanted(request.fields_wanted)
     try:
         text = request.text
         current_data = request.current_data or {}
@@ -511,64 +1216,559 @@ async def process_text_for_v3(request: ProcessTextForV3Request):
                 "error": "Aucun texte fourni pour le traitement"
             }
         
-        # Dictionnaire pour stocker les données extraites
-        extracted_data = {}
-        
-        # Logique d'extraction simple pour les champs courants
-        # Ces règles d'extraction peuvent être améliorées selon les besoins
-        
-        # Analyse des coordonnées du chantier
-        if "Adresse" in text:
-            # Recherche de l'adresse après le mot "Adresse"
-            import re
-            address_match = re.search(r'Adresse[:\s]*([^\n]+)', text)
-            if address_match:
-                extracted_data["adresse_chantier"] = address_match.group(1).strip()
-        
-        # Analyse du code postal
-        postal_code_match = re.search(r'\b(\d{5})\b', text)
-        if postal_code_match:
-            extracted_data["code_postal"] = postal_code_match.group(1)
-        
-        # Analyse de la ville
-        if "Ville" in text:
-            city_match = re.search(r'Ville[:\s]*([^\n]+)', text)
-            if city_match:
-                extracted_data["ville"] = city_match.group(1).strip()
-        
-        # Analyse du maître d'ouvrage
-        if "Maître d'ouvrage" in text or "Maitre d'ouvrage" in text:
-            mo_match = re.search(r'Ma[îi]tre d\'ouvrage[:\s]*([^\n]+)', text)
-            if mo_match:
-                extracted_data["maitre_ouvrage"] = mo_match.group(1).strip()
-        
-        # Analyse de la référence du projet
-        if "Référence" in text:
-            ref_match = re.search(r'Référence[:\s]*([^\n]+)', text)
-            if ref_match:
-                extracted_data["reference_projet"] = ref_match.group(1).strip()
-        
-        # Analyse du type de bâtiment
-        batiment_types = ["Immeuble", "Maison", "Bureau", "Entrepôt", "Usine", "Commercial"]
-        for bt in batiment_types:
-            if bt in text:
-                extracted_data["type_batiment"] = bt
-                break
+        # Extraire les champs V3 (voulus) en un seul passage sur le texte, hors de la boucle d'événements
+        extracted_data = await parse_in_executor(extract_v3_fields, text, wanted, wanted is None, size=len(text))
         
         # Fusionner avec les données actuelles (les nouvelles données ont priorité)
         merged_data = {**current_data, **extracted_data}
         
         return {
             "success": True,
-            "data": merged_data
+            "data": merged_data,
+            "completion": v3_completion(merged_data)
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         return {
             "success": False,
             "error": f"Erreur lors du traitement du texte pour V3: {str(e)}"
         }
 
+# MODÈLES PYDANTIC POUR LE TRAITEMENT V3 PAR LOT
+class V3BatchText(BaseModel):
+    text: str
+    source: Optional[str] = None
+    priority: int = 0
+
+class ProcessTextsForV3BatchRequest(BaseModel):
+    texts: List[V3BatchText]
+    current_data: Optional[Dict[str, str]] = {}
+    policy: str = "last"
+    overwrite_current: bool = True
+    fields_wanted: Optional[List[str]] = None
+
+# ENDPOINT POUR TRAITER PLUSIEURS TEXTES V3 EN UNE REQUÊTE
+@app.post("/process-texts-for-v3/batch")
+async def process_texts_for_v3_batch(request: Request, batch: ProcessTextsForV3BatchRequest):
+    """
+    Traite plusieurs textes en parallèle et fusionne les données V3 extraites
+
+    Les conflits sont résolus par priorité puis selon la politique ("last" :
+    le dernier texte l'emporte, comme des appels successifs ; "first" : le
+    premier). La provenance indique quel texte a fourni chaque valeur.
+    fields_wanted limite l'extraction aux champs listés, comme pour /process-text-for-v3/.
+    """
+    wanted = v3_fields_wanted(batch.fields_wanted)
+    if not batch.texts:
+        return {
+            "success": False,
+            "error": "Aucun texte fourni pour le traitement"
+        }
+    if batch.policy not in MERGE_POLICIES:
+        raise HTTPException(status_code=400, detail=f"Politique inconnue : {batch.policy} ({', '.join(MERGE_POLICIES)})")
+    
+    sources = [item.source or f"text_{index}" for index, item in enumerate(batch.texts)]
+    if len(set(sources)) != len(sources):
+        raise HTTPException(status_code=400, detail="Les sources des textes doivent être uniques")
+    
+    # Extraire les champs de tous les textes en parallèle
+    extracted = await asyncio.gather(*[
+        parse_in_executor(extract_v3_fields, item.text, wanted, size=len(item.text), request=request)
+        for item in batch.texts
+    ])
+    
+    results = [
+        {"source": source, "priority": item.priority, "fields": fields}
+        for source, item, fields in zip(sources, batch.texts, extracted)
+    ]
+    merged_data, provenance, conflicts = merge_v3_results(
+        batch.current_data or {}, results, batch.policy, batch.overwrite_current
+    )
+    
+    return {
+        "success": True,
+        "data": merged_data,
+        "provenance": provenance,
+        "conflicts": conflicts,
+        "completion": v3_completion(merged_data),
+        "texts": [
+            {"source": result["source"], "fields_found": len(result["fields"])}
+            for result in results
+        ]
+    }
+
+# PIPELINE PDF -> V3 EN UNE REQUÊTE
+@app.post("/process-pdf-for-v3/")
+async def process_pdf_for_v3(
+    request: Request,
+    upload: IngestedUpload = Depends(pdf_upload),
+    current_data: Optional[str] = Form(None),
+    return_text_handle: bool = True,
+    mode: str = Depends(pdf_extraction_mode),
+    pages: Optional[tuple] = Depends(pdf_page_range),
+    stop_when_found: bool = False,
+    fields: Optional[str] = None,
+    page_budget: Optional[int] = Query(None, ge=1)
+):
+    """
+    Extrait le texte d'un PDF et les données V3 côté serveur, sans renvoyer le texte
+
+    current_data (champ de formulaire, JSON) est fusionné avec les champs extraits,
+    qui ont priorité. Le text_handle permet de récupérer le texte plus tard via
+    GET /pdf-text/{text_handle} tant qu'il est dans le cache d'extraction.
+
+    Avec stop_when_found, les pages sont analysées une à une et l'extraction
+    s'arrête dès que tous les champs de fields (liste séparée par des virgules,
+    V3_GOAL_FIELDS par défaut) ont une valeur, ou après page_budget pages.
+    """
+    try:
+        base_data = json.loads(current_data) if current_data else {}
+    except ValueError:
+        raise HTTPException(status_code=400, detail="current_data doit être un objet JSON")
+    if not isinstance(base_data, dict):
+        raise HTTPException(status_code=400, detail="current_data doit être un objet JSON")
+
+    goal = None
+    if stop_when_found:
+        wanted = [field.strip() for field in fields.split(",") if field.strip()] if fields else list(V3_GOAL_FIELDS)
+        unknown = [field for field in wanted if field not in v3_rule_engine.fields]
+        if unknown or not wanted:
+            raise HTTPException(status_code=400, detail=f"Champs V3 inconnus ou non extraits : {', '.join(unknown) or '(aucun)'}")
+        goal = (wanted, page_budget or PDF_V3_PAGE_BUDGET)
+    
+    return await pdf_upload_to_v3(request, upload, base_data, return_text_handle, mode, pages, goal)
+
+async def pdf_upload_to_v3(request, upload, base_data, return_text_handle=True, mode="layout", pages=None, goal=None):
+    """
+    Pipeline PDF -> V3 d'un fichier ingéré (partagé par /process-pdf-for-v3/ et /bulk-extract/)
+
+    Avec pages, seule la plage (première page, dernière page ou None) est analysée.
+    Avec goal (champs voulus, budget de pages), l'extraction s'arrête dès que
+    les champs voulus sont trouvés. Le texte d'une extraction partielle n'est
+    pas mis en cache : elle ne retourne pas de text_handle.
+    """
+    cache_key = make_cache_key(upload.sha256, "pdf_text", pdf_text_version(mode)) if CACHE_ENABLED else None
+    cached = await extraction_cache.get_async(cache_key) if cache_key is not None else None
+    partial = pages is not None or goal is not None
+    extra = {}
+    
+    if cached is not None:
+        # Texte déjà extrait : seule la recherche des champs V3 reste à faire
+        if pages is not None:
+            cached = slice_page_text_result(cached, mode, pages)
+        else:
+            await index_pdf_text(upload, cached)
+        total_pages = cached["total_pages"]
+        # Avec un objectif, seuls les champs voulus sont cherchés, comme sans cache
+        wanted = goal[0] if goal is not None else None
+        fields = await parse_in_executor(extract_v3_fields, cached["text"], wanted, size=len(cached["text"]), request=request)
+        if goal is not None:
+            extra["stop_reason"] = "cached"
+    elif goal is not None:
+        wanted, page_budget = goal
+        try:
+            part = await parse_in_executor(
+                extract_pdf_v3_until_found, upload.source, wanted, page_budget, mode, pages,
+                size=upload.size, request=request
+            )
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Erreur lors de l'extraction du texte: {str(e)}")
+        total_pages = len(part["pages"])
+        fields = part["v3_fields"]
+        extra["stop_reason"] = part["stop_reason"]
+    else:
+        result = await extract_pdf_v3_parallel(upload.source, size=upload.size, request=request, mode=mode, pages=pages)
+        if "error" in result:
+            raise HTTPException(status_code=500, detail=result["error"])
+        
+        total_pages = result["total_pages"]
+        fields = result["v3_fields"]
+        text_result = {
+            "success": True,
+            "total_pages": total_pages,
+            "text": result["text"],
+            "extraction_mode": result["extraction_mode"]
+        }
+        if cache_key is not None and pages is None:
+            await extraction_cache.put_async(cache_key, text_result)
+        if pages is None:
+            await index_pdf_text(upload, text_result)
+
+    if goal is not None:
+        extra["missing_fields"] = [field for field in goal[0] if field not in fields]
+    
+    data = {**base_data, **fields}
+    return {
+        "success": True,
+        "filename": upload.filename,
+        "total_pages": total_pages,
+        "fields_found": len(fields),
+        "data": data,
+        "completion": v3_completion(data),
+        "text_handle": make_text_handle(upload.sha256, mode) if cache_key is not None and return_text_handle and not partial else None,
+        **extra
+    }
+
+# ENVOI GROUPÉ : PLUSIEURS FICHIERS OU UNE ARCHIVE ZIP
+async def process_bulk_item(request, item, pdf_pipeline, mode="layout"):
+    """
+    Traite un fichier d'un envoi groupé et retourne son événement de résultat
+
+    Une erreur ne concerne que ce fichier : elle est renvoyée dans l'événement.
+    """
+    start = time.perf_counter()
+    event = {"type": "file", "index": item.index, "filename": item.filename, "kind": item.kind}
+
+    if item.error is not None:
+        return {**event, "status": "error", "status_code": 400, "error": item.error}
+    if item.kind is None:
+        return {**event, "status": "skipped", "error": "Type de fichier non pris en charge (PDF, DOCX ou ZIP)"}
+
+    upload = None
+    try:
+        upload = await asyncio.to_thread(item.ingest)
+        if item.kind == "docx":
+            analysis = await analyze_template_upload(request, upload)
+            result = build_template_views(analysis, ["basic"])["basic"]
+        elif pdf_pipeline == "v3":
+            result = await pdf_upload_to_v3(request, upload, {}, mode=mode)
+        else:
+            result = await pdf_text_upload(request, upload, mode)
+        event.update(status="success", result=result)
+    except HTTPException as e:
+        event.update(status="error", status_code=e.status_code, error=e.detail)
+    except UploadTooLargeError as e:
+        event.update(status="error", status_code=413, error=str(e))
+    except Exception as e:
+        event.update(status="error", status_code=500, error=f"Erreur lors du traitement du fichier: {str(e)}")
+    finally:
+        # Les entrées d'archive sont libérées dès leur traitement terminé
+        if upload is not None and item.from_archive:
+            upload.close()
+
+    event["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return event
+
+async def stream_bulk_results(request, items, pdf_pipeline, stream_format, resources, mode="layout"):
+    """
+    Traite les fichiers d'un envoi groupé (BULK_CONCURRENCY à la fois) et
+    renvoie chaque résultat dès qu'il est prêt, dans l'ordre d'achèvement
+
+    Événements : "start" (nombre de fichiers), "file" (un par fichier), "done" (bilan).
+    Les uploads et archives de resources sont libérés à la fin du flux.
+    """
+    encode = functools.partial(encode_stream_event, stream_format=stream_format)
+    semaphore = asyncio.Semaphore(BULK_CONCURRENCY)
+    results = asyncio.Queue()
+
+    async def run(item):
+        async with semaphore:
+            results.put_nowait(await process_bulk_item(request, item, pdf_pipeline, mode))
+
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(run(item)) for item in items]
+    try:
+        yield encode({"type": "start", "total_files": len(items), "concurrency": BULK_CONCURRENCY})
+
+        counts = {"success": 0, "error": 0, "skipped": 0}
+        for _ in items:
+            event = await results.get()
+            counts[event["status"]] += 1
+            yield encode(event)
+
+        yield encode({
+            "type": "done",
+            "total_files": len(items),
+            "succeeded": counts["success"],
+            "failed": counts["error"],
+            "skipped": counts["skipped"],
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1)
+        })
+
+    finally:
+        # Client déconnecté : abandonner les fichiers restants avant de libérer les uploads
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for resource in resources:
+            resource.close()
+
+@app.post("/bulk-extract/")
+async def bulk_extract(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    pdf_pipeline: str = "v3",
+    stream_format: str = Query("ndjson", alias="format"),
+    mode: str = Depends(pdf_extraction_mode)
+):
+    """
+    Traite plusieurs fichiers (liste multipart et/ou archives ZIP) en un envoi
+
+    Chaque fichier est orienté selon son type : DOCX -> placeholders, PDF ->
+    données V3 (pdf_pipeline=v3) ou texte (pdf_pipeline=text). Les fichiers
+    sont traités en parallèle et les résultats renvoyés au fil de l'eau
+    (NDJSON par défaut, ou Server-Sent Events avec format=sse).
+    """
+    if pdf_pipeline not in BULK_PDF_PIPELINES:
+        raise HTTPException(status_code=400, detail=f"pdf_pipeline doit valoir l'une de ces valeurs : {', '.join(BULK_PDF_PIPELINES)}")
+    if stream_format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="Le format doit être 'ndjson' ou 'sse'")
+
+    # Les fichiers du formulaire sont fermés dès le retour du handler :
+    # ils sont ingérés maintenant, les entrées d'archive seulement listées
+    items = []
+    resources = []
+    try:
+        for file in files:
+            kind = file_kind(file.filename)
+            if kind is None:
+                items.append(BulkItem(len(items), file.filename, None))
+                continue
+
+            try:
+                upload = await ingest_upload(file, suffix="." + kind)
+            except UploadTooLargeError as e:
+                items.append(BulkItem(len(items), file.filename, kind, error=str(e)))
+                continue
+            resources.append(upload)
+
+            if kind != "zip":
+                items.append(BulkItem(len(items), file.filename, kind, upload=upload))
+                continue
+
+            fp = upload.open()
+            resources.append(fp)
+            try:
+                archive, entries = await asyncio.to_thread(open_archive, fp, file.filename, len(items))
+            except zipfile.BadZipFile:
+                items.append(BulkItem(len(items), file.filename, kind, error="Archive ZIP invalide"))
+                continue
+            resources.append(archive)
+            items.extend(entries)
+
+        if len(items) > BULK_MAX_FILES:
+            raise HTTPException(status_code=413, detail=f"Un envoi groupé est limité à {BULK_MAX_FILES} fichiers")
+
+    except BaseException:
+        for resource in reversed(resources):
+            resource.close()
+        raise
+
+    return StreamingResponse(
+        stream_bulk_results(request, items, pdf_pipeline, stream_format, list(reversed(resources)), mode),
+        media_type="text/event-stream" if stream_format == "sse" else "application/x-ndjson"
+    )
+
+# JOBS D'EXTRACTION ASYNCHRONES (GROS PDF)
+async def run_pdf_text_job(job, upload, mode="layout", pages=None):
+    """
+    Job /jobs/extract-pdf-text/ : texte du PDF, en passant par le cache d'extraction
+    """
+    cached = None
+    if CACHE_ENABLED:
+        # Une plage de pages peut être tirée du texte complet déjà extrait
+        cached = await extraction_cache.get_async(make_cache_key(upload.sha256, "pdf_text", pdf_text_version(mode)))
+        if cached is not None and pages is not None:
+            cached = slice_page_text_result(cached, mode, pages)
+        elif pages is not None:
+            cached = await extraction_cache.get_async(make_cache_key(upload.sha256, "pdf_text", pdf_text_fingerprint(mode, pages)))
+    if cached is None:
+        cached = await extract_pdf_with_progress(upload.source, upload.size, job.set_progress, mode=mode, pages=pages)
+        if CACHE_ENABLED:
+            await extraction_cache.put_async(make_cache_key(upload.sha256, "pdf_text", pdf_text_fingerprint(mode, pages)), cached)
+    else:
+        job.set_progress(cached["total_pages"], cached["total_pages"])
+    if pages is None:
+        await index_pdf_text(upload, cached)
+    return cached
+
+async def run_pdf_v3_job(job, upload, base_data, mode="layout", pages=None):
+    """
+    Job /jobs/process-pdf-for-v3/ : données V3 du PDF (même résultat que /process-pdf-for-v3/)
+    """
+    cache_key = make_cache_key(upload.sha256, "pdf_text", pdf_text_version(mode)) if CACHE_ENABLED else None
+    cached = await extraction_cache.get_async(cache_key) if cache_key is not None else None
+    if cached is not None:
+        if pages is not None:
+            cached = slice_page_text_result(cached, mode, pages)
+        else:
+            await index_pdf_text(upload, cached)
+        total_pages = cached["total_pages"]
+        fields = await parse_in_executor(extract_v3_fields, cached["text"], size=len(cached["text"]))
+        job.set_progress(total_pages, total_pages)
+    else:
+        result = await extract_pdf_with_progress(upload.source, upload.size, job.set_progress, with_v3=True, mode=mode, pages=pages)
+        total_pages = result["total_pages"]
+        fields = result["v3_fields"]
+        text_result = {
+            "success": True,
+            "total_pages": total_pages,
+            "text": result["text"],
+            "extraction_mode": result["extraction_mode"]
+        }
+        if cache_key is not None and pages is None:
+            await extraction_cache.put_async(cache_key, text_result)
+        if pages is None:
+            await index_pdf_text(upload, text_result)
+
+    data = {**base_data, **fields}
+    return {
+        "success": True,
+        "filename": upload.filename,
+        "total_pages": total_pages,
+        "fields_found": len(fields),
+        "data": data,
+        "completion": v3_completion(data),
+        "text_handle": make_text_handle(upload.sha256, mode) if cache_key is not None and pages is None else None
+    }
+
+def submit_job(kind, upload, runner):
+    """
+    Met un job en file et construit la réponse 202 (429 avec Retry-After si la file est pleine)
+    """
+    try:
+        job = job_manager.submit(kind, upload.filename, runner, upload)
+    except JobQueueFullError as e:
+        upload.close()
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+    status_url = f"/jobs/{job.id}"
+    return JSONResponse(
+        status_code=202,
+        headers={"Location": status_url},
+        content={
+            **job.to_dict(),
+            "status_url": status_url,
+            "events_url": f"{status_url}/events",
+            "result_url": f"{status_url}/result"
+        }
+    )
+
+@app.post("/jobs/extract-pdf-text/", status_code=202)
+async def submit_pdf_text_job(
+    file: UploadFile = File(...),
+    mode: str = Depends(pdf_extraction_mode),
+    pages: Optional[tuple] = Depends(pdf_page_range)
+):
+    """
+    Lance l'extraction du texte d'un PDF en arrière-plan et retourne aussitôt l'identifiant du job
+    """
+    upload = await receive_owned_pdf(file)
+    return submit_job("pdf_text", upload, functools.partial(run_pdf_text_job, mode=mode, pages=pages))
+
+@app.post("/jobs/process-pdf-for-v3/", status_code=202)
+async def submit_pdf_v3_job(
+    file: UploadFile = File(...),
+    current_data: Optional[str] = Form(None),
+    mode: str = Depends(pdf_extraction_mode),
+    pages: Optional[tuple] = Depends(pdf_page_range)
+):
+    """
+    Lance en arrière-plan l'extraction des données V3 d'un PDF (voir /process-pdf-for-v3/)
+    """
+    try:
+        base_data = json.loads(current_data) if current_data else {}
+    except ValueError:
+        raise HTTPException(status_code=400, detail="current_data doit être un objet JSON")
+    if not isinstance(base_data, dict):
+        raise HTTPException(status_code=400, detail="current_data doit être un objet JSON")
+
+    upload = await receive_owned_pdf(file)
+    return submit_job("pdf_v3", upload, functools.partial(run_pdf_v3_job, base_data=base_data, mode=mode, pages=pages))
+
+def get_job_or_404(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job introuvable ou expiré")
+    return job
+
+@app.get("/jobs")
+def jobs_status():
+    """
+    État de la file des jobs d'extraction
+    """
+    return job_manager.get_status()
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    """
+    État et progression d'un job (pages traitées / total)
+    """
+    return get_job_or_404(job_id).to_dict()
+
+@app.get("/jobs/{job_id}/result")
+def job_result(job_id: str):
+    """
+    Résultat d'un job terminé (409 tant qu'il est en file ou en cours)
+    """
+    job = get_job_or_404(job_id)
+    if job.status not in FINISHED_STATES:
+        raise HTTPException(status_code=409, detail=f"Le job n'est pas terminé ({job.status})")
+    if job.status != SUCCEEDED:
+        raise HTTPException(status_code=job.error_status or 410, detail=job.error)
+    return job.result
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    """
+    Annule un job en file ou en cours
+    """
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job introuvable ou expiré")
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """
+    Progression d'un job en Server-Sent Events : un événement "progress" à
+    chaque changement, puis un événement final "succeeded", "failed" ou "cancelled"
+    """
+    job = get_job_or_404(job_id)
+
+    async def events():
+        while True:
+            changed = job.changed_event()
+            snapshot = job.to_dict()
+            if snapshot["status"] in FINISHED_STATES:
+                yield encode_stream_event({**snapshot, "type": snapshot["status"]}, "sse")
+                return
+            yield encode_stream_event({**snapshot, "type": "progress"}, "sse")
+            # Réveil périodique pour détecter la déconnexion du client
+            while not changed.is_set():
+                if await request.is_disconnected():
+                    return
+                try:
+                    await asyncio.wait_for(changed.wait(), 15)
+                except asyncio.TimeoutError:
+                    pass
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@app.get("/pdf-text/{text_handle}")
+def get_pdf_text(text_handle: str, response_format: str = Query("json", alias="format")):
+    """
+    Retourne le texte d'un PDF déjà traité, à partir de son text_handle
+    (texte brut avec format=text)
+    """
+    if response_format not in ("json", "text"):
+        raise HTTPException(status_code=400, detail="Le format doit être 'json' ou 'text'")
+    # Handle "<sha256>" (mode layout) ou "<sha256>.<mode>"
+    sha256, _, mode = text_handle.partition(".")
+    mode = mode or "layout"
+    cached = None
+    if CACHE_ENABLED and mode in pdf_extraction_modes():
+        cached = extraction_cache.get(make_cache_key(sha256, "pdf_text", pdf_text_version(mode)))
+    if cached is None:
+        raise HTTPException(status_code=404, detail="Texte introuvable (handle invalide ou expiré du cache)")
+    if response_format == "text":
+        return PlainTextResponse(cached["text"], headers=text_result_headers(cached))
+    return FastJSONResponse(cached)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
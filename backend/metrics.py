@@ -0,0 +1,297 @@
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Bornes des histogrammes de latence (en secondes)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Type MIME du format texte Prometheus
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{_escape(value)}"' for name, value in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    Compteur monotone, éventuellement étiqueté
+    """
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, value=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield self.name + _format_labels(self.labelnames, key), value
+
+    def drain(self):
+        with self._lock:
+            values, self._values = self._values, {}
+        return values
+
+    def merge(self, values):
+        with self._lock:
+            for key, value in values.items():
+                self._values[key] = self._values.get(key, 0) + value
+
+
+class Histogram:
+    """
+    Histogramme à bornes fixes : seuls les compteurs par intervalle sont gardés
+    """
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self):
+        with self._lock:
+            values = {key: [list(entry[0]), entry[1], entry[2]] for key, entry in self._values.items()}
+        for key, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                yield self.name + "_bucket" + _format_labels(self.labelnames, key, [("le", _format_value(bound))]), cumulative
+            yield self.name + "_sum" + _format_labels(self.labelnames, key), total
+            yield self.name + "_count" + _format_labels(self.labelnames, key), count
+
+    def drain(self):
+        with self._lock:
+            values, self._values = self._values, {}
+        return values
+
+    def merge(self, values):
+        with self._lock:
+            for key, (counts, total, count) in values.items():
+                entry = self._values.get(key)
+                if entry is None:
+                    entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                for index, bucket_count in enumerate(counts):
+                    entry[0][index] += bucket_count
+                entry[1] += total
+                entry[2] += count
+
+
+class Collector:
+    """
+    Métrique calculée uniquement au moment du scrape, à partir d'un état existant
+
+    La fonction retourne un nombre (sans étiquettes) ou un dict
+    {valeurs des étiquettes (tuple): nombre}.
+    """
+
+    def __init__(self, name, documentation, kind, func, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.func = func
+
+    def samples(self):
+        values = self.func()
+        if not isinstance(values, dict):
+            values = {(): values}
+        for key, value in sorted(values.items()):
+            yield self.name + _format_labels(self.labelnames, key), value
+
+
+class MetricsRegistry:
+    """
+    Registre des métriques du backend, exposé au format texte Prometheus
+
+    Enregistrer une mesure coûte un verrou et une mise à jour de dict ;
+    le texte n'est produit qu'au scrape.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def collector(self, name, documentation, kind, func, labelnames=()):
+        return self.register(Collector(name, documentation, kind, func, labelnames))
+
+    def render(self):
+        """
+        Produit le texte d'exposition Prometheus de toutes les métriques
+        """
+        lines = []
+        for metric in list(self._metrics):
+            try:
+                samples = list(metric.samples())
+            except Exception:
+                # Un collecteur en erreur ne doit pas empêcher le scrape des autres
+                logger.exception("Erreur de la métrique %s", metric.name)
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{name} {_format_value(value)}" for name, value in samples)
+        return "\n".join(lines) + "\n"
+
+    def drain(self):
+        """
+        Retourne et remet à zéro les mesures locales (compteurs et histogrammes)
+        """
+        return {metric.name: metric.drain() for metric in self._metrics if hasattr(metric, "drain")}
+
+    def merge(self, snapshot):
+        """
+        Ajoute des mesures retournées par drain() dans un autre processus
+        """
+        by_name = {metric.name: metric for metric in self._metrics}
+        for name, values in snapshot.items():
+            if values and name in by_name:
+                by_name[name].merge(values)
+
+
+# Registre partagé par tous les modules
+registry = MetricsRegistry()
+
+REQUESTS = registry.counter(
+    "raedificare_http_requests_total", "Requêtes HTTP traitées", ("method", "path", "status")
+)
+REQUEST_LATENCY = registry.histogram(
+    "raedificare_http_request_duration_seconds", "Durée des requêtes HTTP", ("method", "path")
+)
+STAGE_LATENCY = registry.histogram(
+    "raedificare_stage_duration_seconds", "Durée des étapes internes de l'extraction", ("stage",)
+)
+BYTES_INGESTED = registry.counter(
+    "raedificare_ingested_bytes_total", "Octets uploadés et ingérés", ("kind",)
+)
+PAGES_PARSED = registry.counter(
+    "raedificare_pdf_pages_parsed_total", "Pages PDF analysées par pdfminer"
+)
+PLACEHOLDERS_FOUND = registry.counter(
+    "raedificare_placeholders_found_total", "Occurrences de placeholders trouvées", ("source",)
+)
+N8N_DELIVERIES = registry.counter(
+    "raedificare_n8n_deliveries_total", "Résultats des tentatives de livraison à n8n", ("outcome",)
+)
+
+
+def observe_stage(stage, seconds):
+    STAGE_LATENCY.observe(seconds, stage=stage)
+
+
+@contextmanager
+def stage_timer(stage):
+    """
+    Mesure la durée d'une étape interne (bloc with)
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.observe(time.perf_counter() - start, stage=stage)
+
+
+def run_with_metrics(func, *args):
+    """
+    Exécute un job dans un worker du pool de processus et retourne ses mesures
+
+    Les métriques d'un worker vivent dans son propre processus : elles sont
+    renvoyées avec le résultat puis fusionnées dans le registre du serveur.
+
+    Returns:
+        tuple: (résultat de func, mesures du job)
+    """
+    registry.drain()
+    result = func(*args)
+    return result, registry.drain()
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI : nombre et durée des requêtes par endpoint
+
+    Le chemin est celui de la route (ex. /n8n/deliveries/{delivery_id}) pour
+    garder un nombre de séries borné.
+    """
+
+    def __init__(self, app, routes):
+        self.app = app
+        self.routes = routes
+        self._paths = {}
+
+    def _route_path(self, endpoint):
+        if endpoint is None:
+            return "unmatched"
+        if endpoint not in self._paths:
+            self._paths = {route.endpoint: route.path for route in self.routes if hasattr(route, "endpoint")}
+        return self._paths.get(endpoint, "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            path = self._route_path(scope.get("endpoint"))
+            REQUESTS.inc(method=scope["method"], path=path, status=status[0])
+            REQUEST_LATENCY.observe(time.perf_counter() - start, method=scope["method"], path=path)
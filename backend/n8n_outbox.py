@@ -0,0 +1,668 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+import httpx
+
+from metrics import N8N_DELIVERIES, observe_stage
+
+logger = logging.getLogger(__name__)
+
+# Configuration de l'outbox n8n (surchargée par variables d'environnement)
+OUTBOX_DB = os.environ.get("OUTBOX_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "outbox.db"))
+N8N_TIMEOUT = float(os.environ.get("N8N_TIMEOUT", 30))
+N8N_MAX_CONNECTIONS = int(os.environ.get("N8N_MAX_CONNECTIONS", 10))
+N8N_DISPATCH_CONCURRENCY = int(os.environ.get("N8N_DISPATCH_CONCURRENCY", 4))
+N8N_MAX_ATTEMPTS = int(os.environ.get("N8N_MAX_ATTEMPTS", 8))
+N8N_BACKOFF_BASE = float(os.environ.get("N8N_BACKOFF_BASE", 2.0))
+N8N_BACKOFF_MAX = float(os.environ.get("N8N_BACKOFF_MAX", 300))
+N8N_BREAKER_THRESHOLD = int(os.environ.get("N8N_BREAKER_THRESHOLD", 5))
+N8N_BREAKER_COOLDOWN = float(os.environ.get("N8N_BREAKER_COOLDOWN", 60))
+N8N_DELIVERED_RETENTION_DAYS = float(os.environ.get("N8N_DELIVERED_RETENTION_DAYS", 7))
+
+# Regroupement des payloads destinés au même webhook (mode batch)
+N8N_BATCH_ENABLED = os.environ.get("N8N_BATCH_ENABLED", "0") == "1"
+N8N_BATCH_WINDOW = float(os.environ.get("N8N_BATCH_WINDOW", 2.0))
+N8N_BATCH_MAX_ITEMS = int(os.environ.get("N8N_BATCH_MAX_ITEMS", 50))
+N8N_BATCH_MAX_BYTES = int(os.environ.get("N8N_BATCH_MAX_BYTES", 8 * 1024 * 1024))
+N8N_BATCH_GZIP = os.environ.get("N8N_BATCH_GZIP", "1") != "0"
+
+# Intervalle maximal entre deux passages du dispatcher (secondes)
+DISPATCH_POLL_INTERVAL = 1.0
+
+# Intervalle entre deux purges des livraisons réussies anciennes (secondes)
+RETENTION_PURGE_INTERVAL = 3600
+
+# Taille maximale de la réponse n8n conservée pour chaque livraison
+RESPONSE_MAX_CHARS = 2000
+
+# États d'une livraison
+PENDING = "pending"
+DELIVERED = "delivered"
+DEAD = "dead"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS deliveries (
+    id TEXT PRIMARY KEY,
+    kind TEXT,
+    url TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    delivered_at REAL,
+    last_status_code INTEGER,
+    last_error TEXT,
+    response TEXT,
+    batch INTEGER NOT NULL DEFAULT 0,
+    payload_bytes INTEGER NOT NULL DEFAULT 0,
+    batch_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_deliveries_due ON deliveries(status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS idx_deliveries_delivered ON deliveries(status, delivered_at);
+"""
+
+# Colonnes ajoutées après la création initiale de la table
+MIGRATIONS = {
+    "batch": "ALTER TABLE deliveries ADD COLUMN batch INTEGER NOT NULL DEFAULT 0",
+    "payload_bytes": "ALTER TABLE deliveries ADD COLUMN payload_bytes INTEGER NOT NULL DEFAULT 0",
+    "batch_id": "ALTER TABLE deliveries ADD COLUMN batch_id TEXT",
+}
+
+
+def _iso(timestamp):
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+def backoff_delay(attempts):
+    """
+    Délai avant la prochaine tentative : exponentiel, plafonné, avec gigue
+    """
+    delay = min(N8N_BACKOFF_MAX, N8N_BACKOFF_BASE * (2 ** (attempts - 1)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def is_retryable(status_code):
+    """
+    Les erreurs serveur, 408 et 429 sont temporaires ; les autres erreurs 4xx ne le sont pas
+    """
+    return status_code >= 500 or status_code in (408, 429)
+
+
+class OutboxStore:
+    """
+    Stockage durable (SQLite) des payloads à livrer à n8n
+
+    Les livraisons en échec définitif restent dans la table avec l'état
+    "dead" : c'est la file des lettres mortes, rejouable à la demande.
+    Le payload d'une livraison réussie est effacé dès la livraison, et la
+    ligne elle-même est purgée après N8N_DELIVERED_RETENTION_DAYS jours.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._initialized = False
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if not self._initialized:
+            with self._lock:
+                if not self._initialized:
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                    with sqlite3.connect(self.path) as conn:
+                        conn.execute("PRAGMA journal_mode=WAL")
+                        conn.executescript(SCHEMA)
+                        columns = {row[1] for row in conn.execute("PRAGMA table_info(deliveries)")}
+                        for column, sql in MIGRATIONS.items():
+                            if column not in columns:
+                                conn.execute(sql)
+                    self._initialized = True
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _execute(self, sql, params=()):
+        conn = self._connect()
+        try:
+            with conn:
+                return conn.execute(sql, params).rowcount
+        finally:
+            conn.close()
+
+    def _query(self, sql, params=()):
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def enqueue(self, url, payload, kind=None, batch=False):
+        """
+        Enregistre un payload à livrer et retourne l'identifiant de la livraison
+
+        En mode batch, la livraison attend la fin de la fenêtre de regroupement,
+        sauf si les payloads en attente pour ce webhook atteignent déjà la taille
+        maximale d'un batch : tout le groupe devient alors livrable immédiatement.
+        """
+        delivery_id = uuid.uuid4().hex
+        payload_text = json.dumps(payload, ensure_ascii=False)
+        payload_bytes = len(payload_text.encode("utf-8"))
+        now = time.time()
+
+        conn = self._connect()
+        try:
+            with conn:
+                next_attempt_at = now
+                if batch:
+                    pending = conn.execute(
+                        "SELECT COUNT(*), COALESCE(SUM(payload_bytes), 0) FROM deliveries "
+                        "WHERE url = ? AND status = ? AND batch = 1",
+                        (url, PENDING)
+                    ).fetchone()
+                    if pending[0] + 1 >= N8N_BATCH_MAX_ITEMS or pending[1] + payload_bytes >= N8N_BATCH_MAX_BYTES:
+                        conn.execute(
+                            "UPDATE deliveries SET next_attempt_at = ? "
+                            "WHERE url = ? AND status = ? AND batch = 1 AND next_attempt_at > ?",
+                            (now, url, PENDING, now)
+                        )
+                    else:
+                        next_attempt_at = now + N8N_BATCH_WINDOW
+
+                conn.execute(
+                    "INSERT INTO deliveries (id, kind, url, payload, status, created_at, updated_at, next_attempt_at, batch, payload_bytes) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (delivery_id, kind, url, payload_text, PENDING, now, now, next_attempt_at, int(batch), payload_bytes)
+                )
+        finally:
+            conn.close()
+        return delivery_id
+
+    def due(self, limit, exclude=()):
+        """
+        Livraisons en attente dont la prochaine tentative est échue
+        """
+        rows = self._query(
+            "SELECT id, url, payload, attempts, batch, payload_bytes FROM deliveries "
+            "WHERE status = ? AND next_attempt_at <= ? ORDER BY next_attempt_at LIMIT ?",
+            (PENDING, time.time(), limit + len(exclude))
+        )
+        return [dict(row) for row in rows if row["id"] not in exclude][:limit]
+
+    def batch_members(self, url, exclude=()):
+        """
+        Payloads en mode batch en attente pour un webhook, dans l'ordre d'arrivée,
+        dans la limite de N8N_BATCH_MAX_ITEMS et N8N_BATCH_MAX_BYTES
+
+        Les reprises encore en attente de leur délai ne sont pas regroupées.
+        """
+        rows = self._query(
+            "SELECT id, url, payload, attempts, batch, payload_bytes FROM deliveries "
+            "WHERE url = ? AND status = ? AND batch = 1 AND (attempts = 0 OR next_attempt_at <= ?) "
+            "ORDER BY created_at LIMIT ?",
+            (url, PENDING, time.time(), N8N_BATCH_MAX_ITEMS + len(exclude))
+        )
+        members = []
+        total_bytes = 0
+        for row in rows:
+            if row["id"] in exclude:
+                continue
+            if members and (len(members) >= N8N_BATCH_MAX_ITEMS or total_bytes + row["payload_bytes"] > N8N_BATCH_MAX_BYTES):
+                break
+            members.append(dict(row))
+            total_bytes += row["payload_bytes"]
+        return members
+
+    def mark_delivered(self, delivery_id, status_code, response, batch_id=None):
+        # Le payload (parfois le texte complet d'un PDF) n'est plus utile une fois livré
+        now = time.time()
+        self._execute(
+            "UPDATE deliveries SET status = ?, attempts = attempts + 1, updated_at = ?, delivered_at = ?, "
+            "last_status_code = ?, last_error = NULL, response = ?, batch_id = ?, payload = '' WHERE id = ?",
+            (DELIVERED, now, now, status_code, response[:RESPONSE_MAX_CHARS], batch_id, delivery_id)
+        )
+        N8N_DELIVERIES.inc(outcome="delivered")
+
+    def mark_failed(self, delivery_id, error, status_code=None, retry_at=None, response=None, batch_id=None):
+        """
+        Enregistre un échec : nouvelle tentative à retry_at, ou lettre morte si retry_at est None
+        """
+        now = time.time()
+        self._execute(
+            "UPDATE deliveries SET status = ?, attempts = attempts + 1, updated_at = ?, next_attempt_at = ?, "
+            "last_status_code = ?, last_error = ?, response = ?, batch_id = ? WHERE id = ?",
+            (
+                PENDING if retry_at is not None else DEAD, now, retry_at if retry_at is not None else now,
+                status_code, error, response[:RESPONSE_MAX_CHARS] if response else None, batch_id, delivery_id
+            )
+        )
+        N8N_DELIVERIES.inc(outcome="retry" if retry_at is not None else "dead")
+
+    def postpone(self, delivery_id, retry_at):
+        """
+        Reporte une livraison sans compter de tentative (circuit ouvert)
+        """
+        self._execute(
+            "UPDATE deliveries SET next_attempt_at = ?, updated_at = ? WHERE id = ? AND status = ?",
+            (retry_at, time.time(), delivery_id, PENDING)
+        )
+        N8N_DELIVERIES.inc(outcome="postponed")
+
+    def requeue(self, delivery_id):
+        """
+        Remet une lettre morte dans la file, avec un compteur de tentatives remis à zéro
+        """
+        now = time.time()
+        return self._execute(
+            "UPDATE deliveries SET status = ?, attempts = 0, next_attempt_at = ?, updated_at = ? "
+            "WHERE id = ? AND status = ?",
+            (PENDING, now, now, delivery_id, DEAD)
+        ) > 0
+
+    def purge_delivered(self, older_than):
+        """
+        Supprime les livraisons réussies depuis plus de older_than secondes
+
+        Returns:
+            int: Nombre de livraisons supprimées
+        """
+        return self._execute(
+            "DELETE FROM deliveries WHERE status = ? AND delivered_at < ?", (DELIVERED, time.time() - older_than)
+        )
+
+    def get(self, delivery_id):
+        rows = self._query("SELECT * FROM deliveries WHERE id = ?", (delivery_id,))
+        return self._to_dict(rows[0]) if rows else None
+
+    def list(self, status, limit=100):
+        rows = self._query(
+            "SELECT * FROM deliveries WHERE status = ? ORDER BY updated_at DESC LIMIT ?", (status, limit)
+        )
+        return [self._to_dict(row) for row in rows]
+
+    def counts(self):
+        counts = {PENDING: 0, DELIVERED: 0, DEAD: 0}
+        for row in self._query("SELECT status, COUNT(*) AS n FROM deliveries GROUP BY status"):
+            counts[row["status"]] = row["n"]
+        return counts
+
+    @staticmethod
+    def _to_dict(row):
+        return {
+            "delivery_id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "created_at": _iso(row["created_at"]),
+            "updated_at": _iso(row["updated_at"]),
+            "next_attempt_at": _iso(row["next_attempt_at"]) if row["status"] == PENDING else None,
+            "delivered_at": _iso(row["delivered_at"]),
+            "last_status_code": row["last_status_code"],
+            "last_error": row["last_error"],
+            "response": row["response"],
+            "batch_id": row["batch_id"]
+        }
+
+
+class CircuitBreaker:
+    """
+    Coupe-circuit par webhook : après N8N_BREAKER_THRESHOLD échecs consécutifs,
+    les livraisons sont suspendues pendant N8N_BREAKER_COOLDOWN secondes, puis
+    une seule tentative d'essai décide de la réouverture
+    """
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.time() - self.opened_at < self.cooldown:
+            return "open"
+        return "half_open"
+
+    @property
+    def retry_at(self):
+        return (self.opened_at or time.time()) + self.cooldown
+
+    def postpone_until(self):
+        """
+        Échéance d'une livraison refusée par le coupe-circuit : fin du délai
+        d'attente, ou un délai complet si l'essai est en cours (demi-ouvert,
+        retry_at est alors déjà passé)
+        """
+        if self.state == "open":
+            return self.retry_at
+        return time.time() + self.cooldown
+
+    def allow(self):
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.probing or self.failures >= self.threshold:
+            self.opened_at = time.time()
+        self.probing = False
+
+    def snapshot(self):
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "retry_at": _iso(self.retry_at) if self.opened_at is not None else None
+        }
+
+
+def build_batch_body(rows, batch_id):
+    """
+    Construit le corps d'un batch à partir des payloads JSON déjà sérialisés
+
+    Format : {"batch_id": ..., "count": n, "items": [{"delivery_id": ..., "payload": {...}}, ...]}
+    """
+    items = ",".join(
+        '{"delivery_id":%s,"payload":%s}' % (json.dumps(row["id"]), row["payload"])
+        for row in rows
+    )
+    return '{"batch_id":%s,"count":%d,"items":[%s]}' % (json.dumps(batch_id), len(rows), items)
+
+
+def parse_item_results(response):
+    """
+    Lit les résultats par élément renvoyés par le webhook pour un batch, s'il y en a
+
+    Le webhook peut répondre {"results": [{"delivery_id": ..., "success": bool, ...}]} ;
+    les éléments absents de la liste sont considérés comme livrés.
+
+    Returns:
+        dict: delivery_id -> résultat, vide si la réponse n'en contient pas
+    """
+    try:
+        body = response.json()
+    except ValueError:
+        return {}
+    if not isinstance(body, dict) or not isinstance(body.get("results"), list):
+        return {}
+    return {
+        item["delivery_id"]: item
+        for item in body["results"]
+        if isinstance(item, dict) and "delivery_id" in item
+    }
+
+
+class N8nDispatcher:
+    """
+    Livre en arrière-plan les payloads de l'outbox via un client HTTP asynchrone partagé
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.client = None
+        self.breakers = {}
+        self._task = None
+        self._wakeup = None
+        self._in_flight = set()
+        self._purged_at = 0.0
+        self.stats = {
+            "requests": 0,
+            "batches": 0,
+            "batched_items": 0,
+            "payload_bytes": 0,
+            "wire_bytes": 0
+        }
+
+    async def start(self):
+        limits = httpx.Limits(max_connections=N8N_MAX_CONNECTIONS, max_keepalive_connections=N8N_MAX_CONNECTIONS)
+        self.client = httpx.AsyncClient(timeout=N8N_TIMEOUT, limits=limits)
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def breaker(self, url):
+        if url not in self.breakers:
+            self.breakers[url] = CircuitBreaker(N8N_BREAKER_THRESHOLD, N8N_BREAKER_COOLDOWN)
+        return self.breakers[url]
+
+    async def enqueue(self, url, payload, kind=None, batch=None):
+        """
+        Enregistre un payload dans l'outbox et réveille le dispatcher
+
+        Args:
+            batch (bool): Regrouper avec les autres payloads du même webhook
+                (N8N_BATCH_ENABLED si None)
+
+        Returns:
+            str: Identifiant de la livraison
+        """
+        if batch is None:
+            batch = N8N_BATCH_ENABLED
+        delivery_id = await asyncio.to_thread(self.store.enqueue, url, payload, kind, batch)
+        self.wake()
+        return delivery_id
+
+    async def requeue(self, delivery_id):
+        """
+        Remet une lettre morte dans la file
+
+        Returns:
+            bool: False si la livraison n'existe pas ou n'est pas une lettre morte
+        """
+        requeued = await asyncio.to_thread(self.store.requeue, delivery_id)
+        if requeued:
+            self.wake()
+        return requeued
+
+    def wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def post(self, url, payload):
+        """
+        Envoi direct (hors outbox) avec le client partagé, pour les tests de connexion
+        """
+        if self.client is None:
+            async with httpx.AsyncClient(timeout=N8N_TIMEOUT) as client:
+                return await client.post(url, json=payload)
+        return await self.client.post(url, json=payload)
+
+    async def _run(self):
+        semaphore = asyncio.Semaphore(N8N_DISPATCH_CONCURRENCY)
+
+        async def deliver(rows, batch):
+            try:
+                if batch:
+                    await self._deliver_batch(rows)
+                else:
+                    await self._deliver(rows[0])
+            except Exception:
+                logger.exception("Erreur du dispatcher n8n (%s)", rows[0]["id"])
+            finally:
+                for row in rows:
+                    self._in_flight.discard(row["id"])
+                semaphore.release()
+
+        while True:
+            try:
+                rows = await asyncio.to_thread(self.store.due, N8N_DISPATCH_CONCURRENCY, set(self._in_flight))
+            except Exception:
+                logger.exception("Erreur de lecture de l'outbox n8n")
+                rows = []
+
+            for row in rows:
+                # Déjà embarqué dans un batch lancé pendant ce passage
+                if row["id"] in self._in_flight:
+                    continue
+                await semaphore.acquire()
+                group = [row]
+                if row["batch"]:
+                    members = await asyncio.to_thread(self.store.batch_members, row["url"], set(self._in_flight))
+                    group = members or group
+                for member in group:
+                    self._in_flight.add(member["id"])
+                asyncio.create_task(deliver(group, bool(row["batch"])))
+
+            if time.monotonic() - self._purged_at > RETENTION_PURGE_INTERVAL:
+                self._purged_at = time.monotonic()
+                try:
+                    await asyncio.to_thread(self.store.purge_delivered, N8N_DELIVERED_RETENTION_DAYS * 86400)
+                except Exception:
+                    logger.exception("Erreur de purge de l'outbox n8n")
+
+            # Attendre un nouveau payload ou la prochaine échéance
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), DISPATCH_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _send(self, url, body, compress):
+        self.stats["requests"] += 1
+        self.stats["payload_bytes"] += len(body)
+        headers = {"Content-Type": "application/json"}
+        if compress:
+            body = gzip.compress(body, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+        self.stats["wire_bytes"] += len(body)
+        start = time.perf_counter()
+        try:
+            return await self.client.post(url, content=body, headers=headers)
+        finally:
+            observe_stage("n8n_post", time.perf_counter() - start)
+
+    async def _deliver(self, row):
+        breaker = self.breaker(row["url"])
+        if not breaker.allow():
+            await asyncio.to_thread(self.store.postpone, row["id"], breaker.postpone_until())
+            return
+
+        try:
+            response = await self._send(row["url"], row["payload"].encode("utf-8"), compress=False)
+        except httpx.HTTPError as e:
+            breaker.record_failure()
+            await self._fail(row, f"Erreur de connexion à n8n: {str(e)}")
+            return
+
+        if 200 <= response.status_code < 300:
+            breaker.record_success()
+            await asyncio.to_thread(self.store.mark_delivered, row["id"], response.status_code, response.text)
+            return
+
+        await self._reject(breaker, [row], response)
+
+    async def _deliver_batch(self, rows):
+        url = rows[0]["url"]
+        breaker = self.breaker(url)
+        if not breaker.allow():
+            for row in rows:
+                await asyncio.to_thread(self.store.postpone, row["id"], breaker.postpone_until())
+            return
+
+        batch_id = uuid.uuid4().hex
+        body = build_batch_body(rows, batch_id).encode("utf-8")
+        self.stats["batches"] += 1
+        self.stats["batched_items"] += len(rows)
+
+        try:
+            response = await self._send(url, body, compress=N8N_BATCH_GZIP)
+        except httpx.HTTPError as e:
+            breaker.record_failure()
+            for row in rows:
+                await self._fail(row, f"Erreur de connexion à n8n: {str(e)}", batch_id=batch_id)
+            return
+
+        if not 200 <= response.status_code < 300:
+            await self._reject(breaker, rows, response, batch_id)
+            return
+
+        breaker.record_success()
+        results = parse_item_results(response)
+
+        def record():
+            for row in rows:
+                result = results.get(row["id"])
+                if result is None or result.get("success", True):
+                    item_response = json.dumps(result, ensure_ascii=False) if result is not None else response.text
+                    self.store.mark_delivered(row["id"], response.status_code, item_response, batch_id)
+                else:
+                    # Échec signalé par le webhook pour cet élément uniquement
+                    attempts = row["attempts"] + 1
+                    retry_at = time.time() + backoff_delay(attempts) if attempts < N8N_MAX_ATTEMPTS else None
+                    error = result.get("error") or "Élément rejeté par n8n"
+                    self.store.mark_failed(
+                        row["id"], f"Erreur n8n: {error}", result.get("status_code"), retry_at,
+                        json.dumps(result, ensure_ascii=False), batch_id
+                    )
+
+        await asyncio.to_thread(record)
+
+    async def _reject(self, breaker, rows, response, batch_id=None):
+        error = f"Erreur n8n: {response.text}"
+        if is_retryable(response.status_code):
+            breaker.record_failure()
+            for row in rows:
+                await self._fail(row, error, response.status_code, response.text, batch_id)
+        else:
+            # Le webhook a répondu : il est joignable, mais ces payloads ne passeront jamais
+            breaker.record_success()
+            for row in rows:
+                await asyncio.to_thread(
+                    self.store.mark_failed, row["id"], error, response.status_code, None, response.text, batch_id
+                )
+
+    async def _fail(self, row, error, status_code=None, response=None, batch_id=None):
+        attempts = row["attempts"] + 1
+        retry_at = time.time() + backoff_delay(attempts) if attempts < N8N_MAX_ATTEMPTS else None
+        await asyncio.to_thread(self.store.mark_failed, row["id"], error, status_code, retry_at, response, batch_id)
+
+    def get_status(self):
+        """
+        État global de l'outbox : livraisons par état, coupe-circuits et volume envoyé
+        """
+        return {
+            "deliveries": self.store.counts(),
+            "in_flight": len(self._in_flight),
+            "running": self._task is not None and not self._task.done(),
+            "circuit_breakers": {url: breaker.snapshot() for url, breaker in self.breakers.items()},
+            "traffic": dict(self.stats)
+        }
+
+
+# Instances partagées par tous les endpoints
+outbox_store = OutboxStore(OUTBOX_DB)
+n8n_dispatcher = N8nDispatcher(outbox_store)
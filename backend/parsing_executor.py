@@ -0,0 +1,167 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from metrics import registry, run_with_metrics
+from request_profiler import current_profile, profile_call
+
+# Configuration de l'exécuteur de parsing (surchargée par variables d'environnement)
+PARSING_MAX_WORKERS = int(os.environ.get("PARSING_MAX_WORKERS", os.cpu_count() or 1))
+PARSING_THREAD_WORKERS = int(os.environ.get("PARSING_THREAD_WORKERS", 4))
+PARSING_SMALL_FILE_BYTES = int(os.environ.get("PARSING_SMALL_FILE_BYTES", 256 * 1024))
+PARSING_TIMEOUT = float(os.environ.get("PARSING_TIMEOUT", 120))
+PARSING_START_METHOD = os.environ.get("PARSING_START_METHOD", "spawn")
+
+# Intervalle de vérification de la déconnexion du client (en secondes)
+DISCONNECT_POLL_INTERVAL = 0.5
+
+_process_pool = None
+_thread_pool = None
+
+# Nombre de jobs soumis et pas encore terminés
+_pending_jobs = 0
+
+
+class ParsingTimeoutError(Exception):
+    """Le job de parsing a dépassé le délai imparti"""
+
+
+class ParsingCancelledError(Exception):
+    """Le client s'est déconnecté avant la fin du job de parsing"""
+
+
+def get_process_pool():
+    """
+    Retourne le pool de processus de parsing (créé au premier appel)
+    """
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=PARSING_MAX_WORKERS,
+            mp_context=multiprocessing.get_context(PARSING_START_METHOD)
+        )
+    return _process_pool
+
+
+def get_thread_pool():
+    """
+    Retourne le pool de threads utilisé pour les petits fichiers
+    """
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(
+            max_workers=PARSING_THREAD_WORKERS,
+            thread_name_prefix="parsing"
+        )
+    return _thread_pool
+
+
+def _reset_process_pool():
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+def shutdown_executors():
+    """
+    Arrête les pools et annule les jobs encore en file d'attente
+    """
+    global _thread_pool
+    _reset_process_pool()
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=False, cancel_futures=True)
+        _thread_pool = None
+
+
+def pending_jobs():
+    """
+    Nombre de jobs de parsing soumis et non terminés
+    """
+    return _pending_jobs
+
+
+def _select_executor(size):
+    # Les petits fichiers ne justifient pas le coût d'un aller-retour inter-processus
+    if size is not None and size <= PARSING_SMALL_FILE_BYTES:
+        return get_thread_pool()
+    return get_process_pool()
+
+
+async def _wait_for_disconnect(request):
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+
+
+async def run_parsing(func, *args, size=None, timeout=None, request=None):
+    """
+    Exécute une fonction de parsing CPU hors de la boucle d'événements
+
+    Args:
+        func: Fonction de parsing (doit être picklable pour le pool de processus)
+        *args: Arguments passés à la fonction
+        size (int): Taille du fichier en octets, utilisée pour choisir le pool
+        timeout (float): Délai maximal en secondes (PARSING_TIMEOUT par défaut)
+        request (Request): Requête HTTP, pour annuler le job si le client se déconnecte
+
+    Returns:
+        Le résultat de la fonction
+
+    Raises:
+        ParsingTimeoutError: si le délai est dépassé
+        ParsingCancelledError: si le client s'est déconnecté
+    """
+    global _pending_jobs
+    if timeout is None:
+        timeout = PARSING_TIMEOUT
+
+    # Requête profilée : le job est profilé dans le thread ou le worker qui l'exécute
+    profile = current_profile()
+    call = (profile_call, func, *args) if profile is not None else (func, *args)
+
+    executor = _select_executor(size)
+    # Dans un worker, les métriques du job sont renvoyées avec le résultat
+    in_process_pool = executor is not _thread_pool
+    try:
+        concurrent_future = executor.submit(run_with_metrics, *call) if in_process_pool else executor.submit(*call)
+    except BrokenProcessPool:
+        # Un worker a été tué (OOM, segfault) : on recrée le pool une fois
+        _reset_process_pool()
+        executor = _select_executor(size)
+        concurrent_future = executor.submit(run_with_metrics, *call)
+
+    _pending_jobs += 1
+    job = asyncio.wrap_future(concurrent_future)
+    watcher = asyncio.ensure_future(_wait_for_disconnect(request)) if request is not None else None
+
+    try:
+        waiters = {job} if watcher is None else {job, watcher}
+        done, _ = await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+        if job in done:
+            try:
+                result = job.result()
+                if in_process_pool:
+                    result, snapshot = result
+                    registry.merge(snapshot)
+                if profile is not None:
+                    result, stats = result
+                    profile.add_job_stats(stats)
+                return result
+            except BrokenProcessPool:
+                # Le pool est inutilisable : le prochain job en recréera un
+                _reset_process_pool()
+                raise
+
+        # Un job déjà démarré dans un worker ne peut pas être interrompu :
+        # on annule ce qui est encore en file d'attente et on ignore le résultat
+        job.cancel()
+        if watcher is not None and watcher in done:
+            raise ParsingCancelledError("Le client s'est déconnecté")
+        raise ParsingTimeoutError(f"Le parsing a dépassé le délai de {timeout:.0f} secondes")
+
+    finally:
+        _pending_jobs -= 1
+        if watcher is not None:
+            watcher.cancel()
@@ -0,0 +1,134 @@
+import os
+import pdfminer
+from extract_pdf_pages import iter_pdf_pages, measure_layout_complexity, page_range_numbers, FastTextDevice
+
+# Paramètres pdfminer utilisés pour l'extraction avec analyse de mise en page
+PDF_LAPARAMS = {
+    "line_margin": 0.5,
+    "word_margin": 0.1,
+    "char_margin": 2.0,
+    "all_texts": True
+}
+
+# Mode d'extraction par défaut : "layout", "fast" ou "auto" (surchargé par variable d'environnement)
+PDF_EXTRACTION_MODE = os.environ.get("PDF_EXTRACTION_MODE", "layout")
+
+# Mode "auto" : pages échantillonnées et part de lignes complexes au-delà de
+# laquelle l'analyse de mise en page est utilisée
+PDF_AUTO_SAMPLE_PAGES = int(os.environ.get("PDF_AUTO_SAMPLE_PAGES", 2))
+PDF_AUTO_LAYOUT_THRESHOLD = float(os.environ.get("PDF_AUTO_LAYOUT_THRESHOLD", 0.2))
+
+
+class PdfExtractor:
+    """
+    Interface d'un extracteur de texte PDF
+
+    name est le mode qui le sélectionne ; version est l'empreinte utilisée
+    dans les clés du cache d'extraction, à changer dès que le texte produit change.
+    """
+    name = None
+    version = None
+
+    def iter_pages(self, source, page_numbers=None, with_boxes=False):
+        """
+        Yields:
+            tuple: (numéro de page à partir de 1, texte de la page), plus
+            la boîte de chaque caractère du texte si with_boxes (None pour
+            tous les caractères si l'extracteur ne connaît pas les positions)
+        """
+        raise NotImplementedError
+
+
+class LayoutExtractor(PdfExtractor):
+    """
+    Analyse de mise en page complète de pdfminer (LAParams) : ordre de lecture
+    reconstitué, colonnes et blocs séparés
+    """
+    name = "layout"
+
+    def __init__(self, laparams):
+        self.laparams = laparams
+        self.version = "pdfminer-{}:pages:{}".format(
+            pdfminer.__version__,
+            ",".join(f"{k}={v}" for k, v in sorted(laparams.items()))
+        )
+
+    def iter_pages(self, source, page_numbers=None, with_boxes=False):
+        return iter_pdf_pages(source, laparams=self.laparams, page_numbers=page_numbers, with_boxes=with_boxes)
+
+
+class FastExtractor(PdfExtractor):
+    """
+    Texte dans l'ordre du flux de contenu, sans analyse de mise en page
+    (formulaires et documents au fil du texte)
+    """
+    name = "fast"
+    version = f"pdfminer-{pdfminer.__version__}:fast:1"
+
+    def iter_pages(self, source, page_numbers=None, with_boxes=False):
+        return iter_pdf_pages(source, page_numbers=page_numbers, device=FastTextDevice, with_boxes=with_boxes)
+
+
+# Extracteurs disponibles, par mode
+PDF_EXTRACTORS = {}
+
+
+def register_pdf_extractor(extractor):
+    """
+    Rend un extracteur disponible sous son nom (paramètre mode des endpoints PDF)
+    """
+    PDF_EXTRACTORS[extractor.name] = extractor
+    return extractor
+
+
+register_pdf_extractor(LayoutExtractor(PDF_LAPARAMS))
+register_pdf_extractor(FastExtractor())
+
+
+def pdf_extraction_modes():
+    """
+    Modes acceptés : les extracteurs enregistrés et "auto"
+    """
+    return ("auto",) + tuple(PDF_EXTRACTORS)
+
+
+def choose_pdf_mode(source):
+    """
+    Mode "auto" : échantillonne les premières pages et choisit l'extracteur
+
+    L'analyse de mise en page n'est utilisée que si une part suffisante des
+    lignes échantillonnées est multi-colonnes ou tracée dans le désordre.
+    """
+    complexity = measure_layout_complexity(source, PDF_AUTO_SAMPLE_PAGES)
+    return "layout" if complexity > PDF_AUTO_LAYOUT_THRESHOLD else "fast"
+
+
+def resolve_pdf_mode(source, mode):
+    """
+    Remplace le mode "auto" par le mode choisi pour ce document
+    """
+    return choose_pdf_mode(source) if mode == "auto" else mode
+
+
+def get_pdf_extractor(mode):
+    return PDF_EXTRACTORS[mode]
+
+
+def pdf_text_version(mode):
+    """
+    Empreinte du texte produit par un mode, pour les clés du cache d'extraction
+    """
+    if mode == "auto":
+        versions = ",".join(extractor.version for extractor in PDF_EXTRACTORS.values())
+        return f"auto:{PDF_AUTO_SAMPLE_PAGES}:{PDF_AUTO_LAYOUT_THRESHOLD}:{versions}"
+    return PDF_EXTRACTORS[mode].version
+
+
+def extract_page_range(source, first_page, last_page, mode):
+    """
+    Extrait le texte d'une plage de pages (bornes incluses) avec un mode déjà résolu
+
+    Returns:
+        list: Texte de chaque page de la plage, dans l'ordre
+    """
+    return [text for _, text in get_pdf_extractor(mode).iter_pages(source, page_range_numbers(first_page, last_page))]
@@ -0,0 +1,134 @@
+import re
+from extract_pdf_pages import page_range_numbers
+from pdf_extractors import get_pdf_extractor, resolve_pdf_mode
+from metrics import stage_timer, PLACEHOLDERS_FOUND
+
+# Placeholder {{...}} : au plus un saut de ligne dans le nom (placeholder
+# coupé par un retour à la ligne), jamais de saut de page ni d'accolade
+PLACEHOLDER_PATTERN = re.compile(r"\{\{([^{}\n\f]{1,200}(?:\n[^{}\n\f]{0,200})?)\}\}")
+
+# Version de l'index, pour les clés du cache d'extraction (à changer dès que le résultat change)
+PLACEHOLDER_INDEX_VERSION = "1"
+
+
+def clean_placeholder(raw):
+    """
+    Nom d'un placeholder trouvé dans le texte d'une page
+
+    Un nom coupé en fin de ligne est recollé : sans espace s'il s'agit d'un
+    identifiant (nom_du_champ), avec une espace s'il contient des mots.
+    """
+    if "\n" not in raw:
+        return raw.strip()
+    head, tail = (part.strip() for part in raw.split("\n", 1))
+    joiner = "" if "_" in head + tail and " " not in head + tail else " "
+    return (head + joiner + tail).strip()
+
+
+def union_bbox(boxes, start, end):
+    """
+    Boîte englobante [x0, y0, x1, y1] des caractères start:end, en points PDF
+    (origine en bas à gauche de la page), ou None si aucune position n'est connue
+    """
+    known = [box for box in boxes[start:end] if box is not None]
+    if not known:
+        return None
+    return [
+        round(min(box[0] for box in known), 2),
+        round(min(box[1] for box in known), 2),
+        round(max(box[2] for box in known), 2),
+        round(max(box[3] for box in known), 2)
+    ]
+
+
+class PlaceholderIndex:
+    """
+    Index des placeholders d'un PDF, alimenté page par page
+
+    Chaque occurrence garde sa page, sa position dans le texte de la page et
+    sa boîte englobante si l'extracteur la connaît ; les noms sont dédupliqués
+    dans l'ordre de première apparition.
+    """
+
+    def __init__(self):
+        self.total_pages = 0
+        self.occurrences = []
+        # Nom -> nombre d'occurrences (un dict garde l'ordre d'insertion)
+        self.counts = {}
+
+    def add_occurrence(self, occurrence):
+        self.occurrences.append(occurrence)
+        name = occurrence["placeholder"]
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def add_page(self, page_number, text, boxes=None):
+        """
+        Indexe les placeholders du texte d'une page
+
+        Args:
+            page_number (int): Numéro de la page (à partir de 1)
+            text (str): Texte de la page
+            boxes (list): Boîte de chaque caractère du texte (ou None)
+        """
+        self.total_pages += 1
+        for match in PLACEHOLDER_PATTERN.finditer(text):
+            name = clean_placeholder(match.group(1))
+            if not name:
+                continue
+            self.add_occurrence({
+                "placeholder": name,
+                "page": page_number,
+                "offset": match.start(),
+                "bbox": union_bbox(boxes, match.start(), match.end()) if boxes else None
+            })
+
+    def to_dict(self):
+        return {
+            "total_pages": self.total_pages,
+            "total_found": len(self.occurrences),
+            "unique_count": len(self.counts),
+            "placeholders": list(self.counts),
+            "occurrences": self.occurrences
+        }
+
+
+def index_pdf_placeholders(source, mode="layout", pages=None):
+    """
+    Indexe les placeholders ({{placeholder}}) d'un PDF en une passe page par page
+
+    Seule la page en cours est gardée en mémoire.
+
+    Args:
+        source (str | bytes): Chemin du fichier PDF ou son contenu
+        mode (str): Mode d'extraction ("layout", "fast" ou "auto")
+        pages (tuple): Plage (première page, dernière page ou None), tout le document si None
+    """
+    try:
+        mode = resolve_pdf_mode(source, mode)
+        page_numbers = page_range_numbers(*pages) if pages is not None else None
+        index = PlaceholderIndex()
+        for page_number, text, boxes in get_pdf_extractor(mode).iter_pages(source, page_numbers, with_boxes=True):
+            with stage_timer("pdf_placeholder_scan"):
+                index.add_page(page_number, text, boxes)
+        PLACEHOLDERS_FOUND.inc(len(index.occurrences), source="pdf")
+
+        result = index.to_dict()
+        result["extraction_mode"] = mode
+        return result
+
+    except Exception as e:
+        return {"error": f"Erreur lors de l'extraction des placeholders: {str(e)}"}
+
+
+def merge_placeholder_indexes(parts, mode):
+    """
+    Réassemble les index de plages de pages consécutives, dans l'ordre des pages
+    """
+    index = PlaceholderIndex()
+    for part in parts:
+        index.total_pages += part["total_pages"]
+        for occurrence in part["occurrences"]:
+            index.add_occurrence(occurrence)
+    result = index.to_dict()
+    result["extraction_mode"] = mode
+    return result
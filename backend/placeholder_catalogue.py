@@ -0,0 +1,252 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from template_analysis import iter_occurrences
+
+# Emplacement de la base du catalogue (surchargé par variable d'environnement)
+CATALOGUE_DB = os.environ.get("CATALOGUE_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "catalogue.db"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS templates (
+    fingerprint TEXT PRIMARY KEY,
+    filename TEXT,
+    analysis_version TEXT,
+    first_seen_at TEXT,
+    last_seen_at TEXT,
+    total_found INTEGER,
+    unique_count INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_templates_last_seen ON templates(last_seen_at);
+CREATE INDEX IF NOT EXISTS idx_templates_first_seen ON templates(first_seen_at);
+
+CREATE TABLE IF NOT EXISTS template_placeholders (
+    fingerprint TEXT NOT NULL,
+    placeholder TEXT NOT NULL,
+    occurrences INTEGER NOT NULL,
+    PRIMARY KEY (fingerprint, placeholder)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_template_placeholders_placeholder ON template_placeholders(placeholder);
+
+CREATE TABLE IF NOT EXISTS placeholder_locations (
+    fingerprint TEXT NOT NULL,
+    placeholder TEXT NOT NULL,
+    section TEXT,
+    location TEXT,
+    paragraph_index INTEGER,
+    table_index INTEGER,
+    row_index INTEGER,
+    cell_index INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_placeholder_locations_template ON placeholder_locations(fingerprint, placeholder);
+"""
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class PlaceholderCatalogue:
+    """
+    Index persistant des placeholders de tous les templates analysés
+
+    Chaque template est identifié par l'empreinte SHA-256 de son fichier.
+    Les requêtes ne relisent jamais les fichiers : ce sont des recherches
+    par index dans la base SQLite.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._initialized = False
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if not self._initialized:
+            with self._lock:
+                if not self._initialized:
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                    with sqlite3.connect(self.path) as conn:
+                        conn.execute("PRAGMA journal_mode=WAL")
+                        conn.executescript(SCHEMA)
+                    self._initialized = True
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def record_template(self, fingerprint, filename, analysis):
+        """
+        Enregistre (ou rafraîchit) les placeholders d'un template analysé
+
+        Args:
+            fingerprint (str): Empreinte SHA-256 du fichier template
+            filename (str): Nom du fichier uploadé
+            analysis (dict): Résultat de template_analysis.analyze_template
+        """
+        now = _now()
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute(
+                    "SELECT analysis_version FROM templates WHERE fingerprint = ?", (fingerprint,)
+                ).fetchone()
+
+                # Template déjà indexé avec la même analyse : seule la date de dernier passage change
+                if row is not None and row["analysis_version"] == analysis["version"]:
+                    conn.execute(
+                        "UPDATE templates SET filename = ?, last_seen_at = ? WHERE fingerprint = ?",
+                        (filename, now, fingerprint)
+                    )
+                    return
+
+                counts = {}
+                locations = []
+                for occurrence in iter_occurrences(analysis):
+                    ph = occurrence.placeholder
+                    counts[ph] = counts.get(ph, 0) + 1
+                    locations.append((
+                        fingerprint, ph, analysis["sections"][occurrence.section], occurrence.location,
+                        occurrence.paragraph_index, occurrence.table_index,
+                        occurrence.row_index, occurrence.cell_index
+                    ))
+
+                conn.execute("DELETE FROM template_placeholders WHERE fingerprint = ?", (fingerprint,))
+                conn.execute("DELETE FROM placeholder_locations WHERE fingerprint = ?", (fingerprint,))
+                conn.execute(
+                    "INSERT INTO templates (fingerprint, filename, analysis_version, first_seen_at, last_seen_at, total_found, unique_count) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(fingerprint) DO UPDATE SET filename = excluded.filename, "
+                    "analysis_version = excluded.analysis_version, last_seen_at = excluded.last_seen_at, "
+                    "total_found = excluded.total_found, unique_count = excluded.unique_count",
+                    (fingerprint, filename, analysis["version"], now, now, len(analysis["occurrences"]), len(counts))
+                )
+                conn.executemany(
+                    "INSERT INTO template_placeholders (fingerprint, placeholder, occurrences) VALUES (?, ?, ?)",
+                    [(fingerprint, ph, count) for ph, count in counts.items()]
+                )
+                conn.executemany(
+                    "INSERT INTO placeholder_locations VALUES (?, ?, ?, ?, ?, ?, ?, ?)", locations
+                )
+        finally:
+            conn.close()
+
+    def resolve(self, fingerprint):
+        """
+        Résout l'alias "latest" vers le dernier template ajouté au catalogue
+
+        Ré-analyser un template plus ancien ne change pas la version "latest" :
+        seule la date de première analyse compte.
+        """
+        if fingerprint != "latest":
+            return fingerprint
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT fingerprint FROM templates ORDER BY first_seen_at DESC, rowid DESC LIMIT 1"
+            ).fetchone()
+            return row["fingerprint"] if row else None
+        finally:
+            conn.close()
+
+    def list_templates(self, limit=100):
+        """
+        Liste les templates indexés, du plus récent au plus ancien
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT fingerprint, filename, first_seen_at, last_seen_at, total_found, unique_count "
+                "FROM templates ORDER BY last_seen_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            conn.close()
+
+    def find_placeholder(self, placeholder):
+        """
+        Retourne les templates qui utilisent un placeholder, avec le nombre d'occurrences
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT t.fingerprint, t.filename, t.last_seen_at, tp.occurrences "
+                "FROM template_placeholders tp JOIN templates t ON t.fingerprint = tp.fingerprint "
+                "WHERE tp.placeholder = ? ORDER BY t.last_seen_at DESC", (placeholder,)
+            ).fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            conn.close()
+
+    def get_template(self, fingerprint):
+        """
+        Retourne un template indexé avec ses placeholders et leurs emplacements
+
+        Returns:
+            dict ou None si le template n'est pas indexé
+        """
+        conn = self._connect()
+        try:
+            template = conn.execute(
+                "SELECT fingerprint, filename, first_seen_at, last_seen_at, total_found, unique_count "
+                "FROM templates WHERE fingerprint = ?", (fingerprint,)
+            ).fetchone()
+            if template is None:
+                return None
+
+            placeholders = {}
+            for row in conn.execute(
+                "SELECT placeholder, occurrences FROM template_placeholders WHERE fingerprint = ?", (fingerprint,)
+            ):
+                placeholders[row["placeholder"]] = {
+                    "placeholder": row["placeholder"],
+                    "occurrences": row["occurrences"],
+                    "locations": []
+                }
+            for row in conn.execute(
+                "SELECT placeholder, section, location, paragraph_index, table_index, row_index, cell_index "
+                "FROM placeholder_locations WHERE fingerprint = ? ORDER BY rowid", (fingerprint,)
+            ):
+                location = {k: row[k] for k in row.keys() if k != "placeholder" and row[k] is not None}
+                placeholders[row["placeholder"]]["locations"].append(location)
+
+            return {**dict(template), "placeholders": list(placeholders.values())}
+        finally:
+            conn.close()
+
+    def _template_counts(self, conn, fingerprint):
+        return {
+            row["placeholder"]: row["occurrences"]
+            for row in conn.execute(
+                "SELECT placeholder, occurrences FROM template_placeholders WHERE fingerprint = ?", (fingerprint,)
+            )
+        }
+
+    def diff_templates(self, base, target):
+        """
+        Compare les placeholders de deux templates indexés
+
+        Returns:
+            dict: placeholders ajoutés, supprimés, communs et dont le nombre d'occurrences a changé
+        """
+        conn = self._connect()
+        try:
+            base_counts = self._template_counts(conn, base)
+            target_counts = self._template_counts(conn, target)
+        finally:
+            conn.close()
+
+        return {
+            "base": base,
+            "target": target,
+            "added": [ph for ph in target_counts if ph not in base_counts],
+            "removed": [ph for ph in base_counts if ph not in target_counts],
+            "common": [ph for ph in target_counts if ph in base_counts],
+            "changed_occurrences": [
+                {"placeholder": ph, "base": base_counts[ph], "target": count}
+                for ph, count in target_counts.items()
+                if ph in base_counts and base_counts[ph] != count
+            ]
+        }
+
+
+# Instance partagée par tous les endpoints
+placeholder_catalogue = PlaceholderCatalogue(CATALOGUE_DB)
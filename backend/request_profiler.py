@@ -0,0 +1,272 @@
+import asyncio
+import contextvars
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from urllib.parse import parse_qs
+
+logger = logging.getLogger(__name__)
+
+# Profilage des requêtes à la demande (désactivé par défaut, surchargé par variables d'environnement)
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "0") == "1"
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0.0))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "profiles"))
+PROFILE_MAX_FILES = int(os.environ.get("PROFILE_MAX_FILES", 50))
+
+# Tris acceptés pour le résumé texte d'un profil
+PROFILE_SORT_KEYS = ("cumulative", "tottime", "calls", "ncalls")
+
+# Profil de la requête en cours (None hors profilage)
+_current_profile = contextvars.ContextVar("current_profile", default=None)
+
+
+class RequestProfile:
+    """
+    Profil CPU d'une requête : boucle d'événements et jobs de parsing
+
+    Les jobs exécutés dans les pools (pdfminer, python-docx) sont profilés là
+    où ils tournent et leurs statistiques sont ajoutées à celles de la requête.
+    """
+
+    def __init__(self, profile_id, reason):
+        self.id = profile_id
+        self.reason = reason
+        self.jobs = 0
+        self.profiler = None
+        self._worker_stats = []
+
+    def add_job_stats(self, stats):
+        self.jobs += 1
+        if stats is not None:
+            self._worker_stats.append(stats)
+
+    def build_stats(self):
+        """
+        Combine les statistiques de la boucle et des jobs
+
+        Returns:
+            pstats.Stats ou None si rien n'a été mesuré
+        """
+        sources = []
+        if self.profiler is not None:
+            sources.append(self.profiler)
+        sources.extend(_StatsHolder(stats) for stats in self._worker_stats)
+        if not sources:
+            return None
+        combined = pstats.Stats(sources[0])
+        for source in sources[1:]:
+            combined.add(source)
+        return combined
+
+
+class _StatsHolder:
+    # Interface attendue par pstats.Stats pour des statistiques déjà calculées
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def current_profile():
+    """
+    Profil de la requête en cours, ou None (coût : une lecture de ContextVar)
+    """
+    return _current_profile.get()
+
+
+def profile_call(func, *args):
+    """
+    Exécute un job sous cProfile, dans le thread ou le processus qui le traite
+
+    Returns:
+        tuple: (résultat de func, statistiques brutes ou None si un autre profileur est actif)
+    """
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Un seul profileur à la fois par processus (Python 3.12+)
+        return func(*args), None
+    try:
+        result = func(*args)
+    finally:
+        profiler.disable()
+    profiler.create_stats()
+    return result, profiler.stats
+
+
+class ProfileStore:
+    """
+    Répertoire borné des profils : les plus anciens sont supprimés au-delà de max_files
+
+    Chaque profil est un fichier pstats (.prof, lisible par pstats ou snakeviz)
+    accompagné de ses métadonnées (.json).
+    """
+
+    def __init__(self, directory, max_files):
+        self.directory = directory
+        self.max_files = max_files
+        self._lock = threading.Lock()
+
+    def _path(self, profile_id, extension):
+        return os.path.join(self.directory, f"{profile_id}.{extension}")
+
+    def save(self, stats, metadata):
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            stats.dump_stats(self._path(metadata["id"], "prof"))
+            metadata["size_bytes"] = os.path.getsize(self._path(metadata["id"], "prof"))
+            with open(self._path(metadata["id"], "json"), "w", encoding="utf-8") as f:
+                json.dump(metadata, f, ensure_ascii=False)
+            self._prune()
+
+    def _prune(self):
+        entries = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith(".prof")),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        for entry in entries[:max(0, len(entries) - self.max_files)]:
+            profile_id = entry.name[:-len(".prof")]
+            for extension in ("prof", "json"):
+                try:
+                    os.unlink(self._path(profile_id, extension))
+                except FileNotFoundError:
+                    pass
+
+    def list(self):
+        """
+        Métadonnées des profils conservés, du plus récent au plus ancien
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                with open(entry.path, encoding="utf-8") as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return sorted(profiles, key=lambda profile: profile["created_at"], reverse=True)
+
+    def path(self, profile_id):
+        """
+        Chemin du fichier pstats d'un profil, ou None s'il n'existe pas
+        """
+        # Les identifiants sont des uuid hexadécimaux : refuser tout autre nom de fichier
+        if not profile_id.isalnum():
+            return None
+        path = self._path(profile_id, "prof")
+        return path if os.path.exists(path) else None
+
+    def summary(self, profile_id, sort="cumulative", limit=40):
+        """
+        Résumé texte d'un profil (fonctions les plus coûteuses)
+        """
+        path = self.path(profile_id)
+        if path is None:
+            return None
+        output = io.StringIO()
+        pstats.Stats(path, stream=output).strip_dirs().sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+
+# Instance partagée par tous les endpoints
+profile_store = ProfileStore(PROFILE_DIR, PROFILE_MAX_FILES)
+
+# Un seul profileur de boucle d'événements à la fois
+_loop_profiler_lock = threading.Lock()
+
+
+class ProfilingMiddleware:
+    """
+    Middleware ASGI : profile une requête demandée par en-tête, paramètre ou tirage
+
+    - en-tête X-Profile: 1 ou paramètre ?profile=1, avec le jeton d'administration ;
+    - PROFILE_SAMPLE_RATE : proportion de requêtes profilées d'office.
+
+    L'identifiant du profil est renvoyé dans l'en-tête X-Profile-Id.
+    """
+
+    def __init__(self, app, admin_token=None, sample_rate=PROFILE_SAMPLE_RATE, store=profile_store):
+        self.app = app
+        self.admin_token = admin_token
+        self.sample_rate = sample_rate
+        self.store = store
+
+    def _reason(self, scope):
+        headers = dict(scope["headers"])
+        requested = headers.get(b"x-profile") == b"1"
+        if not requested and scope.get("query_string"):
+            requested = parse_qs(scope["query_string"].decode("latin-1")).get("profile") == ["1"]
+        if requested:
+            token = headers.get(b"x-admin-token", b"").decode("latin-1")
+            if self.admin_token is None or token == self.admin_token:
+                return "requested"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        reason = self._reason(scope) if scope["type"] == "http" else None
+        if reason is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(uuid.uuid4().hex, reason)
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile.id.encode())]
+            await send(message)
+
+        token = _current_profile.set(profile)
+        # Le profileur de boucle voit aussi les autres requêtes concurrentes : un seul à la fois
+        if _loop_profiler_lock.acquire(blocking=False):
+            profile.profiler = cProfile.Profile()
+            try:
+                profile.profiler.enable()
+            except ValueError:
+                profile.profiler = None
+                _loop_profiler_lock.release()
+
+        created_at = datetime.now(timezone.utc).isoformat()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            if profile.profiler is not None:
+                profile.profiler.disable()
+                _loop_profiler_lock.release()
+            _current_profile.reset(token)
+
+            metadata = {
+                "id": profile.id,
+                "created_at": created_at,
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status[0],
+                "duration_ms": round(duration * 1000, 1),
+                "reason": reason,
+                "parsing_jobs": profile.jobs,
+                "event_loop_profiled": profile.profiler is not None
+            }
+            stats = profile.build_stats()
+            if stats is not None:
+                try:
+                    await asyncio.to_thread(self.store.save, stats, metadata)
+                except Exception:
+                    logger.exception("Erreur lors de l'enregistrement du profil %s", profile.id)
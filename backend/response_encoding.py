@@ -0,0 +1,198 @@
+import asyncio
+import json
+import os
+import zlib
+from fastapi.responses import JSONResponse
+
+# orjson et brotli sont facultatifs : sans eux, json et gzip sont utilisés
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Configuration de la compression des réponses (surchargée par variables d'environnement)
+RESPONSE_COMPRESSION_ENABLED = os.environ.get("RESPONSE_COMPRESSION_ENABLED", "1") == "1"
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.environ.get("RESPONSE_COMPRESSION_MIN_BYTES", 1024))
+RESPONSE_GZIP_LEVEL = int(os.environ.get("RESPONSE_GZIP_LEVEL", 1))
+RESPONSE_BROTLI_QUALITY = int(os.environ.get("RESPONSE_BROTLI_QUALITY", 4))
+
+# Au-delà de cette taille, un morceau est compressé hors de la boucle
+# d'événements (zlib et brotli libèrent le GIL)
+COMPRESSION_THREAD_BYTES = 256 * 1024
+
+# Types de contenu compressés (préfixes) ; les flux SSE ne le sont jamais,
+# pour que chaque événement parte dès qu'il est produit
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+
+
+def dumps_json(value):
+    """
+    Sérialise une valeur en JSON (UTF-8 sans échappement), avec orjson s'il est installé
+
+    Returns:
+        bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Réponse JSON sérialisée par dumps_json (classe de réponse par défaut de l'application)
+    """
+
+    def render(self, content):
+        return dumps_json(content)
+
+
+def available_encodings():
+    """
+    Encodages proposés, par ordre de préférence
+    """
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding):
+    """
+    Choisit l'encodage de la réponse d'après l'en-tête Accept-Encoding
+
+    Returns:
+        str: "br", "gzip" ou None (réponse non compressée)
+    """
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name.strip():
+            accepted[name.strip().lower()] = quality
+
+    for encoding in available_encodings():
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+class _GzipCompressor:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data, final):
+        # Vidage à chaque morceau d'un flux : le client reçoit les pages au fil de l'eau
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class _BrotliCompressor:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data, final):
+        output = self._compressor.process(data)
+        return output + (self._compressor.finish() if final else self._compressor.flush())
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI : compresse les réponses (brotli ou gzip, selon
+    Accept-Encoding) dont le corps dépasse minimum_size octets
+
+    Les réponses en flux sont compressées morceau par morceau.
+    """
+
+    def __init__(self, app, minimum_size=RESPONSE_COMPRESSION_MIN_BYTES,
+                 gzip_level=RESPONSE_GZIP_LEVEL, brotli_quality=RESPONSE_BROTLI_QUALITY):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _compressor(self, encoding):
+        if encoding == "br":
+            return _BrotliCompressor(self.brotli_quality)
+        return _GzipCompressor(self.gzip_level)
+
+    async def _compress(self, compressor, body, final):
+        if len(body) > COMPRESSION_THREAD_BYTES:
+            return await asyncio.to_thread(compressor.compress, body, final)
+        return compressor.compress(body, final)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = negotiate_encoding(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compressor = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                headers = {name.lower(): value for name, value in message.get("headers", [])}
+                content_type = headers.get(b"content-type", b"").decode("latin-1")
+                content_length = headers.get(b"content-length")
+                passthrough = (
+                    b"content-encoding" in headers
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                    or content_type.startswith(UNCOMPRESSED_TYPES)
+                    or (content_length is not None and int(content_length) < self.minimum_size)
+                )
+                if passthrough:
+                    await send(start)
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                # Corps complet trop petit : envoyé tel quel
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                compressor = self._compressor(encoding)
+                headers = [
+                    (name, value) for name, value in start.get("headers", [])
+                    if name.lower() != b"content-length"
+                ]
+                headers.append((b"content-encoding", encoding.encode("latin-1")))
+                headers.append((b"vary", b"Accept-Encoding"))
+                compressed = await self._compress(compressor, body, not more_body)
+                if not more_body:
+                    headers.append((b"content-length", str(len(compressed)).encode("latin-1")))
+                await send({**start, "headers": headers})
+                await send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+                return
+
+            compressed = await self._compress(compressor, body, not more_body)
+            await send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,241 @@
+import os
+from docx_scanner import iter_docx_placeholders
+from metrics import PLACEHOLDERS_FOUND, stage_timer
+
+# Version de l'analyse, utilisée comme empreinte par le cache d'extraction
+ANALYSIS_VERSION = "template_analysis/2"
+
+# Colonnes d'une occurrence dans l'analyse : paragraph et section sont des
+# indices dans les tables "paragraphs" et "sections" de l'analyse
+OCCURRENCE_FIELDS = (
+    "placeholder", "full_match", "paragraph", "section", "location", "style", "part",
+    "paragraph_index", "table_index", "row_index", "cell_index", "context_before", "context_after"
+)
+
+
+class Occurrence:
+    """
+    Occurrence d'un placeholder dans un template
+
+    Dans l'analyse, chaque occurrence est une ligne (valeurs dans l'ordre de
+    OCCURRENCE_FIELDS) ; cet enregistrement à slots la rend lisible sans
+    créer de dictionnaire par occurrence.
+    """
+    __slots__ = OCCURRENCE_FIELDS
+
+    def __init__(self, placeholder, full_match, paragraph, section, location, style=None, part=None,
+                 paragraph_index=None, table_index=None, row_index=None, cell_index=None,
+                 context_before=None, context_after=None):
+        self.placeholder = placeholder
+        self.full_match = full_match
+        self.paragraph = paragraph
+        self.section = section
+        self.location = location
+        self.style = style
+        self.part = part
+        self.paragraph_index = paragraph_index
+        self.table_index = table_index
+        self.row_index = row_index
+        self.cell_index = cell_index
+        self.context_before = context_before
+        self.context_after = context_after
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(*row)
+
+    def to_row(self):
+        return [getattr(self, name) for name in OCCURRENCE_FIELDS]
+
+
+class Interner:
+    """
+    Table de valeurs distinctes : chaque valeur n'est stockée qu'une fois et
+    référencée par son indice
+    """
+
+    def __init__(self):
+        self.values = []
+        self._indexes = {}
+
+    def add(self, value):
+        index = self._indexes.get(value)
+        if index is None:
+            index = self._indexes[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+
+def _occurrence(occurrence, paragraphs, sections):
+    # Construit l'occurrence ; seuls les champs utiles à son emplacement sont renseignés
+    paragraph = occurrence["paragraph"]
+    record = Occurrence(
+        occurrence["placeholder"],  # Le contenu entre ${ et }
+        occurrence["full_match"],  # ${ et } inclus
+        paragraphs.add(occurrence["paragraph_text"]),
+        sections.add(paragraph["section"]),
+        paragraph["location"]
+    )
+
+    if paragraph["location"] == "paragraph":
+        record.paragraph_index = paragraph["paragraph_index"]
+        record.style = paragraph["style"]
+    elif paragraph["location"] == "table":
+        # Contexte de tableau
+        record.table_index = paragraph["table_index"]
+        record.row_index = paragraph["row_index"]
+        record.cell_index = paragraph["cell_index"]
+        return record
+    else:
+        # Zone de texte, en-tête ou pied de page
+        record.part = paragraph["part"]
+
+    record.context_before = occurrence["context_before"]
+    record.context_after = occurrence["context_after"]
+    return record
+
+
+def analyze_template(docx_source):
+    """
+    Analyse un template Word en un seul passage et produit sa représentation
+    intermédiaire, dont toutes les vues (liste simple, contexte, sections,
+    types, données n8n) sont ensuite dérivées sans relire le document
+
+    Le texte des paragraphes et le nom des sections ne sont stockés qu'une
+    fois, dans des tables référencées par indice depuis chaque occurrence.
+
+    Args:
+        docx_source (str | bytes): Chemin vers le fichier docx ou son contenu
+
+    Returns:
+        dict: {"version", "paragraphs", "sections", "occurrences",
+        "heading_occurrences"} où occurrences contient une ligne par
+        occurrence (voir OCCURRENCE_FIELDS) et heading_occurrences les
+        indices des occurrences situées dans un titre
+    """
+    try:
+        # Vérifier si le fichier existe
+        if isinstance(docx_source, str) and not os.path.exists(docx_source):
+            return {"error": f"Le fichier {docx_source} n'existe pas"}
+
+        paragraphs = Interner()
+        sections = Interner()
+        occurrences = []
+        heading_occurrences = []
+        with stage_timer("docx_scan"):
+            for occurrence in iter_docx_placeholders(docx_source):
+                paragraph = occurrence["paragraph"]
+                if paragraph["heading"] and paragraph["location"] == "paragraph":
+                    heading_occurrences.append(len(occurrences))
+                occurrences.append(_occurrence(occurrence, paragraphs, sections).to_row())
+        PLACEHOLDERS_FOUND.inc(len(occurrences), source="docx")
+
+        return {
+            "version": ANALYSIS_VERSION,
+            "paragraphs": paragraphs.values,
+            "sections": sections.values,
+            "occurrences": occurrences,
+            "heading_occurrences": heading_occurrences
+        }
+
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def iter_occurrences(analysis):
+    """
+    Parcourt les occurrences d'une analyse
+
+    Yields:
+        Occurrence
+    """
+    for row in analysis["occurrences"]:
+        yield Occurrence.from_row(row)
+
+
+def occurrence_record(analysis, occurrence):
+    """
+    Occurrence au format historique de extract_placeholders_with_context
+    (texte du paragraphe et section en clair)
+    """
+    item = {
+        "placeholder": occurrence.placeholder,
+        "full_match": occurrence.full_match,
+        "paragraph_text": analysis["paragraphs"][occurrence.paragraph],
+        "section": analysis["sections"][occurrence.section]
+    }
+
+    if occurrence.location == "paragraph":
+        item.update({
+            "paragraph_index": occurrence.paragraph_index,
+            "context_before": occurrence.context_before,
+            "context_after": occurrence.context_after,
+            "location": "paragraph",
+            "style": occurrence.style
+        })
+    elif occurrence.location == "table":
+        item.update({
+            "location": "table",
+            "table_index": occurrence.table_index,
+            "row_index": occurrence.row_index,
+            "cell_index": occurrence.cell_index
+        })
+    else:
+        item.update({
+            "context_before": occurrence.context_before,
+            "context_after": occurrence.context_after,
+            "location": occurrence.location,
+            "part": occurrence.part
+        })
+    return item
+
+
+def basic_view(analysis):
+    """
+    Vue simple : tous les placeholders, titres compris, dédupliqués dans l'ordre
+    """
+    placeholders = [row[0] for row in analysis["occurrences"]]
+    return {
+        "total_found": len(placeholders),
+        "unique_placeholders": list(dict.fromkeys(placeholders))
+    }
+
+
+def group_occurrences(analysis):
+    """
+    Regroupe les occurrences hors titres par placeholder, dans l'ordre de
+    première apparition
+
+    Returns:
+        dict: placeholder -> liste d'Occurrence
+    """
+    headings = set(analysis["heading_occurrences"])
+    groups = {}
+    for index, occurrence in enumerate(iter_occurrences(analysis)):
+        if index in headings:
+            continue
+        group = groups.get(occurrence.placeholder)
+        if group is None:
+            groups[occurrence.placeholder] = [occurrence]
+        else:
+            group.append(occurrence)
+    return groups
+
+
+def context_view(analysis):
+    """
+    Vue avec contexte : occurrences hors titres regroupées par placeholder
+    """
+    groups = group_occurrences(analysis)
+    return {
+        "total_found": sum(len(group) for group in groups.values()),
+        "unique_count": len(groups),
+        "unique_placeholders": [
+            {
+                "placeholder": ph,
+                "occurrences": len(group),
+                "contexts": [occurrence_record(analysis, occurrence) for occurrence in group]
+            }
+            for ph, group in groups.items()
+        ]
+    }
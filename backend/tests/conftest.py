@@ -0,0 +1,18 @@
+"""
+Configuration commune des tests : modules du backend importables et bases
+SQLite, cache et index dans un répertoire temporaire (fixé avant le premier
+import de main, qui lit ces variables au chargement)
+"""
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "benchmarks"))
+
+_data_dir = tempfile.mkdtemp(prefix="raedificare-tests-")
+os.environ.setdefault("CACHE_DIR", os.path.join(_data_dir, "cache"))
+os.environ.setdefault("CATALOGUE_DB", os.path.join(_data_dir, "catalogue.db"))
+os.environ.setdefault("OUTBOX_DB", os.path.join(_data_dir, "outbox.db"))
+os.environ.setdefault("TEXT_INDEX_DB", os.path.join(_data_dir, "text_index.db"))
@@ -0,0 +1,62 @@
+"""
+Lecture des placeholders DOCX en un passage sur le XML : runs découpés,
+tableaux, en-têtes et pieds de page
+"""
+import io
+
+import docx
+
+from docx_scanner import iter_docx_placeholders
+
+
+def make_template():
+    document = docx.Document()
+    document.add_heading("Présentation ${titre}", level=1)
+
+    # Word découpe souvent un placeholder sur plusieurs runs (mise en forme, correction)
+    paragraph = document.add_paragraph("Projet : ")
+    for piece in ("${nom", "_pro", "jet}", " à ${ville}"):
+        paragraph.add_run(piece).bold = True
+
+    cell = document.add_table(rows=1, cols=2).cell(0, 1).paragraphs[0]
+    cell.add_run("${date_")
+    cell.add_run("rapport}")
+
+    section = document.sections[0]
+    section.header.paragraphs[0].text = "Réf. ${reference}"
+    footer = section.footer.paragraphs[0]
+    footer.add_run("Page ${pa")
+    footer.add_run("ge}")
+
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def test_placeholders_split_across_runs():
+    occurrences = [o for o in iter_docx_placeholders(make_template()) if o["paragraph"]["location"] == "paragraph"]
+    assert [o["placeholder"] for o in occurrences] == ["titre", "nom_projet", "ville"]
+
+    nom_projet = occurrences[1]
+    assert nom_projet["full_match"] == "${nom_projet}"
+    assert nom_projet["paragraph_text"][nom_projet["start"]:nom_projet["end"]] == "${nom_projet}"
+    assert nom_projet["context_before"] == "Projet : "
+    assert nom_projet["paragraph"]["section"] == "Présentation ${titre}"
+
+
+def test_tables_headers_and_footers():
+    occurrences = {o["placeholder"]: o["paragraph"] for o in iter_docx_placeholders(make_template())}
+
+    assert occurrences["date_rapport"]["location"] == "table"
+    assert (occurrences["date_rapport"]["row_index"], occurrences["date_rapport"]["cell_index"]) == (1, 2)
+
+    assert occurrences["reference"]["location"] == "header"
+    assert occurrences["reference"]["section"] == "En-tête"
+    assert occurrences["page"]["location"] == "footer"
+    assert occurrences["page"]["section"] == "Pied de page"
+
+
+def test_skip_headings():
+    placeholders = [o["placeholder"] for o in iter_docx_placeholders(make_template(), skip_headings=True)]
+    assert "titre" not in placeholders
+    assert placeholders == ["nom_projet", "ville", "date_rapport", "reference", "page"]
@@ -0,0 +1,105 @@
+"""
+Cache d'extraction : LRU mémoire, éviction disque et clés
+"""
+import os
+
+from extraction_cache import ExtractionCache, make_cache_key
+
+
+def entry(size):
+    # Valeur dont le JSON fait exactement size octets
+    return "x" * (size - 2)
+
+
+def key(name):
+    return make_cache_key(name * 64, "pdf_text", "layout:v1")
+
+
+def disk_keys(directory):
+    return {
+        name[:-len(".json")]
+        for _, _, files in os.walk(directory)
+        for name in files if name.endswith(".json")
+    }
+
+
+def test_memory_lru_evicts_least_recently_used(tmp_path):
+    cache = ExtractionCache(str(tmp_path), memory_max_bytes=250, disk_max_bytes=10_000)
+    cache.put(key("a"), entry(100))
+    cache.put(key("b"), entry(100))
+    assert cache.get(key("a")) == entry(100)
+    cache.put(key("c"), entry(100))
+
+    # "b" est sorti de la mémoire mais reste sur disque
+    assert cache.get(key("a")) == entry(100)
+    assert cache.get(key("b")) == entry(100)
+    stats = cache.get_stats()
+    assert stats["memory_evictions"] >= 1
+    assert stats["memory_hits"] == 2
+    assert stats["disk_hits"] == 1
+
+
+def test_disk_evicts_least_recently_used(tmp_path):
+    cache = ExtractionCache(str(tmp_path), memory_max_bytes=0, disk_max_bytes=300)
+    for name in "abc":
+        cache.put(key(name), entry(100))
+    # Lire "a" le rend plus récent que "b"
+    assert cache.get(key("a")) is not None
+    cache.put(key("d"), entry(100))
+
+    assert disk_keys(tmp_path) == {key("a"), key("c"), key("d")}
+    assert cache.get(key("b")) is None
+    stats = cache.get_stats()
+    assert stats["disk_evictions"] == 1
+    assert stats["disk_bytes"] == 300
+    assert stats["disk_entries"] == 3
+
+
+def test_overwrite_is_not_counted_twice(tmp_path):
+    cache = ExtractionCache(str(tmp_path), memory_max_bytes=0, disk_max_bytes=300)
+    for _ in range(5):
+        cache.put(key("a"), entry(100))
+    cache.put(key("b"), entry(150))
+    assert cache.get_stats()["disk_bytes"] == 250
+    assert cache.get_stats()["disk_evictions"] == 0
+
+
+def test_disk_index_is_rebuilt_at_startup_without_temporary_files(tmp_path):
+    cache = ExtractionCache(str(tmp_path), memory_max_bytes=0, disk_max_bytes=1000)
+    cache.put(key("a"), entry(100))
+    cache.put(key("b"), entry(100))
+    # L'ordre d'utilisation est relu dans les dates de modification
+    os.utime(cache._path(key("a")), (1000, 1000))
+    os.utime(cache._path(key("b")), (2000, 2000))
+    # Écriture interrompue d'un autre processus
+    tmp_file = os.path.join(str(tmp_path), key("c")[:2], key("c") + ".json.123.456.tmp")
+    os.makedirs(os.path.dirname(tmp_file), exist_ok=True)
+    with open(tmp_file, "wb") as f:
+        f.write(b"x" * 5000)
+
+    restarted = ExtractionCache(str(tmp_path), memory_max_bytes=0, disk_max_bytes=250)
+    restarted.put(key("d"), entry(100))
+
+    assert os.path.exists(tmp_file)
+    assert disk_keys(tmp_path) == {key("b"), key("d")}
+    assert restarted.get_stats()["disk_bytes"] == 200
+
+
+def test_cache_key_changes_with_parser_version(tmp_path):
+    cache = ExtractionCache(str(tmp_path), memory_max_bytes=10_000, disk_max_bytes=10_000)
+    sha256 = "a" * 64
+    cache.put(make_cache_key(sha256, "pdf_text", "layout:v1"), {"text": "ancien"})
+
+    assert cache.get(make_cache_key(sha256, "pdf_text", "layout:v2")) is None
+    assert cache.get(make_cache_key(sha256, "pdf_placeholders", "layout:v1")) is None
+    assert cache.get(make_cache_key(sha256, "pdf_text", "layout:v1")) == {"text": "ancien"}
+
+
+def test_purge_empties_both_levels(tmp_path):
+    cache = ExtractionCache(str(tmp_path), memory_max_bytes=10_000, disk_max_bytes=10_000)
+    cache.put(key("a"), entry(100))
+    cache.put(key("b"), entry(100))
+
+    assert cache.purge() == {"memory_entries": 2, "disk_entries": 2}
+    assert cache.get(key("a")) is None
+    assert cache.get_stats()["disk_bytes"] == 0
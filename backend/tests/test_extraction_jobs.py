@@ -0,0 +1,100 @@
+"""
+Jobs d'extraction : file bornée (429) et nombre de résultats gardés
+"""
+import asyncio
+
+import pytest
+
+from extraction_jobs import JobManager, JobQueueFullError, SUCCEEDED, QUEUED, RUNNING, RETRY_AFTER_MIN, RETRY_AFTER_MAX
+from upload_ingestion import IngestedUpload
+
+
+def make_upload():
+    return IngestedUpload("rapport.pdf", 4, "a" * 64, data=b"%PDF")
+
+
+def test_full_queue_is_rejected():
+    async def scenario():
+        manager = JobManager(max_queued=1, concurrency=1, result_ttl=3600, max_retained=10)
+        await manager.start()
+        release = asyncio.Event()
+
+        async def runner(job, upload):
+            await release.wait()
+            return {"ok": True}
+
+        try:
+            running = manager.submit("pdf_text", "a.pdf", runner, make_upload())
+            await asyncio.sleep(0)
+            queued = manager.submit("pdf_text", "b.pdf", runner, make_upload())
+            assert (running.status, queued.status) == (RUNNING, QUEUED)
+
+            with pytest.raises(JobQueueFullError) as error:
+                manager.submit("pdf_text", "c.pdf", runner, make_upload())
+            assert RETRY_AFTER_MIN <= error.value.retry_after <= RETRY_AFTER_MAX
+            assert len(manager.jobs) == 2
+
+            release.set()
+            await manager._queue.join()
+            assert running.status == queued.status == SUCCEEDED
+            # L'upload est libéré à la fin du job
+            assert running.upload is None
+        finally:
+            await manager.stop()
+
+    asyncio.run(scenario())
+
+
+def test_endpoint_returns_429_with_retry_after(monkeypatch):
+    from fastapi.testclient import TestClient
+    import main
+
+    def full(kind, filename, runner, upload):
+        raise JobQueueFullError(7)
+
+    monkeypatch.setattr(main.job_manager, "submit", full)
+    response = TestClient(main.app).post("/jobs/extract-pdf-text/", files={"file": ("rapport.pdf", b"%PDF")})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "7"
+
+
+def test_finished_jobs_are_capped():
+    async def scenario():
+        manager = JobManager(max_queued=10, concurrency=1, result_ttl=3600, max_retained=2)
+        await manager.start()
+
+        async def runner(job, upload):
+            return {"text": job.filename}
+
+        try:
+            jobs = [manager.submit("pdf_text", f"{n}.pdf", runner, make_upload()) for n in range(5)]
+            await manager._queue.join()
+        finally:
+            await manager.stop()
+        return manager, jobs
+
+    manager, jobs = asyncio.run(scenario())
+    # Seuls les deux jobs terminés les plus récents sont gardés
+    assert set(manager.jobs) == {jobs[3].id, jobs[4].id}
+    assert manager.get(jobs[0].id) is None
+    assert manager.get(jobs[4].id).result == {"text": "4.pdf"}
+
+
+def test_expired_results_are_forgotten():
+    async def scenario():
+        manager = JobManager(max_queued=10, concurrency=1, result_ttl=0, max_retained=10)
+        await manager.start()
+
+        async def runner(job, upload):
+            return {}
+
+        try:
+            job = manager.submit("pdf_text", "a.pdf", runner, make_upload())
+            await manager._queue.join()
+        finally:
+            await manager.stop()
+        return manager, job
+
+    manager, job = asyncio.run(scenario())
+    job.finished_at -= 1
+    assert manager.get(job.id) is None
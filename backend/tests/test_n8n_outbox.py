@@ -0,0 +1,163 @@
+"""
+Outbox n8n : reprises, lettres mortes, coupe-circuit et rétention des
+livraisons réussies
+"""
+import asyncio
+import time
+
+import httpx
+
+from n8n_outbox import (
+    OutboxStore, N8nDispatcher, CircuitBreaker, DELIVERED, DEAD, PENDING, N8N_MAX_ATTEMPTS
+)
+
+URL = "http://n8n.test/webhook"
+
+
+def make_store(tmp_path):
+    return OutboxStore(str(tmp_path / "outbox.db"))
+
+
+def test_delivered_payload_is_cleared(tmp_path):
+    store = make_store(tmp_path)
+    delivery_id = store.enqueue(URL, {"text": "x" * 10000})
+    store.mark_delivered(delivery_id, 200, "ok")
+
+    conn = store._connect()
+    try:
+        row = conn.execute("SELECT status, payload, payload_bytes FROM deliveries WHERE id = ?", (delivery_id,)).fetchone()
+    finally:
+        conn.close()
+    assert row["status"] == DELIVERED
+    assert row["payload"] == ""
+    assert row["payload_bytes"] > 10000
+
+
+def test_purge_delivered_keeps_recent_and_dead_letters(tmp_path):
+    store = make_store(tmp_path)
+    old = store.enqueue(URL, {"n": 1})
+    recent = store.enqueue(URL, {"n": 2})
+    dead = store.enqueue(URL, {"n": 3})
+    store.mark_delivered(old, 200, "ok")
+    store.mark_delivered(recent, 200, "ok")
+    store.mark_failed(dead, "Erreur n8n: 400", 400)
+    store._execute("UPDATE deliveries SET delivered_at = delivered_at - 10 * 86400 WHERE id = ?", (old,))
+
+    assert store.purge_delivered(7 * 86400) == 1
+    assert store.get(old) is None
+    assert store.get(recent)["status"] == DELIVERED
+    assert store.get(dead)["status"] == DEAD
+
+
+def make_dispatcher(store, handler):
+    dispatcher = N8nDispatcher(store)
+    dispatcher.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return dispatcher
+
+
+def deliver(dispatcher, delivery_id):
+    async def run():
+        row = dict(dispatcher.store._query(
+            "SELECT id, url, payload, attempts, batch, payload_bytes FROM deliveries WHERE id = ?", (delivery_id,)
+        )[0])
+        try:
+            await dispatcher._deliver(row)
+        finally:
+            await dispatcher.client.aclose()
+    asyncio.run(run())
+
+
+def next_attempt_at(store, delivery_id):
+    return store._query("SELECT next_attempt_at FROM deliveries WHERE id = ?", (delivery_id,))[0]["next_attempt_at"]
+
+
+def test_temporary_error_is_retried_later(tmp_path):
+    store = make_store(tmp_path)
+    delivery_id = store.enqueue(URL, {"n": 1})
+    deliver(make_dispatcher(store, lambda request: httpx.Response(503, text="indisponible")), delivery_id)
+
+    delivery = store.get(delivery_id)
+    assert delivery["status"] == PENDING
+    assert delivery["attempts"] == 1
+    assert delivery["last_status_code"] == 503
+    assert next_attempt_at(store, delivery_id) > time.time()
+
+
+def test_permanent_error_goes_to_dead_letters(tmp_path):
+    store = make_store(tmp_path)
+    delivery_id = store.enqueue(URL, {"n": 1})
+    deliver(make_dispatcher(store, lambda request: httpx.Response(400, text="payload invalide")), delivery_id)
+
+    delivery = store.get(delivery_id)
+    assert delivery["status"] == DEAD
+    assert delivery["last_error"] == "Erreur n8n: payload invalide"
+
+    # Une lettre morte se rejoue avec un compteur de tentatives remis à zéro
+    assert store.requeue(delivery_id)
+    assert store.get(delivery_id)["attempts"] == 0
+
+
+def test_last_attempt_goes_to_dead_letters(tmp_path):
+    store = make_store(tmp_path)
+    delivery_id = store.enqueue(URL, {"n": 1})
+    store._execute("UPDATE deliveries SET attempts = ? WHERE id = ?", (N8N_MAX_ATTEMPTS - 1, delivery_id))
+    deliver(make_dispatcher(store, lambda request: httpx.Response(503)), delivery_id)
+
+    assert store.get(delivery_id)["status"] == DEAD
+
+
+def test_open_breaker_postpones_without_sending(tmp_path):
+    store = make_store(tmp_path)
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, text="ok")
+
+    dispatcher = make_dispatcher(store, handler)
+    breaker = dispatcher.breaker(URL)
+    for _ in range(breaker.threshold):
+        breaker.record_failure()
+    assert breaker.state == "open"
+
+    delivery_id = store.enqueue(URL, {"n": 1})
+    deliver(dispatcher, delivery_id)
+
+    assert requests == []
+    delivery = store.get(delivery_id)
+    assert delivery["status"] == PENDING
+    assert delivery["attempts"] == 0
+    assert abs(next_attempt_at(store, delivery_id) - breaker.retry_at) < 1
+
+
+def test_half_open_breaker_postpones_behind_the_probe():
+    breaker = CircuitBreaker(threshold=1, cooldown=60)
+    breaker.record_failure()
+    breaker.opened_at -= 61
+    assert breaker.state == "half_open"
+
+    # Le premier appel est l'essai ; les suivants attendent un délai complet
+    assert breaker.allow()
+    assert not breaker.allow()
+    assert breaker.retry_at < time.time()
+    assert breaker.postpone_until() >= time.time() + 59
+
+    # Échec de l'essai : le circuit se rouvre
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_successful_probe_closes_breaker(tmp_path):
+    store = make_store(tmp_path)
+    dispatcher = make_dispatcher(store, lambda request: httpx.Response(200, text="ok"))
+    breaker = dispatcher.breaker(URL)
+    for _ in range(breaker.threshold):
+        breaker.record_failure()
+    breaker.opened_at -= breaker.cooldown + 1
+
+    delivery_id = store.enqueue(URL, {"n": 1})
+    deliver(dispatcher, delivery_id)
+
+    assert store.get(delivery_id)["status"] == DELIVERED
+    assert breaker.state == "closed"
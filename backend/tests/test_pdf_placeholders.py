@@ -0,0 +1,67 @@
+"""
+Index des placeholders PDF : pages, positions dans le texte et boîtes englobantes
+"""
+import pytest
+
+from corpus import make_pdf
+from pdf_extractors import extract_page_range
+from pdf_placeholders import PlaceholderIndex, clean_placeholder, index_pdf_placeholders, merge_placeholder_indexes
+
+# Lignes tracées à partir de y = 800, avec un interligne de 11 points
+# (voir corpus._page_content) ; un placeholder tous les 9 lignes à partir de la 5e
+LINES_PER_PAGE = 30
+PLACEHOLDER_LINES = [4, 13, 22]
+
+
+def line_baseline(line):
+    return 800 - 11 * (line + 1)
+
+
+def test_clean_placeholder_rejoins_line_breaks():
+    assert clean_placeholder(" nom_projet ") == "nom_projet"
+    assert clean_placeholder("nom_du_\nchamp") == "nom_du_champ"
+    assert clean_placeholder("Nom du\nclient") == "Nom du client"
+
+
+def test_offsets_and_boxes_from_characters():
+    index = PlaceholderIndex()
+    text = "Client : {{nom}} / {{ville}}"
+    boxes = [[10.0 * i, 100.0, 10.0 * i + 8, 110.0] for i in range(len(text))]
+    index.add_page(2, text, boxes)
+    index.add_page(3, "Sans position {{nom}}")
+
+    result = index.to_dict()
+    assert result["placeholders"] == ["nom", "ville"]
+    assert result["total_found"] == 3
+    first, second, third = result["occurrences"]
+    assert (first["page"], first["offset"], first["bbox"]) == (2, 9, [90.0, 100.0, 158.0, 110.0])
+    assert text[second["offset"]:].startswith("{{ville}}")
+    assert (third["page"], third["bbox"]) == (3, None)
+
+
+@pytest.mark.parametrize("mode", ["layout", "fast"])
+def test_pdf_positions(mode):
+    pdf = make_pdf(pages=3, lines_per_page=LINES_PER_PAGE, placeholders=True, seed=4)
+    result = index_pdf_placeholders(pdf, mode)
+    page_texts = extract_page_range(pdf, 1, 3, mode)
+
+    assert result["total_pages"] == 3
+    assert result["total_found"] == 3 * len(PLACEHOLDER_LINES)
+    for number, occurrence in enumerate(result["occurrences"]):
+        text = page_texts[occurrence["page"] - 1]
+        assert text[occurrence["offset"]:].startswith("{{" + occurrence["placeholder"] + "}}")
+
+        x0, y0, x1, y1 = occurrence["bbox"]
+        assert occurrence["page"] == number // len(PLACEHOLDER_LINES) + 1
+        assert 50 < x0 < x1 < 595
+        assert abs(y0 - line_baseline(PLACEHOLDER_LINES[number % len(PLACEHOLDER_LINES)])) < 3
+        assert y0 < y1
+
+
+def test_page_ranges_merge_like_a_single_pass():
+    pdf = make_pdf(pages=4, lines_per_page=LINES_PER_PAGE, placeholders=True, seed=5)
+    whole = index_pdf_placeholders(pdf, "fast")
+    parts = [index_pdf_placeholders(pdf, "fast", (1, 2)), index_pdf_placeholders(pdf, "fast", (3, 4))]
+
+    assert [occurrence["page"] for occurrence in parts[1]["occurrences"]][0] == 3
+    assert merge_placeholder_indexes(parts, "fast") == whole
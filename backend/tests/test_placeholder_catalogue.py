@@ -0,0 +1,21 @@
+"""
+Catalogue des placeholders : résolution de l'alias "latest"
+"""
+from corpus import make_docx
+from placeholder_catalogue import PlaceholderCatalogue
+from template_analysis import analyze_template
+
+
+def test_latest_is_the_last_template_added(tmp_path):
+    catalogue = PlaceholderCatalogue(str(tmp_path / "catalogue.db"))
+    old = analyze_template(make_docx(paragraphs=20, tables=1, seed=1))
+    new = analyze_template(make_docx(paragraphs=20, tables=1, seed=2))
+
+    catalogue.record_template("a" * 64, "v1.docx", old)
+    catalogue.record_template("b" * 64, "v2.docx", new)
+    assert catalogue.resolve("latest") == "b" * 64
+
+    # Ré-analyser l'ancienne version ne la rend pas "latest"
+    catalogue.record_template("a" * 64, "v1.docx", old)
+    assert catalogue.resolve("latest") == "b" * 64
+    assert catalogue.resolve("c" * 64) == "c" * 64
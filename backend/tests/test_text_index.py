@@ -0,0 +1,104 @@
+"""
+Index plein texte des PDF extraits : recherche et réindexation
+"""
+import pytest
+
+from extract_pdf_pages import join_pages
+from text_index import TextSearchIndex, InvalidSearchQueryError, build_match_query
+
+REPORT = [
+    "Repérage amiante avant travaux.\nToiture en fibres-ciment.",
+    "Étanchéité de la toiture terrasse : présence d'amiante dans le bitume.",
+    "Menuiseries aluminium, double vitrage.",
+]
+
+
+def make_index(tmp_path):
+    return TextSearchIndex(str(tmp_path / "text_index.db"))
+
+
+def record(index, sha256, pages, mode="layout", version="layout:1"):
+    result = {"text": join_pages(pages), "extraction_mode": mode}
+    return index.record_document(sha256, f"{sha256[:4]}.pdf", result, version)
+
+
+def test_search_ranks_pages_and_ignores_accents(tmp_path):
+    index = make_index(tmp_path)
+    record(index, "a" * 64, REPORT)
+
+    hits = index.search("etancheite toiture")
+    assert [hit["page"] for hit in hits] == [2]
+    assert hits[0]["sha256"] == "a" * 64
+    assert "<mark>Étanchéité</mark>" in hits[0]["snippet"]
+
+    assert {hit["page"] for hit in index.search("amiante")} == {1, 2}
+    assert [hit["page"] for hit in index.search("vitr*")] == [3]
+    assert index.search("plomb") == []
+
+
+def test_search_filters_by_document_and_paginates(tmp_path):
+    index = make_index(tmp_path)
+    record(index, "a" * 64, REPORT)
+    record(index, "b" * 64, ["Diagnostic amiante du sous-sol."])
+
+    assert {hit["sha256"] for hit in index.search("amiante")} == {"a" * 64, "b" * 64}
+    assert {hit["sha256"] for hit in index.search("amiante", sha256="b" * 64)} == {"b" * 64}
+
+    all_hits = index.search("amiante", limit=10)
+    assert len(all_hits) == 3
+    assert index.search("amiante", limit=1, offset=1) == all_hits[1:2]
+    # Le score croît avec la pertinence
+    assert [hit["score"] for hit in all_hits] == sorted((hit["score"] for hit in all_hits), reverse=True)
+
+
+def test_query_syntaxes():
+    # Syntaxe simple : mots cités, les opérateurs FTS5 sont des mots ordinaires
+    assert build_match_query("amiante OR plomb") == '"amiante" "OR" "plomb"'
+    assert build_match_query("toit*") == '"toit"*'
+    assert build_match_query("NEAR(a b)", "fts5") == "NEAR(a b)"
+    with pytest.raises(InvalidSearchQueryError):
+        build_match_query("  ?! ")
+
+
+def test_invalid_fts5_query(tmp_path):
+    index = make_index(tmp_path)
+    record(index, "a" * 64, REPORT)
+    assert {hit["page"] for hit in index.search("amiante OR vitrage", "fts5")} == {1, 2, 3}
+    with pytest.raises(InvalidSearchQueryError):
+        index.search('"amiante', "fts5")
+
+
+def test_alternating_modes_does_not_reindex(tmp_path):
+    index = make_index(tmp_path)
+    assert record(index, "a" * 64, REPORT)
+    # Même fichier extrait en mode fast : le texte layout reste indexé
+    assert not record(index, "a" * 64, ["texte fast"], mode="fast", version="fast:1")
+    assert not record(index, "a" * 64, REPORT)
+    assert index.search("fast") == []
+    assert index.list_documents()[0]["extraction_mode"] == "layout"
+
+    # Nouvelle version de l'extracteur du mode indexé : le texte est remplacé
+    assert record(index, "a" * 64, ["Rapport réécrit."], version="layout:2")
+    assert [hit["page"] for hit in index.search("reecrit")] == [1]
+    assert index.search("amiante") == []
+
+
+def test_delete_document(tmp_path):
+    index = make_index(tmp_path)
+    record(index, "a" * 64, REPORT)
+    assert index.count_documents() == 1
+    assert index.delete_document("a" * 64)
+    assert not index.delete_document("a" * 64)
+    assert index.search("amiante") == []
+    assert index.count_documents() == 0
+
+
+def test_search_endpoint_rejects_invalid_queries():
+    from fastapi.testclient import TestClient
+    from main import app
+
+    client = TestClient(app)
+    assert client.get("/search", params={"q": "?!"}).status_code == 400
+    assert client.get("/search", params={"q": '"amiante', "syntax": "fts5"}).status_code == 400
+    assert client.get("/search", params={"q": "amiante", "syntax": "regex"}).status_code == 400
+    assert client.get("/search", params={"q": "amiante"}).json()["count"] == 0
@@ -0,0 +1,65 @@
+"""
+Ingestion des uploads : taille maximale et bascule sur disque
+"""
+import asyncio
+import glob
+import hashlib
+import io
+import os
+import tempfile
+
+import pytest
+from starlette.datastructures import UploadFile
+
+import upload_ingestion
+from upload_ingestion import ingest_upload, ingest_file, UploadTooLargeError
+
+
+def ingest(content, **kwargs):
+    return asyncio.run(ingest_upload(UploadFile(io.BytesIO(content), filename="rapport.pdf"), suffix=".pdf", **kwargs))
+
+
+def spilled_files():
+    return set(glob.glob(os.path.join(tempfile.gettempdir(), "*.pdf")))
+
+
+def test_small_upload_stays_in_memory():
+    content = b"%PDF-1.4 petit fichier"
+    with ingest(content, memory_max_bytes=1024) as upload:
+        assert upload.path is None
+        assert upload.source == content
+        assert upload.size == len(content)
+        assert upload.sha256 == hashlib.sha256(content).hexdigest()
+        assert upload.open().read() == content
+
+
+def test_large_upload_spills_to_disk():
+    content = os.urandom(3 * upload_ingestion.UPLOAD_CHUNK_SIZE + 17)
+    upload = ingest(content, memory_max_bytes=upload_ingestion.UPLOAD_CHUNK_SIZE)
+    try:
+        assert upload.path is not None and upload.path.endswith(".pdf")
+        assert upload.source == upload.path
+        assert upload.sha256 == hashlib.sha256(content).hexdigest()
+        with upload.open() as f:
+            assert f.read() == content
+    finally:
+        upload.close()
+    assert not os.path.exists(upload.path or "")
+
+
+def test_too_large_upload_is_rejected_without_leftover():
+    before = spilled_files()
+    with pytest.raises(UploadTooLargeError):
+        ingest(b"x" * 5000, max_bytes=4096, memory_max_bytes=1024)
+    with pytest.raises(UploadTooLargeError):
+        ingest_file(io.BytesIO(b"x" * 5000), "entree.pdf", suffix=".pdf", max_bytes=4096, memory_max_bytes=1024)
+    assert spilled_files() <= before
+
+
+def test_endpoint_returns_413(monkeypatch):
+    from fastapi.testclient import TestClient
+    from main import app
+
+    monkeypatch.setattr(upload_ingestion, "UPLOAD_MAX_BYTES", 1024)
+    response = TestClient(app).post("/extract-pdf-text/", files={"file": ("rapport.pdf", b"%PDF" + b"x" * 2048)})
+    assert response.status_code == 413
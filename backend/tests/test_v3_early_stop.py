@@ -0,0 +1,68 @@
+"""
+Extraction V3 : exécution dans l'exécuteur de parsing et arrêt anticipé
+"""
+from fastapi.testclient import TestClient
+
+import main
+from corpus import make_pdf
+from main import app, extract_pdf_v3_until_found
+from parsing_executor import ParsingTimeoutError
+
+# Chaque page du corpus a un libellé toutes les 12 lignes : "Nom du projet"
+# apparaît dès la première page, "Nom du site" jamais
+PDF = make_pdf(pages=6, seed=3)
+
+
+def test_stops_when_wanted_fields_are_found():
+    result = extract_pdf_v3_until_found(PDF, ("nom_projet",), page_budget=10, mode="fast")
+    assert result["stop_reason"] == "fields_found"
+    assert len(result["pages"]) == 1
+    # Seules les règles des champs voulus sont évaluées
+    assert list(result["v3_fields"]) == ["nom_projet"]
+
+
+def test_stops_at_page_budget_or_end_of_document():
+    result = extract_pdf_v3_until_found(PDF, ("nom_projet", "nom_du_site"), page_budget=3, mode="fast")
+    assert (result["stop_reason"], len(result["pages"])) == ("page_budget", 3)
+    assert "nom_du_site" not in result["v3_fields"]
+
+    result = extract_pdf_v3_until_found(PDF, ("nom_du_site",), page_budget=10, mode="fast", pages=(5, None))
+    assert (result["stop_reason"], len(result["pages"])) == ("end_of_document", 2)
+
+
+def test_pdf_endpoint_with_stop_when_found():
+    client = TestClient(app)
+    response = client.post(
+        "/process-pdf-for-v3/?mode=fast&stop_when_found=true&fields=nom_projet",
+        files={"file": ("rapport.pdf", PDF)}
+    ).json()
+    assert response["stop_reason"] == "fields_found"
+    assert response["missing_fields"] == []
+    assert response["total_pages"] == 1
+    assert response["text_handle"] is None
+    assert list(response["data"]) == ["nom_projet"]
+
+
+def test_text_extraction_runs_in_the_executor(monkeypatch):
+    calls = []
+    run_parsing = main.run_parsing
+
+    async def recording_run_parsing(func, *args, **kwargs):
+        calls.append((func.__name__, kwargs.get("size")))
+        return await run_parsing(func, *args, **kwargs)
+
+    monkeypatch.setattr(main, "run_parsing", recording_run_parsing)
+    text = "Nom du projet : Résidence Les Pins\n"
+    response = TestClient(app).post("/process-text-for-v3/", json={"text": text, "fields_wanted": ["nom_projet"]})
+
+    assert response.json()["data"] == {"nom_projet": "Résidence Les Pins"}
+    assert calls == [("extract_v3_fields", len(text))]
+
+
+def test_text_extraction_timeout_is_504(monkeypatch):
+    async def timeout(func, *args, **kwargs):
+        raise ParsingTimeoutError("Délai dépassé")
+
+    monkeypatch.setattr(main, "run_parsing", timeout)
+    response = TestClient(app).post("/process-text-for-v3/", json={"text": "Nom du projet : X"})
+    assert response.status_code == 504
@@ -0,0 +1,72 @@
+"""
+Régressions de l'extraction des champs V3 par libellés
+
+Usage (depuis backend/) :
+    python -m pytest tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from v3_rules import extract_v3_fields
+
+
+def test_sentence_starting_with_single_word_label_is_not_a_value():
+    text = (
+        "Projet de rénovation du bâtiment B.\n"
+        "Nom du projet : Résidence Les Pins\n"
+        "Site très fréquenté par le public.\n"
+    )
+    fields = extract_v3_fields(text)
+    # La phrase ne masque plus le vrai libellé situé plus bas
+    assert fields["nom_projet"] == "Résidence Les Pins"
+    assert "nom_du_site" not in fields
+
+
+def test_single_word_label_with_explicit_separator():
+    text = "Projet : Résidence Les Pins\nSite\nCampus Nord\nUsage   Bureaux\n"
+    fields = extract_v3_fields(text)
+    assert fields["nom_projet"] == "Résidence Les Pins"
+    # Libellé seul sur sa ligne : valeur sur la ligne suivante
+    assert fields["nom_du_site"] == "Campus Nord"
+    # Colonne séparée par un large espace
+    assert fields["Usage_actuel_ou_ancien_usage"] == "Bureaux"
+
+
+def test_multi_word_label_requires_a_separator():
+    text = (
+        "Nature des travaux envisagés sur le site : démolition partielle.\n"
+        "Etanchéité de toiture refaite en 2015 sur le bâtiment A.\n"
+        "Nature des travaux   Réhabilitation\n"
+    )
+    fields = extract_v3_fields(text)
+    # La phrase n'est pas prise pour une valeur ; la colonne l'est
+    assert fields["nature_opération"] == "Réhabilitation"
+    assert "étanchéités_de_toiture" not in fields
+
+
+def test_full_extraction_keeps_legacy_keys():
+    from fastapi.testclient import TestClient
+    from main import app
+
+    text = (
+        "Maître d'ouvrage : Métropole de Lyon\n"
+        "Adresse : 12 rue des Lilas\n"
+        "Ville : Lyon 69003\n"
+        "Référence : DIAG-2024-017\n"
+        "Immeuble de bureaux de 1972.\n"
+    )
+    client = TestClient(app)
+    data = client.post("/process-text-for-v3/", json={"text": text}).json()["data"]
+    assert data["maitre_ouvrage"] == "Métropole de Lyon"
+    assert data["adresse_chantier"] == "12 rue des Lilas"
+    assert data["ville"] == "Lyon 69003"
+    assert data["code_postal"] == "69003"
+    assert data["reference_projet"] == "DIAG-2024-017"
+    assert data["type_batiment"] == "Immeuble"
+    assert data["nom_MO"] == "Métropole de Lyon"
+
+    # Mise à jour incrémentale : seuls les champs voulus
+    data = client.post("/process-text-for-v3/", json={"text": text, "fields_wanted": ["nom_MO"]}).json()["data"]
+    assert data == {"nom_MO": "Métropole de Lyon"}
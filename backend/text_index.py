@@ -0,0 +1,269 @@
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from extract_pdf_pages import split_pages
+
+# Emplacement de l'index plein texte (surchargé par variables d'environnement)
+TEXT_INDEX_DB = os.environ.get("TEXT_INDEX_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "text_index.db"))
+TEXT_INDEX_ENABLED = os.environ.get("TEXT_INDEX_ENABLED", "1") == "1"
+
+# Marqueurs des termes trouvés dans les extraits, et taille d'un extrait (en mots)
+SNIPPET_START = "<mark>"
+SNIPPET_END = "</mark>"
+SNIPPET_TOKENS = 16
+
+# Syntaxes de requête : "simple" (mots, tous requis, préfixe avec *) ou
+# "fts5" (syntaxe complète de SQLite FTS5 : OR, NOT, NEAR, "expressions")
+SEARCH_SYNTAXES = ("simple", "fts5")
+
+# Le texte d'une page est indexé sans accents ni casse : "amiante" trouve
+# "Amiante" et "etancheite" trouve "étanchéité". La ligne de page_text a le
+# même rowid que la ligne de document_pages qui la situe.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    sha256 TEXT NOT NULL UNIQUE,
+    filename TEXT,
+    extraction_mode TEXT,
+    text_version TEXT,
+    total_pages INTEGER,
+    first_seen_at TEXT,
+    last_seen_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_documents_last_seen ON documents(last_seen_at);
+
+CREATE TABLE IF NOT EXISTS document_pages (
+    id INTEGER PRIMARY KEY,
+    document_id INTEGER NOT NULL,
+    page INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_document_pages_document ON document_pages(document_id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS page_text USING fts5(
+    text,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# Mot d'une requête simple, éventuellement suivi de * (recherche par préfixe)
+QUERY_TERM = re.compile(r"\w+\*?")
+
+
+class InvalidSearchQueryError(Exception):
+    """
+    Requête de recherche vide ou invalide
+    """
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def build_match_query(query, syntax="simple"):
+    """
+    Traduit une requête en expression MATCH de FTS5
+
+    En syntaxe "simple", chaque mot est cité (la ponctuation et les mots-clés
+    FTS5 n'ont pas d'effet) et tous les mots sont requis.
+    """
+    if syntax == "fts5":
+        if not query.strip():
+            raise InvalidSearchQueryError("La requête de recherche est vide")
+        return query
+
+    terms = []
+    for term in QUERY_TERM.findall(query):
+        prefix = term.endswith("*")
+        terms.append('"{}"{}'.format(term.rstrip("*"), "*" if prefix else ""))
+    if not terms:
+        raise InvalidSearchQueryError("La requête de recherche ne contient aucun mot")
+    return " ".join(terms)
+
+
+class TextSearchIndex:
+    """
+    Index plein texte persistant des textes PDF extraits, page par page
+
+    Chaque document est identifié par l'empreinte SHA-256 de son fichier et
+    n'est indexé qu'une fois par version du texte : une recherche ne relit ni
+    ne re-parse aucun PDF. Un document garde le texte du mode d'extraction
+    (layout ou fast) avec lequel il a été indexé en premier.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._initialized = False
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if not self._initialized:
+            with self._lock:
+                if not self._initialized:
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                    with sqlite3.connect(self.path) as conn:
+                        conn.execute("PRAGMA journal_mode=WAL")
+                        conn.executescript(SCHEMA)
+                    self._initialized = True
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _delete_pages(self, conn, document_id):
+        conn.execute(
+            "DELETE FROM page_text WHERE rowid IN (SELECT id FROM document_pages WHERE document_id = ?)", (document_id,)
+        )
+        conn.execute("DELETE FROM document_pages WHERE document_id = ?", (document_id,))
+
+    def record_document(self, sha256, filename, result, text_version):
+        """
+        Indexe (ou rafraîchit) le texte d'un PDF extrait
+
+        Args:
+            sha256 (str): Empreinte SHA-256 du fichier PDF
+            filename (str): Nom du fichier uploadé
+            result (dict): Résultat d'extraction du document complet ("text", "extraction_mode")
+            text_version (str): Empreinte du texte produit (voir pdf_text_version)
+
+        Le texte n'est réindexé que si celui du mode déjà indexé a changé (nouvelle
+        version de l'extracteur) : extraire le même PDF alternativement en mode
+        layout et fast ne remplace pas le texte indexé à chaque passage.
+
+        Returns:
+            bool: True si le texte a été (ré)indexé, False s'il l'était déjà
+        """
+        now = _now()
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute(
+                    "SELECT id, extraction_mode, text_version FROM documents WHERE sha256 = ?", (sha256,)
+                ).fetchone()
+
+                # Document déjà indexé avec le même texte, ou avec un autre mode :
+                # seule la date de dernier passage change
+                if row is not None and (
+                    row["text_version"] == text_version or row["extraction_mode"] != result.get("extraction_mode")
+                ):
+                    conn.execute(
+                        "UPDATE documents SET filename = ?, last_seen_at = ? WHERE id = ?", (filename, now, row["id"])
+                    )
+                    return False
+
+                page_texts = split_pages(result["text"])
+                if row is None:
+                    document_id = conn.execute(
+                        "INSERT INTO documents (sha256, filename, extraction_mode, text_version, total_pages, first_seen_at, last_seen_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (sha256, filename, result.get("extraction_mode"), text_version, len(page_texts), now, now)
+                    ).lastrowid
+                else:
+                    document_id = row["id"]
+                    self._delete_pages(conn, document_id)
+                    conn.execute(
+                        "UPDATE documents SET filename = ?, extraction_mode = ?, text_version = ?, total_pages = ?, "
+                        "last_seen_at = ? WHERE id = ?",
+                        (filename, result.get("extraction_mode"), text_version, len(page_texts), now, document_id)
+                    )
+
+                for page_number, text in enumerate(page_texts, 1):
+                    if not text.strip():
+                        continue
+                    page_id = conn.execute(
+                        "INSERT INTO document_pages (document_id, page) VALUES (?, ?)", (document_id, page_number)
+                    ).lastrowid
+                    conn.execute("INSERT INTO page_text (rowid, text) VALUES (?, ?)", (page_id, text))
+                return True
+        finally:
+            conn.close()
+
+    def search(self, query, syntax="simple", limit=20, offset=0, sha256=None):
+        """
+        Recherche des pages, classées par pertinence (BM25)
+
+        Args:
+            query (str): Requête (voir SEARCH_SYNTAXES)
+            syntax (str): "simple" ou "fts5"
+            limit (int): Nombre maximal de résultats
+            offset (int): Nombre de résultats sautés (pagination)
+            sha256 (str): Limite la recherche à un document
+
+        Returns:
+            list: Pages trouvées (document, page, score, extrait), la plus pertinente en premier
+        """
+        match = build_match_query(query, syntax)
+        # Le tri par rank est fait par FTS5 : les extraits ne sont calculés
+        # que pour les pages retournées
+        where = "page_text MATCH ?"
+        params = [SNIPPET_START, SNIPPET_END, SNIPPET_TOKENS, match]
+        if sha256 is not None:
+            where += " AND rowid IN (SELECT p.id FROM document_pages p JOIN documents d ON d.id = p.document_id WHERE d.sha256 = ?)"
+            params.append(sha256)
+        params += [limit, offset]
+
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT d.sha256, d.filename, d.extraction_mode, p.page, hits.score, hits.snippet FROM ("
+                "  SELECT rowid, rank AS score, snippet(page_text, 0, ?, ?, '…', ?) AS snippet "
+                f"  FROM page_text WHERE {where} ORDER BY rank LIMIT ? OFFSET ?"
+                ") hits "
+                "JOIN document_pages p ON p.id = hits.rowid "
+                "JOIN documents d ON d.id = p.document_id "
+                "ORDER BY hits.score",
+                params
+            ).fetchall()
+        except sqlite3.OperationalError as e:
+            # Erreur de syntaxe d'une requête FTS5
+            raise InvalidSearchQueryError(f"Requête de recherche invalide: {str(e)}")
+        finally:
+            conn.close()
+
+        # bm25 est négatif (plus petit = plus pertinent) : le score retourné est croissant avec la pertinence
+        return [{**dict(row), "score": round(-row["score"], 6)} for row in rows]
+
+    def list_documents(self, limit=100):
+        """
+        Liste les documents indexés, du plus récent au plus ancien
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT sha256, filename, extraction_mode, total_pages, first_seen_at, last_seen_at "
+                "FROM documents ORDER BY last_seen_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            conn.close()
+
+    def count_documents(self):
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        finally:
+            conn.close()
+
+    def delete_document(self, sha256):
+        """
+        Retire un document de l'index
+
+        Returns:
+            bool: False si le document n'était pas indexé
+        """
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute("SELECT id FROM documents WHERE sha256 = ?", (sha256,)).fetchone()
+                if row is None:
+                    return False
+                self._delete_pages(conn, row["id"])
+                conn.execute("DELETE FROM documents WHERE id = ?", (row["id"],))
+                return True
+        finally:
+            conn.close()
+
+
+# Instance partagée par tous les endpoints
+text_index = TextSearchIndex(TEXT_INDEX_DB)
@@ -0,0 +1,167 @@
+import hashlib
+import io
+import os
+import tempfile
+import time
+from metrics import BYTES_INGESTED, observe_stage
+
+# Configuration de l'ingestion des uploads (surchargée par variables d'environnement)
+UPLOAD_MAX_BYTES = int(os.environ.get("UPLOAD_MAX_BYTES", 200 * 1024 * 1024))
+UPLOAD_MEMORY_MAX_BYTES = int(os.environ.get("UPLOAD_MEMORY_MAX_BYTES", 16 * 1024 * 1024))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLargeError(Exception):
+    """Le fichier uploadé dépasse la taille maximale autorisée"""
+
+
+class IngestedUpload:
+    """
+    Fichier uploadé lu une seule fois, avec son empreinte SHA-256
+
+    Les petits fichiers restent en mémoire ; au-delà du seuil, le contenu
+    est écrit au fil de l'eau dans un fichier temporaire.
+    """
+
+    def __init__(self, filename, size, sha256, data=None, path=None):
+        self.filename = filename
+        self.size = size
+        self.sha256 = sha256
+        self._data = data
+        self.path = path
+
+    @property
+    def source(self):
+        """
+        Source passée aux fonctions d'extraction : bytes si le fichier est
+        en mémoire, sinon chemin du fichier temporaire (picklable dans les deux cas)
+        """
+        return self._data if self._data is not None else self.path
+
+    def open(self):
+        """
+        Ouvre le contenu comme un objet fichier binaire
+        """
+        if self._data is not None:
+            return io.BytesIO(self._data)
+        return open(self.path, "rb")
+
+    def close(self):
+        """
+        Libère la mémoire et supprime le fichier temporaire éventuel
+        """
+        self._data = None
+        if self.path is not None and os.path.exists(self.path):
+            os.unlink(self.path)
+        self.path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _Ingestion:
+    """
+    Accumulation d'un contenu lu par blocs : taille, empreinte et bascule sur disque
+    """
+
+    def __init__(self, suffix, max_bytes, memory_max_bytes):
+        self.suffix = suffix
+        self.max_bytes = UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+        self.memory_max_bytes = UPLOAD_MEMORY_MAX_BYTES if memory_max_bytes is None else memory_max_bytes
+        self.hasher = hashlib.sha256()
+        self.buffer = bytearray()
+        self.spill = None
+        self.size = 0
+        self.write_seconds = 0.0
+
+    def feed(self, chunk):
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise UploadTooLargeError(
+                f"Le fichier dépasse la taille maximale autorisée ({self.max_bytes // (1024 * 1024)} Mo)"
+            )
+        self.hasher.update(chunk)
+
+        if self.spill is None and self.size > self.memory_max_bytes:
+            # Trop gros pour rester en mémoire : basculer sur un fichier temporaire
+            self.spill = tempfile.NamedTemporaryFile(delete=False, suffix=self.suffix)
+            self.spill.write(self.buffer)
+            self.buffer = None
+
+        if self.spill is not None:
+            write_start = time.perf_counter()
+            self.spill.write(chunk)
+            self.write_seconds += time.perf_counter() - write_start
+        else:
+            self.buffer += chunk
+
+    def abort(self):
+        if self.spill is not None:
+            self.spill.close()
+            os.unlink(self.spill.name)
+
+    def finish(self, filename):
+        BYTES_INGESTED.inc(self.size, kind=self.suffix.lstrip(".") or "other")
+        if self.spill is not None:
+            self.spill.close()
+            observe_stage("temp_file_write", self.write_seconds)
+            return IngestedUpload(filename, self.size, self.hasher.hexdigest(), path=self.spill.name)
+        return IngestedUpload(filename, self.size, self.hasher.hexdigest(), data=self.buffer)
+
+
+async def ingest_upload(file, suffix="", max_bytes=None, memory_max_bytes=None):
+    """
+    Lit un UploadFile par blocs en calculant son empreinte au passage
+
+    Args:
+        file (UploadFile): Fichier uploadé
+        suffix (str): Extension du fichier temporaire si le contenu est écrit sur disque
+        max_bytes (int): Taille maximale acceptée (UPLOAD_MAX_BYTES par défaut)
+        memory_max_bytes (int): Taille au-delà de laquelle le contenu part sur disque
+
+    Returns:
+        IngestedUpload
+
+    Raises:
+        UploadTooLargeError: dès que la taille lue dépasse max_bytes
+    """
+    ingestion = _Ingestion(suffix, max_bytes, memory_max_bytes)
+    start = time.perf_counter()
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            ingestion.feed(chunk)
+    except BaseException:
+        ingestion.abort()
+        raise
+
+    observe_stage("upload_read", time.perf_counter() - start)
+    return ingestion.finish(file.filename)
+
+
+def ingest_file(fileobj, filename, suffix="", max_bytes=None, memory_max_bytes=None):
+    """
+    Version synchrone de ingest_upload pour un objet fichier (ex. entrée d'une archive ZIP)
+
+    Le contenu est lu par blocs : seule l'entrée en cours est en mémoire,
+    ou sur disque si elle dépasse memory_max_bytes.
+    """
+    ingestion = _Ingestion(suffix, max_bytes, memory_max_bytes)
+    start = time.perf_counter()
+    try:
+        while True:
+            chunk = fileobj.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            ingestion.feed(chunk)
+    except BaseException:
+        ingestion.abort()
+        raise
+
+    observe_stage("archive_entry_read", time.perf_counter() - start)
+    return ingestion.finish(filename)
@@ -0,0 +1,624 @@
+import bisect
+import math
+import re
+import threading
+import unicodedata
+from metrics import stage_timer
+
+# Champs du document V3, dans l'ordre de getEmptyV3Data (dashboard/src/app/api/v3/create/route.ts)
+V3_FIELDS = (
+    "nom_projet", "date_projet", "nom_MO", "Adresse_MO", "nom_mission", "date_création", "nom_mo",
+    "NOM_MOE_mandataire", "Adresse_moe_mandataire", "nature_opération", "description_projet",
+    "nom_du_site", "nom_bâtiments", "adresse_maitre_ouvrage", "nom_maitre_ouvrage", "project_type",
+    "bâtiments_concernés", "site_présentation", "project_phase", "site_part_concerned",
+    "nom_du_partenaire", "diagnostics_type", "date_diagnotsic", "nombre_dechet", "nombre_tonnes_rémploi",
+    "Ressources_PEMD", "nom_de_société", "rapport_type_num", "indique_true", "indique_false",
+    "rapport_type_true", "rapport_type_false", "nom_de_la_société", "rapport_type_termites_true",
+    "rapport_type_termites_false", "rapport_type_amiante_true", "rapport_type_amiante_false",
+    "présence_amiante_true", "présence_amiante_false", "type_étanchéités_true", "type_étanchéités_false",
+    "enrobés_de_parking_true", "enrobés_de_parking_false", "étanchéités_de_toiture",
+    "localisation_transformsteurs", "date_inventaire", "prénom_represente", "nom_represente",
+    "fonction_represente", "prénom_charge_diagnostic", "fonction_charge_diagnositc", "ressource_operation",
+    "prénom_structure", "nom_structure", "Nom_de_la_structure", "sondage_déstructif_true",
+    "sondage_déstructif_false", "site_occupé_true", "presence_amiante_true", "non_reception_true",
+    "description_de_l_opération", "Nom_du_MOA", "bâtiments_espaces", "nom_de_l_opération", "concours",
+    "cité_document_concerné", "description_succincte_du_programme", "nom_du_batiment",
+    "année_de_construction", "Usage_actuel_ou_ancien_usage", "déconstruction_rénovation_conservation",
+    "occupé_vide_en_travaux_en_désamiantage", "Usage_actuel_true", "batiment_state", "Etat_des_bâtiments",
+    "Présence_d_amiante", "Mise_en_œuvre", "Année_construction_bâtiment", "Charpente_bois_true",
+    "toiture_terrasse_béton_true", "Châssis_aluminium_true", "double_vitrage_true",
+)
+
+# Champs attendus par défaut par l'extraction avec arrêt anticipé : ceux de
+# la page de garde d'un diagnostic (maître d'ouvrage, adresse, référence, date)
+V3_GOAL_FIELDS = ("nom_MO", "Adresse_MO", "rapport_type_num", "date_diagnotsic")
+
+# Valeur écrite dans les champs case à cocher (*_true / *_false)
+FLAG_CHECKED = "X"
+
+# Longueur maximale d'une valeur extraite après un libellé
+VALUE_MAX_CHARS = 200
+
+# Séparateur exigé après un libellé : ":" ou "=", une colonne (large espace
+# ou tabulation) ou la fin de ligne. Une simple espace ne suffit pas : une
+# phrase qui commence par ces mots ("Site très fréquenté", "Nature des
+# travaux envisagés") n'est pas une valeur.
+LABEL_SEPARATOR = re.compile(r"[ \t]*[:=]|[ \t]*$|[ \t]{3,}|\t")
+
+# Nombre de moteurs restreints à un sous-ensemble de champs gardés en mémoire
+V3_ENGINE_CACHE_SIZE = 64
+
+# Formats de valeurs
+DATE = r"\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4}|\d{1,2}(?:er)? (?:janvier|février|fevrier|mars|avril|mai|juin|juillet|août|aout|septembre|octobre|novembre|décembre|decembre) \d{4}"
+YEAR = r"\b(?:1[5-9]\d{2}|20\d{2})\b"
+QUANTITY = r"\d[\d  .,]*(?:\s*(?:t|tonnes?|kg|m3|m³|m2|m²|ml|u|unités?)\b)?"
+
+
+def label(fields, labels, value=None, extract=None):
+    """
+    Règle « libellé : valeur » : la valeur suit le libellé sur la même ligne,
+    ou occupe la ligne suivante si le libellé est seul sur sa ligne
+
+    Args:
+        fields (str | tuple): Champ(s) V3 renseignés par la règle
+        labels (list): Libellés déclencheurs (casse et accents indifférents)
+        value (str): Expression régulière que la valeur doit contenir (dates, nombres...)
+        extract (callable): Transformation finale de la valeur
+    """
+    return {
+        "kind": "label",
+        "fields": (fields,) if isinstance(fields, str) else tuple(fields),
+        "keywords": {keyword: None for keyword in labels},
+        "value": re.compile(value, re.IGNORECASE) if value else None,
+        "extract": extract
+    }
+
+
+def flag(true_fields, false_field, positive, negative=()):
+    """
+    Règle case à cocher : un mot-clé positif coche true_fields ; à défaut,
+    un mot-clé négatif coche false_field
+    """
+    keywords = {keyword: True for keyword in positive}
+    keywords.update({keyword: False for keyword in negative})
+    return {
+        "kind": "flag",
+        "fields": (true_fields,) if isinstance(true_fields, str) else tuple(true_fields),
+        "false_field": false_field,
+        "keywords": keywords
+    }
+
+
+def choice(field, choices):
+    """
+    Règle à choix : le premier mot-clé rencontré dans le document donne la valeur du champ
+
+    Args:
+        choices (dict): Mot-clé -> valeur
+    """
+    return {
+        "kind": "choice",
+        "fields": (field,),
+        "keywords": dict(choices)
+    }
+
+
+# Civilités ignorées devant un nom
+CIVILITIES = ("m", "mme", "mlle", "monsieur", "madame", "mr")
+
+
+def _split_person(value):
+    # "M. Jean Dupont, Directeur" -> (["Jean", "Dupont"], "Directeur")
+    parts = re.split(r"\s*(?:,|\(|\s-\s|\ben qualité de\b)\s*", value, maxsplit=1)
+    names = parts[0].split()
+    if names and names[0].rstrip(".").lower() in CIVILITIES:
+        names = names[1:]
+    role = parts[1].rstrip(") ").strip() if len(parts) > 1 else ""
+    return names, role
+
+
+def person_first_name(value):
+    names, _ = _split_person(value)
+    return names[0] if names else ""
+
+
+def person_last_name(value):
+    names, _ = _split_person(value)
+    return " ".join(names[1:])
+
+
+def person_role(value):
+    return _split_person(value)[1]
+
+
+# Registre déclaratif des règles : couvre tous les champs de V3_FIELDS
+V3_RULES = [
+    # Projet et opération
+    label("nom_projet", ["nom du projet", "intitulé du projet", "projet"]),
+    label("date_projet", ["date du projet"], value=DATE),
+    label("nom_mission", ["nom de la mission", "intitulé de la mission", "mission"]),
+    label("date_création", ["date de création", "date d'émission", "date du document", "date du rapport"], value=DATE),
+    label("nature_opération", ["nature de l'opération", "nature des travaux", "type d'opération"]),
+    label("description_projet", ["description du projet"]),
+    label("description_de_l_opération", ["description de l'opération"]),
+    label("description_succincte_du_programme", ["description succincte du programme", "description succincte", "programme"]),
+    label("nom_de_l_opération", ["nom de l'opération", "opération"]),
+    label("project_type", ["type de projet", "type du projet"]),
+    label("project_phase", ["phase du projet", "phase"]),
+    label("concours", ["concours"]),
+    label("cité_document_concerné", ["document concerné", "documents concernés", "documents consultés"]),
+
+    # Maîtrise d'ouvrage et maîtrise d'œuvre
+    label(("nom_MO", "nom_mo", "nom_maitre_ouvrage", "Nom_du_MOA"),
+          ["maître d'ouvrage", "maitre d'ouvrage", "maîtrise d'ouvrage", "nom du maître d'ouvrage", "moa", "mo"]),
+    label(("Adresse_MO", "adresse_maitre_ouvrage"),
+          ["adresse du maître d'ouvrage", "adresse maître d'ouvrage", "adresse de la maîtrise d'ouvrage", "adresse moa", "adresse mo"]),
+    label("NOM_MOE_mandataire", ["maître d'œuvre mandataire", "maître d'oeuvre mandataire", "maître d'œuvre", "maître d'oeuvre", "maitre d'oeuvre", "moe mandataire", "mandataire", "moe"]),
+    label("Adresse_moe_mandataire", ["adresse du maître d'œuvre", "adresse du maître d'oeuvre", "adresse du mandataire", "adresse moe"]),
+
+    # Site et bâtiments
+    label("nom_du_site", ["nom du site", "site"]),
+    label("site_présentation", ["présentation du site"]),
+    label("site_part_concerned", ["partie du site concernée", "partie concernée", "zone concernée", "périmètre"]),
+    label("nom_bâtiments", ["nom des bâtiments", "bâtiments"]),
+    label("nom_du_batiment", ["nom du bâtiment", "bâtiment"]),
+    label("bâtiments_concernés", ["bâtiments concernés", "bâtiment concerné"]),
+    label("bâtiments_espaces", ["bâtiments et espaces", "espaces concernés", "locaux concernés"]),
+    label(("année_de_construction", "Année_construction_bâtiment"),
+          ["année de construction", "date de construction", "construit en", "construction"], value=YEAR),
+    label("Usage_actuel_ou_ancien_usage", ["usage actuel ou ancien usage", "ancien usage", "usage actuel", "usage"]),
+    label(("batiment_state", "Etat_des_bâtiments"), ["état des bâtiments", "état du bâtiment", "état général", "état"]),
+    label("étanchéités_de_toiture", ["étanchéités de toiture", "étanchéité de toiture", "étanchéité toiture"]),
+    label("localisation_transformsteurs", ["localisation des transformateurs", "localisation du transformateur", "transformateurs", "transformateur"]),
+    label("Mise_en_œuvre", ["mise en œuvre", "mise en oeuvre"]),
+    label("Présence_d_amiante", ["présence d'amiante", "amiante"]),
+
+    # Diagnostic et ressources
+    label("nom_du_partenaire", ["nom du partenaire", "partenaire"]),
+    label("diagnostics_type", ["type de diagnostic", "types de diagnostics", "type de diagnostics", "diagnostics réalisés", "diagnostic"]),
+    label("date_diagnotsic", ["date du diagnostic", "date de diagnostic", "date de visite", "date d'intervention", "date de repérage"], value=DATE),
+    label("date_inventaire", ["date de l'inventaire", "date d'inventaire"], value=DATE),
+    label("nombre_dechet", ["nombre de déchets", "quantité de déchets", "gisement de déchets", "déchets"], value=QUANTITY),
+    label("nombre_tonnes_rémploi", ["tonnes de réemploi", "tonnage de réemploi", "tonnage réemployable", "réemploi"], value=QUANTITY),
+    label("Ressources_PEMD", ["ressources pemd", "ressources identifiées", "ressources"]),
+    label("ressource_operation", ["ressources de l'opération", "ressource de l'opération", "ressource opération"]),
+    label("rapport_type_num", ["numéro de rapport", "numéro du rapport", "rapport n°", "n° de rapport", "référence du rapport", "référence", "réf."]),
+
+    # Sociétés, structures et intervenants
+    label(("nom_de_société", "nom_de_la_société"), ["nom de la société", "société", "entreprise", "bureau d'études"]),
+    label(("nom_structure", "Nom_de_la_structure"), ["nom de la structure", "structure"]),
+    label("prénom_structure", ["contact de la structure", "interlocuteur", "contact"], extract=person_first_name),
+    label("prénom_represente", ["représenté par", "représentée par", "représentant"], extract=person_first_name),
+    label("nom_represente", ["représenté par", "représentée par", "représentant"], extract=person_last_name),
+    label("fonction_represente", ["représenté par", "représentée par", "représentant"], extract=person_role),
+    label("prénom_charge_diagnostic", ["chargé du diagnostic", "chargée du diagnostic", "chargé de diagnostic", "diagnostiqueur", "opérateur de repérage"], extract=person_first_name),
+    label("fonction_charge_diagnositc", ["chargé du diagnostic", "chargée du diagnostic", "chargé de diagnostic", "diagnostiqueur", "opérateur de repérage"], extract=person_role),
+
+    # Choix
+    choice("déconstruction_rénovation_conservation", {
+        "déconstruction": "Déconstruction", "démolition": "Déconstruction",
+        "rénovation": "Rénovation", "réhabilitation": "Rénovation",
+        "conservation": "Conservation",
+    }),
+    choice("occupé_vide_en_travaux_en_désamiantage", {
+        "site occupé": "Occupé", "bâtiment occupé": "Occupé", "locaux occupés": "Occupé",
+        "inoccupé": "Vide", "bâtiment vide": "Vide", "site vide": "Vide",
+        "en travaux": "En travaux",
+        "en désamiantage": "En désamiantage", "en cours de désamiantage": "En désamiantage",
+    }),
+
+    # Cases à cocher
+    flag("indique_true", "indique_false", ["indiqué", "mentionné"], ["non indiqué", "non mentionné"]),
+    flag("rapport_type_true", "rapport_type_false",
+         ["rapport de repérage", "rapport de repérage amiante", "rapport de diagnostic", "rapport d'inventaire"],
+         ["aucun rapport", "absence de rapport"]),
+    flag("rapport_type_termites_true", "rapport_type_termites_false",
+         ["termites", "état parasitaire"],
+         ["absence de termites", "pas de termites", "aucun rapport termites"]),
+    flag("rapport_type_amiante_true", "rapport_type_amiante_false",
+         ["repérage amiante", "rapport de repérage amiante", "diagnostic amiante", "rapport amiante", "dossier technique amiante", "dta"],
+         ["aucun rapport amiante", "absence de rapport amiante", "absence de dta"]),
+    flag(("présence_amiante_true", "presence_amiante_true"), "présence_amiante_false",
+         ["présence d'amiante", "matériaux amiantés", "contient de l'amiante", "amiante détectée", "positif à l'amiante"],
+         ["absence d'amiante", "pas d'amiante", "aucun matériau amianté", "ne contient pas d'amiante", "négatif à l'amiante"]),
+    flag("type_étanchéités_true", "type_étanchéités_false",
+         ["étanchéité bitumineuse", "étanchéités bitumineuses", "membrane bitumineuse", "étanchéité synthétique"],
+         ["pas d'étanchéité", "absence d'étanchéité"]),
+    flag("enrobés_de_parking_true", "enrobés_de_parking_false",
+         ["enrobés", "enrobé", "enrobés de parking"],
+         ["pas d'enrobé", "absence d'enrobés", "sans enrobé"]),
+    flag("sondage_déstructif_true", "sondage_déstructif_false",
+         ["sondages destructifs", "sondage destructif"],
+         ["sans sondage destructif", "sondages non destructifs", "sondage non destructif"]),
+    flag("site_occupé_true", None, ["site occupé", "bâtiment occupé", "locaux occupés"]),
+    flag("non_reception_true", None, ["non réception", "non-réception", "non reçu", "non reçus"]),
+    flag("Usage_actuel_true", None, ["usage actuel"]),
+    flag("Charpente_bois_true", None, ["charpente bois", "charpente en bois"]),
+    flag("toiture_terrasse_béton_true", None, ["toiture terrasse béton", "toiture-terrasse béton", "toiture terrasse en béton", "toiture-terrasse en béton"]),
+    flag("Châssis_aluminium_true", None, ["châssis aluminium", "châssis en aluminium", "menuiseries aluminium", "menuiseries en aluminium"]),
+    flag("double_vitrage_true", None, ["double vitrage", "double-vitrage"]),
+]
+
+
+def _build_fold_table():
+    # Minuscules sans accents, caractère pour caractère : les positions du texte
+    # replié restent celles du texte d'origine
+    table = {}
+    for code in range(0x250):
+        char = chr(code)
+        folded = unicodedata.normalize("NFD", char)[0].lower()
+        if folded != char and len(folded) == 1:
+            table[code] = folded
+    for char in "’‘ʼ´`":
+        table[ord(char)] = "'"
+    for char in "   ":
+        table[ord(char)] = " "
+    for char in "‐‑–—":
+        table[ord(char)] = "-"
+    return table
+
+
+FOLD_TABLE = _build_fold_table()
+
+
+def fold(text):
+    """
+    Replie un texte (minuscules, sans accents, apostrophes normalisées) sans changer sa longueur
+    """
+    return text.translate(FOLD_TABLE)
+
+
+def _normalize_keyword(keyword):
+    return " ".join(fold(keyword).split())
+
+
+def _trie_pattern(keywords):
+    """
+    Compile une liste de mots-clés en une expression régulière en forme d'arbre
+    préfixe : les préfixes communs ne sont testés qu'une fois, si bien que le
+    coût d'un passage dépend peu du nombre de mots-clés
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def emit(node, last_char):
+        # Un mot-clé qui finit par une lettre ne doit pas couper un mot
+        boundary = r"(?!\w)" if last_char.isalnum() else ""
+        branches = []
+        for char in sorted(k for k in node if k):
+            atom = r"\s+" if char == " " else re.escape(char)
+            branches.append(atom + emit(node[char], char))
+        if not branches:
+            return boundary
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            # Préférer la correspondance la plus longue
+            return "(?:" + body + "|" + boundary + ")"
+        return body
+
+    return emit(trie, "")
+
+
+class V3RuleEngine:
+    """
+    Moteur d'extraction des champs V3 : toutes les règles sont compilées en un
+    seul automate de mots-clés, et le texte est parcouru une seule fois
+    """
+
+    def __init__(self, rules, wanted=None):
+        self.rules = rules
+        # Champs produits par un moteur restreint (None : tous les champs des règles)
+        self.wanted = frozenset(wanted) if wanted is not None else None
+        # Mot-clé replié -> liste de (indice de règle, donnée associée)
+        self.keywords = {}
+        for index, rule in enumerate(rules):
+            for keyword, data in rule["keywords"].items():
+                self.keywords.setdefault(_normalize_keyword(keyword), []).append((index, data))
+
+        self.pattern = re.compile(r"(?<!\w)" + _trie_pattern(self.keywords)) if self.keywords else None
+
+        covered = {field for rule in rules for field in rule["fields"]}
+        covered.update(rule["false_field"] for rule in rules if rule.get("false_field"))
+        if self.wanted is not None:
+            covered &= self.wanted
+        self.fields = tuple(field for field in V3_FIELDS if field in covered)
+
+        # Moteurs restreints déjà compilés, du plus ancien au plus récent
+        self._subsets = {}
+        self._subsets_lock = threading.Lock()
+
+    def for_fields(self, fields):
+        """
+        Moteur restreint aux règles qui renseignent au moins un des champs
+        voulus : les règles des autres champs ne sont ni compilées ni évaluées,
+        et seuls les champs voulus sont retournés
+
+        Les V3_ENGINE_CACHE_SIZE derniers moteurs restreints sont gardés en mémoire.
+        """
+        wanted = frozenset(fields)
+        if wanted.issuperset(self.fields):
+            return self
+        with self._subsets_lock:
+            engine = self._subsets.pop(wanted, None)
+            if engine is None:
+                rules = [
+                    rule for rule in self.rules
+                    if wanted.intersection(rule["fields"]) or rule.get("false_field") in wanted
+                ]
+                engine = V3RuleEngine(rules, wanted)
+            self._subsets[wanted] = engine
+            if len(self._subsets) > V3_ENGINE_CACHE_SIZE:
+                del self._subsets[next(iter(self._subsets))]
+        return engine
+
+    def extract(self, text):
+        """
+        Extrait les champs V3 d'un texte en un seul passage
+
+        Returns:
+            dict: Champ V3 -> valeur, uniquement pour les champs trouvés
+        """
+        state = self.new_state()
+        self.scan(text, state)
+        return self.finish(state)
+
+    @staticmethod
+    def new_state():
+        """
+        État d'une extraction incrémentale (texte fourni morceau par morceau, ex. page par page)
+        """
+        return {"fields": {}, "flags": {}}
+
+    def scan(self, text, state):
+        """
+        Ajoute un morceau de texte à une extraction incrémentale
+
+        Les morceaux doivent être fournis dans l'ordre du document. Une valeur
+        placée sur la ligne qui suit son libellé n'est pas retrouvée si le
+        libellé termine le morceau précédent.
+        """
+        with stage_timer("v3_scan"):
+            self._scan(text, state)
+
+    def _scan(self, text, state):
+        if self.pattern is None:
+            return
+        folded = fold(text)
+        line_starts = [0]
+        # Les sauts de page (\f) de extract_text_from_pdf terminent aussi une ligne
+        line_starts.extend(match.end() for match in re.finditer("[\n\f]", text))
+
+        results = state["fields"]
+        flags = state["flags"]
+
+        for match in self.pattern.finditer(folded):
+            key = " ".join(match.group(0).split())
+            for rule_index, data in self.keywords.get(key, ()):
+                rule = self.rules[rule_index]
+                kind = rule["kind"]
+
+                if kind == "flag":
+                    # Un seul constat positif suffit à cocher la case
+                    flags[rule_index] = flags.get(rule_index, False) or data
+                    continue
+
+                if all(field in results for field in rule["fields"]):
+                    continue
+
+                if kind == "choice":
+                    value = data
+                else:
+                    value = self._label_value(text, folded, line_starts, match, rule)
+                    if not value:
+                        continue
+
+                for field in rule["fields"]:
+                    results.setdefault(field, value)
+
+    @staticmethod
+    def merge_states(states):
+        """
+        Fusionne des états d'extraction obtenus sur des morceaux consécutifs
+        (ex. plages de pages traitées en parallèle), dans l'ordre du document
+        """
+        merged = {"fields": {}, "flags": {}}
+        for state in states:
+            for field, value in state["fields"].items():
+                merged["fields"].setdefault(field, value)
+            for rule_index, positive in state["flags"].items():
+                merged["flags"][rule_index] = merged["flags"].get(rule_index, False) or positive
+        return merged
+
+    def finish(self, state):
+        """
+        Termine une extraction incrémentale et retourne les champs V3 trouvés
+        """
+        results = dict(state["fields"])
+        for rule_index, positive in state["flags"].items():
+            rule = self.rules[rule_index]
+            if positive:
+                for field in rule["fields"]:
+                    results.setdefault(field, FLAG_CHECKED)
+            elif rule["false_field"]:
+                results.setdefault(rule["false_field"], FLAG_CHECKED)
+
+        if self.wanted is not None:
+            return {field: value for field, value in results.items() if field in self.wanted}
+        return results
+
+    @staticmethod
+    def _label_value(text, folded, line_starts, match, rule):
+        line = bisect.bisect_right(line_starts, match.start()) - 1
+        line_start = line_starts[line]
+        line_end = line_starts[line + 1] - 1 if line + 1 < len(line_starts) else len(text)
+
+        # Un libellé commence une ligne ou une colonne (précédé d'un large espace)
+        prefix = folded[line_start:match.start()]
+        if prefix.strip(" \t-•*") and not prefix.endswith(("   ", "\t")):
+            return None
+
+        # La valeur suit le séparateur et s'arrête à la colonne suivante
+        rest = folded[match.end():line_end]
+        if not LABEL_SEPARATOR.match(rest):
+            return None
+        value_start = match.end() + len(rest) - len(rest.lstrip(" \t:=-"))
+        candidate = re.split(r"\s{3,}|\t", text[value_start:line_end], maxsplit=1)[0].strip()
+
+        if not candidate and not rest.strip(" \t:"):
+            # Libellé seul sur sa ligne : la valeur est sur la ligne suivante
+            next_line = line + 1
+            if next_line < len(line_starts):
+                next_end = line_starts[next_line + 1] - 1 if next_line + 1 < len(line_starts) else len(text)
+                candidate = text[line_starts[next_line]:next_end].strip()
+
+        if not candidate:
+            return None
+
+        if rule["value"] is not None:
+            value_match = rule["value"].search(candidate)
+            if not value_match:
+                return None
+            candidate = value_match.group(0).strip()
+
+        candidate = candidate[:VALUE_MAX_CHARS]
+        if rule["extract"] is not None:
+            candidate = rule["extract"](candidate)
+        return candidate
+
+
+# Moteur compilé une seule fois au chargement du module
+v3_rule_engine = V3RuleEngine(V3_RULES)
+
+# Politiques de résolution des conflits entre textes d'un même batch
+MERGE_POLICIES = ("last", "first")
+
+
+# Clés produites par l'ancienne extraction de /process-text-for-v3/, hors
+# schéma V3 : toujours renvoyées par une extraction complète pour les clients
+# qui les lisent encore (mêmes règles, libellés sensibles à la casse)
+LEGACY_LABELS = {
+    "adresse_chantier": re.compile(r"Adresse[:\s]*([^\n]+)"),
+    "ville": re.compile(r"Ville[:\s]*([^\n]+)"),
+    "maitre_ouvrage": re.compile(r"Ma[îi]tre d'ouvrage[:\s]*([^\n]+)"),
+    "reference_projet": re.compile(r"Référence[:\s]*([^\n]+)"),
+}
+LEGACY_POSTAL_CODE = re.compile(r"\b(\d{5})\b")
+LEGACY_BUILDING_TYPES = ("Immeuble", "Maison", "Bureau", "Entrepôt", "Usine", "Commercial")
+
+
+def extract_legacy_fields(text):
+    """
+    Extrait les anciennes clés de /process-text-for-v3/ (adresse_chantier,
+    code_postal, ville, maitre_ouvrage, reference_projet, type_batiment)
+    """
+    fields = {}
+    for field, pattern in LEGACY_LABELS.items():
+        match = pattern.search(text)
+        if match:
+            fields[field] = match.group(1).strip()
+
+    match = LEGACY_POSTAL_CODE.search(text)
+    if match:
+        fields["code_postal"] = match.group(1)
+
+    for building_type in LEGACY_BUILDING_TYPES:
+        if building_type in text:
+            fields["type_batiment"] = building_type
+            break
+    return fields
+
+
+def extract_v3_fields(text, fields=None, legacy=False):
+    """
+    Extrait les champs V3 d'un texte (tâche exécutable dans un worker)
+
+    Args:
+        text (str): Texte à analyser
+        fields (tuple): Champs voulus, tous si None (voir V3RuleEngine.for_fields)
+        legacy (bool): Ajouter les anciennes clés (voir extract_legacy_fields)
+    """
+    engine = v3_rule_engine if fields is None else v3_rule_engine.for_fields(fields)
+    extracted = engine.extract(text)
+    if legacy:
+        extracted = {**extract_legacy_fields(text), **extracted}
+    return extracted
+
+
+def v3_completion(data):
+    """
+    Taux de complétion d'un document V3 et champs encore vides, sur le schéma V3_FIELDS
+
+    Même calcul que calculateCompletionRate / getMissingFields du dashboard :
+    un champ est rempli si sa valeur n'est pas vide.
+
+    Returns:
+        dict: {"completion_rate" (pourcentage arrondi), "filled_fields",
+        "total_fields", "missing_fields" (dans l'ordre du schéma)}
+    """
+    missing = [field for field in V3_FIELDS if not data.get(field)]
+    filled = len(V3_FIELDS) - len(missing)
+    return {
+        # Arrondi au plus proche, comme Math.round
+        "completion_rate": math.floor(100 * filled / len(V3_FIELDS) + 0.5),
+        "filled_fields": filled,
+        "total_fields": len(V3_FIELDS),
+        "missing_fields": missing
+    }
+
+
+def merge_v3_results(current_data, results, policy="last", overwrite_current=True):
+    """
+    Fusionne les champs extraits de plusieurs textes de façon déterministe
+
+    Pour chaque champ, la valeur retenue est celle du texte de plus haute
+    priorité ; à priorité égale, "last" garde le dernier texte de la liste
+    (comme des appels successifs à /process-text-for-v3/) et "first" le premier.
+
+    Args:
+        current_data (dict): Données V3 de départ
+        results (list): Liste de {"source", "priority", "fields"} dans l'ordre des textes
+        policy (str): "last" ou "first"
+        overwrite_current (bool): Les valeurs extraites remplacent celles de current_data
+
+    Returns:
+        tuple: (données fusionnées, provenance par champ, conflits)
+    """
+    if policy not in MERGE_POLICIES:
+        raise ValueError(f"Politique de fusion inconnue : {policy}")
+
+    # Ordre de préférence croissant : le dernier candidat l'emporte
+    order = sorted(
+        range(len(results)),
+        key=lambda i: (results[i]["priority"], i if policy == "last" else -i)
+    )
+
+    merged = dict(current_data)
+    provenance = {field: "current_data" for field, value in current_data.items() if value != ""}
+    candidates = {}
+
+    for index in order:
+        result = results[index]
+        for field, value in result["fields"].items():
+            candidates.setdefault(field, []).append((index, value))
+            if not overwrite_current and provenance.get(field) == "current_data":
+                continue
+            merged[field] = value
+            provenance[field] = result["source"]
+
+    conflicts = []
+    for field, values in candidates.items():
+        if len({value for _, value in values}) > 1:
+            conflicts.append({
+                "field": field,
+                "selected": merged[field],
+                "candidates": [
+                    {"source": results[index]["source"], "value": value}
+                    for index, value in sorted(values)
+                ]
+            })
+
+    return merged, provenance, conflicts
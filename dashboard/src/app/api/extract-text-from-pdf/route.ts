@@ -70,21 +70,11 @@ export async function POST(request: NextRequest) {
             );
         }
 
-        // Renvoyer les données du backend avec adaptation du format si nécessaire
-        let data;
-        try {
-            data = await response.json();
-            console.log('API route: Données du backend:', data);
-        } catch (jsonError) {
-            console.error('API route: Erreur lors du parsing JSON de la réponse:', jsonError);
-            throw new Error('Erreur lors du parsing de la réponse du backend');
-        }
-
-        // Adapter le format si nécessaire pour maintenir la cohérence des API
-        return NextResponse.json({
-            success: data.success !== undefined ? data.success : true,
-            text: data.text,
-            error: data.error
+        // Renvoyer le corps JSON du backend tel quel, sans le re-parser ni le re-sérialiser
+        // (il contient déjà success et text, avec total_pages et extraction_mode en plus)
+        return new NextResponse(response.body, {
+            status: response.status,
+            headers: { 'Content-Type': 'application/json' }
         });
     } catch (error) {
         console.error('API route: Erreur globale lors de l\'extraction du texte PDF:', error);
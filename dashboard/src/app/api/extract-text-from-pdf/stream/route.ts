@@ -0,0 +1,59 @@
+import { NextRequest, NextResponse } from 'next/server';
+
+// URL du backend Python
+const BACKEND_URL = process.env.BACKEND_URL || 'http://localhost:8000';
+
+// Relaie le texte du PDF page par page (NDJSON) sans attendre la fin de l'extraction
+export async function POST(request: NextRequest) {
+    try {
+        // Récupérer le fichier de la requête
+        const formData = await request.formData();
+        const file = formData.get('file') as File;
+
+        if (!file) {
+            return NextResponse.json(
+                { success: false, error: 'Aucun fichier fourni' },
+                { status: 400 }
+            );
+        }
+
+        // Créer un nouveau FormData pour transmettre au backend
+        const backendFormData = new FormData();
+        backendFormData.append('file', file);
+
+        const response = await fetch(`${BACKEND_URL}/extract-pdf-text/stream`, {
+            method: 'POST',
+            body: backendFormData,
+        });
+
+        if (!response.ok || !response.body) {
+            const errorText = await response.text();
+            let errorDetail = '';
+            try {
+                const errorData = JSON.parse(errorText);
+                errorDetail = errorData.detail || '';
+            } catch (e) {
+                errorDetail = errorText;
+            }
+
+            return NextResponse.json(
+                { success: false, error: `Erreur du backend: ${errorDetail || response.statusText}` },
+                { status: response.status }
+            );
+        }
+
+        // Transmettre le flux tel quel : chaque ligne est un événement JSON
+        return new Response(response.body, {
+            headers: {
+                'Content-Type': 'application/x-ndjson',
+                'Cache-Control': 'no-cache',
+            },
+        });
+    } catch (error) {
+        console.error('API route: Erreur lors du streaming du texte PDF:', error);
+        return NextResponse.json(
+            { success: false, error: `Erreur du serveur lors du streaming du texte PDF: ${error instanceof Error ? error.message : 'Erreur inconnue'}` },
+            { status: 500 }
+        );
+    }
+}
@@ -0,0 +1,62 @@
+import { NextRequest, NextResponse } from 'next/server';
+
+// URL du backend Python
+const BACKEND_URL = process.env.BACKEND_URL || 'http://localhost:8000';
+
+// Traite plusieurs textes en un seul aller-retour et renvoie les données V3 fusionnées
+export async function POST(request: NextRequest) {
+    try {
+        // Récupérer les données JSON de la requête
+        const body = await request.json();
+        const { texts, current_data, policy, overwrite_current, fields_wanted } = body;
+
+        if (!Array.isArray(texts) || texts.length === 0) {
+            return NextResponse.json(
+                { success: false, error: 'Aucun texte fourni' },
+                { status: 400 }
+            );
+        }
+
+        // Envoyer la requête au backend Python
+        const response = await fetch(`${BACKEND_URL}/process-texts-for-v3/batch`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                texts,
+                current_data: current_data || {},
+                policy: policy || 'last',
+                overwrite_current: overwrite_current ?? true,
+                // Champs encore vides (missing_fields de la réponse précédente) : seules leurs règles sont évaluées
+                ...(fields_wanted ? { fields_wanted } : {})
+            }),
+        });
+
+        if (!response.ok) {
+            const errorText = await response.text();
+            let errorDetail = '';
+            try {
+                const errorData = JSON.parse(errorText);
+                errorDetail = errorData.detail || '';
+            } catch (e) {
+                errorDetail = errorText;
+            }
+
+            return NextResponse.json(
+                { success: false, error: `Erreur du backend: ${errorDetail || response.statusText}` },
+                { status: response.status }
+            );
+        }
+
+        // Renvoyer les données du backend
+        const data = await response.json();
+        return NextResponse.json(data);
+    } catch (error) {
+        console.error('Erreur lors du traitement des textes pour V3:', error);
+        return NextResponse.json(
+            { success: false, error: 'Erreur du serveur lors du traitement des textes pour V3' },
+            { status: 500 }
+        );
+    }
+}
@@ -7,7 +7,7 @@ export async function POST(request: NextRequest) {
     try {
         // Récupérer les données JSON de la requête
         const body = await request.json();
-        const { text, current_data } = body;
+        const { text, current_data, fields_wanted } = body;
 
         if (!text) {
             return NextResponse.json(
@@ -24,7 +24,9 @@ export async function POST(request: NextRequest) {
             },
             body: JSON.stringify({
                 text,
-                current_data: current_data || {}
+                current_data: current_data || {},
+                // Champs encore vides (missing_fields de la réponse précédente) : seules leurs règles sont évaluées
+                ...(fields_wanted ? { fields_wanted } : {})
             }),
         });
 
@@ -2,7 +2,7 @@
 
 import { useCallback, useState } from 'react';
 import { useDropzone } from 'react-dropzone';
-import { extractPlaceholders, extractTextFromPdf, processTextForV3 } from '@/services/externalApiService';
+import { extractPlaceholders, processPdfForV3 } from '@/services/externalApiService';
 import { V3Client } from '@/services/apiClient';
 import { V3Data } from '@/lib/types/v3Types';
 
@@ -73,12 +73,6 @@ export default function FileDropzone({
         try {
             if (file.name.toLowerCase().endsWith('.pdf')) {
                 // Traitement PDF
-                const textExtractionResult = await extractTextFromPdf(file);
-
-                if (!textExtractionResult.success || !textExtractionResult.text) {
-                    throw new Error(textExtractionResult.error || "Échec de l'extraction du texte");
-                }
-
                 // Obtenir le document V3 actuel ou en créer un nouveau
                 const latestDocResponse = await V3Client.getLatest();
                 let v3Document = latestDocResponse.success ? latestDocResponse.data : null;
@@ -97,9 +91,9 @@ export default function FileDropzone({
                     throw new Error("Impossible d'obtenir un document V3 valide");
                 }
 
-                // Traiter le texte pour mettre à jour le V3
-                const processingResult = await processTextForV3(
-                    textExtractionResult.text,
+                // Extraire le texte et les données V3 côté serveur en une seule requête
+                const processingResult = await processPdfForV3(
+                    file,
                     v3Document.data as unknown as Record<string, string>
                 );
 
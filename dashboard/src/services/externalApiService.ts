@@ -180,6 +180,53 @@ export const processTextForV3 = async (
     }
 };
 
+/**
+ * Service pour traiter un PDF en une seule requête : extraction du texte et
+ * des données V3 côté serveur (le texte ne transite pas par le navigateur)
+ * @param file - Fichier PDF à traiter
+ * @param currentData - Données actuelles du V3 (pour mise à jour partielle)
+ * @returns Promise avec les données V3 mises à jour
+ */
+export const processPdfForV3 = async (
+    file: File,
+    currentData?: Record<string, string>
+): Promise<V3ProcessingResult> => {
+    if (!file.name.toLowerCase().endsWith('.pdf')) {
+        return {
+            success: false,
+            error: 'Le fichier doit être au format PDF'
+        };
+    }
+
+    const formData = new FormData();
+    formData.append('file', file);
+    formData.append('current_data', JSON.stringify(currentData || {}));
+
+    try {
+        const response = await fetch(`${BACKEND_URL}/process-pdf-for-v3/`, {
+            method: 'POST',
+            body: formData,
+        });
+
+        const result = await response.json();
+
+        if (!response.ok) {
+            throw new Error(result.detail || result.error || `Erreur ${response.status}: ${response.statusText}`);
+        }
+
+        return {
+            success: true,
+            data: result.data
+        };
+    } catch (error) {
+        console.error('Erreur lors du traitement du PDF pour V3:', error);
+        return {
+            success: false,
+            error: error instanceof Error ? error.message : 'Erreur inconnue'
+        };
+    }
+};
+
 /**
  * Service pour analyser un template de manière avancée
  * @param file - Fichier à analyser